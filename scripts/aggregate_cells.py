@@ -0,0 +1,139 @@
+"""Summarize columns of a .xlsx sheet (count, sum, mean, min, max, distinct, group by)."""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import output_json
+
+
+def _aggregate_file(path, sheet, cell_range, columns, group_by, aggregates,
+                    header=False, expr=None, max_groups=1000):
+    from xlsx_io import XlsxFile, parse_range, range_ref, num_to_col
+    from row_filter import compile_filter, column_number
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        sheet_name = sheet or xf.sheet_names[0]
+        if sheet_name not in xf.sheet_names:
+            return {"error": f"Sheet '{sheet_name}' not found"}
+        cell_range = cell_range or xf.sheet_dimension(sheet_name)
+        if cell_range is None:
+            return {"error": f"Sheet '{sheet_name}' has no dimension; pass a range"}
+        try:
+            c1, r1, c2, r2 = parse_range(cell_range)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        # With a header, the first row names the columns and isn't aggregated
+        names, first = {}, r1
+        if header:
+            for i, name in enumerate(xf.read_values(sheet_name, range_ref(c1, r1, c2, r1))[0]):
+                if name is not None:
+                    names.setdefault(str(name).strip(), c1 + i)
+            first = r1 + 1
+        labels = {cn: name for name, cn in names.items()}
+
+        try:
+            cols = [column_number(str(c), names, (c1, c2)) for c in columns]
+            groups = [column_number(str(c), names, (c1, c2)) for c in group_by]
+            where = compile_filter(expr, names, (c1, c2)) if expr else None
+        except ValueError as e:
+            return {"error": str(e)}
+
+        start = time.perf_counter()
+        summary = []
+        if first <= r2:
+            summary = xf.aggregate(sheet_name, range_ref(c1, first, c2, r2),
+                                   cols, groups, where, aggregates)
+        elapsed = time.perf_counter() - start
+
+        def label(cn):
+            return labels.get(cn) or num_to_col(cn)
+
+        def named(entry):
+            return {
+                **({"key": dict(zip(map(label, groups), entry["key"]))} if groups else {}),
+                "rows": entry["rows"],
+                "columns": dict(zip(map(label, cols), entry["columns"]))
+            }
+
+        result = {"path": path, "sheet": sheet_name, "range": cell_range}
+        if expr:
+            result["filter"] = expr
+        if groups:
+            result["groupBy"] = [label(cn) for cn in groups]
+            result["groupCount"] = len(summary)
+            result["groups"] = [named(entry) for entry in summary[:max_groups]]
+            if len(summary) > max_groups:
+                result["truncated"] = True
+        else:
+            result.update(named(summary[0]) if summary else
+                          {"rows": 0, "columns": {label(cn): {} for cn in cols}})
+        result["seconds"] = round(elapsed, 3)
+        return result
+    except Exception as e:
+        return {"error": f"Failed to aggregate: {e}"}
+    finally:
+        xf.close()
+
+
+def _name_list(text):
+    """A JSON array of column names/letters, or a comma-separated list."""
+    if text is None:
+        return []
+    try:
+        names = json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        names = [part.strip() for part in text.split(',') if part.strip()]
+    return names if isinstance(names, list) else [names]
+
+
+def main():
+    from xlsx_io import AGGREGATES
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--sheet', default=None)
+    parser.add_argument('--range', default=None,
+                        help='Range to summarize (default: the sheet\'s used range)')
+    parser.add_argument('--columns', default=None,
+                        help='Columns to aggregate: JSON array or comma-separated letters/names')
+    parser.add_argument('--group-by', default=None,
+                        help='Columns to group by: JSON array or comma-separated letters/names')
+    parser.add_argument('--aggregates', default='count,sum,mean,min,max',
+                        help=f'Comma-separated subset of {",".join(AGGREGATES)}')
+    parser.add_argument('--header', action='store_true',
+                        help='Take column names from the first row')
+    parser.add_argument('--filter', default=None,
+                        help='Only aggregate rows matching this expression (as read_cells --filter)')
+    parser.add_argument('--max-groups', type=int, default=1000)
+    args = parser.parse_args()
+
+    aggregates = [a.strip() for a in args.aggregates.split(',') if a.strip()]
+    unknown = [a for a in aggregates if a not in AGGREGATES]
+    if unknown:
+        output_json({"error": f"Unknown aggregate(s): {', '.join(unknown)}; "
+                              f"choose from {', '.join(AGGREGATES)}"})
+        return
+    columns, group_by = _name_list(args.columns), _name_list(args.group_by)
+    if not columns and not group_by:
+        output_json({"error": "Either --columns or --group-by is required"})
+        return
+
+    output_json(_aggregate_file(args.path, args.sheet, args.range, columns, group_by,
+                                aggregates, args.header, args.filter, args.max_groups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Append rows below the last used row of a sheet (live or file)."""
+
+import argparse
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import (
+    get_app, get_workbook, get_sheet,
+    set_performance_mode, restore_performance_mode, output_json, read_stdin_json
+)
+
+
+# ---------------------------------------------------------------------------
+# xlwings (live Excel / workbook mode)
+# ---------------------------------------------------------------------------
+
+def _append_live(workbook, rows, sheet, column):
+    app, err = get_app()
+    if err:
+        return {"error": err}
+    wb, err = get_workbook(app, workbook)
+    if err:
+        return {"error": err}
+    ws, err = get_sheet(wb, sheet)
+    if err:
+        return {"error": err}
+
+    perf = set_performance_mode(wb.app, True)
+    try:
+        used = ws.used_range
+        last = used.last_cell.row
+        if last == 1 and used.count == 1 and used.value is None:
+            last = 0  # empty sheet
+
+        width = max(len(r) for r in rows)
+        rows = [r + [None] * (width - len(r)) for r in rows]
+        try:
+            start = ws.range(f"{column}{last + 1}")
+        except Exception as e:
+            return {"error": f"Invalid column '{column}': {e}"}
+        rng = start.resize(len(rows), width)
+        rng.value = rows
+
+        wb.save()
+
+        return {
+            "success": True,
+            "workbook": wb.name,
+            "sheet": ws.name,
+            "range": rng.address.replace('$', ''),
+            "rows": len(rows)
+        }
+    except Exception as e:
+        return {"error": f"Failed to append: {e}"}
+    finally:
+        restore_performance_mode(wb.app, perf)
+
+
+# ---------------------------------------------------------------------------
+# xlsx_io (file-based, pure Python ZIP/XML, no Excel needed)
+# ---------------------------------------------------------------------------
+
+def _append_file(path, rows, sheet, column, strings='shared'):
+    from xlsx_io import XlsxFile, parse_cell_ref
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        sheet_name = sheet or xf.sheet_names[0]
+        if sheet_name not in xf.sheet_names:
+            return {"error": f"Sheet '{sheet_name}' not found"}
+
+        try:
+            _, start_col = parse_cell_ref(f"{column}1")
+        except ValueError:
+            return {"error": f"Invalid column '{column}'"}
+
+        written = xf.append_rows(sheet_name, rows, start_col, strings)
+        xf.save()
+
+        return {
+            "success": True,
+            "path": path,
+            "sheet": sheet_name,
+            "range": written,
+            "rows": len(rows)
+        }
+    except Exception as e:
+        return {"error": f"Failed to append: {e}"}
+    finally:
+        xf.close()
+
+
+def _to_rows(value):
+    """Normalize the --values payload to a list of row lists."""
+    if not isinstance(value, list):
+        return [[value]]
+    if value and all(isinstance(r, list) for r in value):
+        return value
+    return [value]  # flat array: a single row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workbook', default=None)
+    parser.add_argument('--path', default=None)
+    parser.add_argument('--values', default=None)
+    parser.add_argument('--values-stdin', action='store_true',
+                        help='Read the values as JSON from stdin (large payloads)')
+    parser.add_argument('--sheet', default=None)
+    parser.add_argument('--column', default='A')
+    parser.add_argument('--strings', choices=['shared', 'inline', 'auto'], default='shared',
+                        help='How text is stored in file mode: shared string table, '
+                             'inline in the cell, or per column by uniqueness')
+    args = parser.parse_args()
+
+    if not args.workbook and not args.path:
+        output_json({"error": "Either --workbook or --path is required"})
+        return
+
+    if args.values_stdin:
+        try:
+            value = read_stdin_json()
+        except ValueError:
+            output_json({"error": "Invalid JSON for values on stdin"})
+            return
+    elif args.values is None:
+        output_json({"error": "Either --values or --values-stdin is required"})
+        return
+    else:
+        try:
+            value = json.loads(args.values)
+        except (json.JSONDecodeError, ValueError):
+            value = args.values
+
+    rows = _to_rows(value)
+    if not any(rows):
+        output_json({"error": "No rows to append"})
+        return
+
+    if args.path:
+        result = _append_file(args.path, rows, args.sheet, args.column, args.strings)
+    else:
+        result = _append_live(args.workbook, rows, args.sheet, args.column)
+
+    output_json(result)
+
+
+if __name__ == "__main__":
+    main()
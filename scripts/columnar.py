@@ -0,0 +1,196 @@
+"""Write cell ranges to columnar binary files (Arrow IPC, NumPy .npy/.npz).
+
+Each column gets a single type inferred from its values, so consumers get
+typed arrays instead of re-parsing JSON; date and time cells give date,
+datetime and time columns. The output is uncompressed and
+can be memory-mapped: pyarrow.memory_map() for Arrow files,
+numpy.load(mmap_mode='r') for .npy.
+
+pyarrow and numpy are optional; only the one the output format needs has
+to be installed.
+"""
+
+import os
+import zipfile
+from datetime import datetime, date, time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Output formats by file extension
+FORMATS = {
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.npy': 'npy',
+    '.npz': 'npz',
+}
+
+
+def output_format(path):
+    """Format name for an output path, from its extension; None if unknown."""
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def infer_type(values):
+    """The narrowest type holding every non-empty value of a column.
+
+    'null' (nothing but empty cells), 'bool', 'int64', 'float64',
+    'date', 'datetime', 'time' or 'string'. Dates mixed with datetimes
+    are 'datetime'; columns mixing text with other values, or dates with
+    numbers, are 'string'.
+    """
+    kind = 'null'
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool):
+            t = 'bool'
+        elif isinstance(v, int):
+            t = 'int64' if -2 ** 63 <= v < 2 ** 63 else 'float64'
+        elif isinstance(v, float):
+            t = 'float64'
+        elif isinstance(v, datetime):
+            t = 'datetime'
+        elif isinstance(v, date):
+            t = 'date'
+        elif isinstance(v, time):
+            t = 'time'
+        else:
+            return 'string'
+        if kind == 'null' or kind == t:
+            kind = t
+        elif {kind, t} <= {'int64', 'float64'}:
+            kind = 'float64'
+        elif {kind, t} <= {'date', 'datetime'}:
+            kind = 'datetime'
+        else:
+            return 'string'
+    return kind
+
+
+def _text(v):
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return 'TRUE' if v else 'FALSE'
+    if isinstance(v, (datetime, date, time)):
+        return v.isoformat()
+    return str(v)
+
+
+def column_names(header, count, first_col):
+    """Column names: header cells where usable, else column letters."""
+    from xlsx_io import num_to_col
+
+    names, seen = [], set()
+    for i in range(count):
+        name = header[i] if header is not None and i < len(header) else None
+        name = _text(name).strip() if name is not None else ''
+        if not name or name in seen:
+            name = num_to_col(first_col + i)
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def write_columns(path, names, columns, fmt=None):
+    """Write columns (lists of cell values) to path; returns the schema.
+
+    The schema is a list of {"name", "type", "nulls"} dicts, one per
+    column. Dates are Arrow date32, timestamp[ms] and time64[us] columns;
+    in NumPy datetime64[D], datetime64[ms] and, for times of day,
+    timedelta64[ms] since midnight. NumPy arrays have no missing values
+    otherwise, so there empty cells become NaN in numeric columns (int64
+    and bool columns with empty cells are written as float64), NaT in
+    date columns and '' in string columns.
+    """
+    fmt = fmt or output_format(path)
+    if fmt not in ('arrow', 'npy', 'npz'):
+        raise ValueError(f"Unsupported output format: {path} "
+                         f"(use {', '.join(sorted(FORMATS))})")
+    types = [infer_type(col) for col in columns]
+    nulls = [sum(v is None for v in col) for col in columns]
+
+    if fmt == 'arrow':
+        if pa is None:
+            raise RuntimeError("Arrow output needs pyarrow (pip install pyarrow)")
+        _write_arrow(path, names, columns, types)
+    else:
+        if np is None:
+            raise RuntimeError("NumPy output needs numpy (pip install numpy)")
+        types = ['float64' if t == 'null' or (n and t in ('int64', 'bool')) else t
+                 for t, n in zip(types, nulls)]
+        arrays = [_numpy_array(col, t) for col, t in zip(columns, types)]
+        if fmt == 'npy':
+            # One structured array: a record per row, a field per column
+            rows = len(columns[0]) if columns else 0
+            table = np.empty(rows, dtype=[(n, a.dtype) for n, a in zip(names, arrays)])
+            for n, a in zip(names, arrays):
+                table[n] = a
+            np.save(path, table)
+        else:
+            _write_npz(path, names, arrays)
+
+    return [{"name": n, "type": t, "nulls": k} for n, t, k in zip(names, types, nulls)]
+
+
+def _write_arrow(path, names, columns, types):
+    pa_types = {'null': pa.null(), 'bool': pa.bool_(), 'int64': pa.int64(),
+                'float64': pa.float64(), 'string': pa.string(), 'date': pa.date32(),
+                'datetime': pa.timestamp('ms'), 'time': pa.time64('us')}
+    arrays = []
+    for col, t in zip(columns, types):
+        if t == 'string':
+            col = [_text(v) for v in col]
+        elif t == 'float64':
+            col = [None if v is None else float(v) for v in col]
+        elif t == 'datetime':
+            col = [_as_datetime(v) for v in col]
+        arrays.append(pa.array(col, type=pa_types[t]))
+    table = pa.Table.from_arrays(arrays, names=names)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_npz(path, names, arrays):
+    """Write arrays as an uncompressed .npz, one '<name>.npy' member each.
+
+    The same layout np.savez() writes, but names are not passed as keyword
+    arguments, where 'file' or 'allow_pickle' would clash with its own.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as z:
+        for name, a in zip(names, arrays):
+            with z.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, a, allow_pickle=False)
+
+
+def _as_datetime(v):
+    if v is None or isinstance(v, datetime):
+        return v
+    return datetime(v.year, v.month, v.day)
+
+
+def _numpy_array(col, t):
+    if t in ('date', 'datetime'):
+        return np.array(col, dtype='datetime64[D]' if t == 'date' else 'datetime64[ms]')
+    if t == 'time':
+        ms = [np.timedelta64('NaT') if v is None else
+              ((v.hour * 60 + v.minute) * 60 + v.second) * 1000 + v.microsecond // 1000
+              for v in col]
+        return np.array(ms, dtype='timedelta64[ms]')
+    if t == 'string':
+        col = ['' if v is None else _text(v) for v in col]
+        return np.array(col, dtype=f'U{max(map(len, col), default=0) or 1}')
+    if t == 'float64':
+        return np.array([np.nan if v is None else float(v) for v in col], dtype=np.float64)
+    return np.array(col, dtype=np.int64 if t == 'int64' else np.bool_)
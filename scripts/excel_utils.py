@@ -115,6 +115,19 @@ def rgb_tuple_to_hex(rgb):
     return "#{:02x}{:02x}{:02x}".format(r, g, b)
 
 
+def csv_delimiter(name, path):
+    """Resolve a --delimiter option; by default TSV for .tsv/.tab files, else CSV."""
+    if name:
+        return {'tab': '\t', 'comma': ',', 'semicolon': ';'}.get(name, name)
+    return '\t' if path.lower().endswith(('.tsv', '.tab')) else ','
+
+
+def read_stdin_json():
+    """Parse a JSON payload sent on stdin (payloads too large for argv)."""
+    import io
+    return json.load(io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8'))
+
+
 def output_json(result):
     """Print result as JSON with proper encoding."""
     def json_serial(obj):
@@ -0,0 +1,87 @@
+"""Export a sheet or range of a .xlsx file to a CSV/TSV file, streaming rows."""
+
+import argparse
+import csv
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import output_json, csv_delimiter
+
+
+def _export_file(path, output, sheet, cell_range, delimiter):
+    from xlsx_io import XlsxFile, parse_range, value_to_text
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        sheet_name = sheet or xf.sheet_names[0]
+        if sheet_name not in xf.sheet_names:
+            return {"error": f"Sheet '{sheet_name}' not found"}
+
+        cell_range = cell_range or xf.sheet_dimension(sheet_name)
+        if not cell_range:
+            return {"error": "Sheet has no <dimension>; pass a range"}
+        try:
+            c1, r1, c2, r2 = parse_range(cell_range)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        start = time.perf_counter()
+        rows = 0
+        last = r1 - 1
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            for rn, values in xf.iter_values(sheet_name, cell_range):
+                # Keep row positions: empty rows in between become blank lines
+                for _ in range(rn - last - 1):
+                    writer.writerow([])
+                writer.writerow([value_to_text(v) for v in values])
+                rows += rn - last
+                last = rn
+        elapsed = time.perf_counter() - start
+
+        return {
+            "success": True,
+            "path": path,
+            "sheet": sheet_name,
+            "range": cell_range,
+            "output": os.path.abspath(output),
+            "rows": rows,
+            "columns": c2 - c1 + 1,
+            "bytes": os.path.getsize(output),
+            "seconds": round(elapsed, 3),
+            "rowsPerSecond": int(rows / elapsed) if elapsed > 0 else rows
+        }
+    except Exception as e:
+        return {"error": f"Failed to export: {e}"}
+    finally:
+        xf.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--sheet', default=None)
+    parser.add_argument('--range', default=None)
+    parser.add_argument('--delimiter', default=None)
+    args = parser.parse_args()
+
+    delimiter = csv_delimiter(args.delimiter, args.output)
+    if len(delimiter) != 1:
+        output_json({"error": f"Delimiter must be a single character: {args.delimiter}"})
+        return
+
+    output_json(_export_file(args.path, args.output, args.sheet, args.range, delimiter))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Find the cells of a .xlsx file whose text matches a query, across sheets."""
+
+import argparse
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import output_json
+
+
+def _find_file(path, query, match, case_sensitive, sheets, use_index, limit):
+    from xlsx_io import XlsxFile, cell_ref
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+
+    try:
+        # A cached find index answers without the sheet parts
+        xf = XlsxFile(path).open(sheets=() if use_index else (sheets or True))
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        missing = [s for s in sheets if s not in xf.sheet_names]
+        if missing:
+            return {"error": f"Sheet '{missing[0]}' not found"}
+
+        start = time.perf_counter()
+        matches, count = [], 0
+        try:
+            for sheet_name, rn, cn, text in xf.find_cells(query, match, case_sensitive,
+                                                          sheets or None, use_index):
+                count += 1
+                if count <= limit:
+                    matches.append({"sheet": sheet_name, "cell": cell_ref(rn, cn), "value": text})
+        except ValueError as e:
+            return {"error": str(e)}
+
+        result = {
+            "path": path,
+            "query": query,
+            "match": match,
+            "matches": matches,
+            "count": count
+        }
+        if count > limit:
+            result["truncated"] = True
+        result["indexed"] = use_index
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+    except Exception as e:
+        return {"error": f"Failed to search: {e}"}
+    finally:
+        xf.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--query', required=True)
+    parser.add_argument('--match', choices=['contains', 'exact', 'regex'], default='contains')
+    parser.add_argument('--case-sensitive', action='store_true')
+    parser.add_argument('--sheet', action='append', default=[],
+                        help='Search only this sheet (repeatable; default: all sheets)')
+    parser.add_argument('--index', action='store_true',
+                        help='Search through a cached value-to-cells index, built on first use')
+    parser.add_argument('--limit', type=int, default=1000,
+                        help='Return at most this many matches (all are counted)')
+    args = parser.parse_args()
+
+    if not args.query:
+        output_json({"error": "--query must not be empty"})
+        return
+
+    output_json(_find_file(args.path, args.query, args.match, args.case_sensitive,
+                           args.sheet, args.index, args.limit))
+
+
+if __name__ == "__main__":
+    main()
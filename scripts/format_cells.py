@@ -8,7 +8,7 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 from excel_utils import (
     get_app, get_workbook, get_sheet,
-    hex_to_rgb_int, output_json, IS_WINDOWS
+    hex_to_rgb_int, output_json, read_stdin_json, IS_WINDOWS
 )
 
 # Excel alignment constants (for xlwings live mode)
@@ -167,14 +167,14 @@ def _apply_borders_live(rng, borders_config):
 # xlsx_io (file-based, pure Python ZIP/XML, no Excel needed)
 # ---------------------------------------------------------------------------
 
-def _format_file(path, cell_range, fmt, sheet):
+def _format_file(path, cell_range, fmt, sheet, compact=False):
     from xlsx_io import XlsxFile
 
     if not os.path.exists(path):
         return {"error": f"File not found: {path}"}
 
     try:
-        xf = XlsxFile(path).open()
+        xf = XlsxFile(path).open(sheets=[sheet])
     except Exception as e:
         return {"error": f"Cannot open file: {e}"}
 
@@ -184,9 +184,13 @@ def _format_file(path, cell_range, fmt, sheet):
             return {"error": f"Sheet '{sheet_name}' not found"}
 
         xf.apply_format(sheet_name, cell_range, fmt)
+        compaction = xf.compact_styles() if compact else None
         xf.save()
 
-        return {"success": True, "path": path, "sheet": sheet_name, "range": cell_range}
+        result = {"success": True, "path": path, "sheet": sheet_name, "range": cell_range}
+        if compaction is not None:
+            result["styles"] = compaction
+        return result
     except Exception as e:
         return {"error": f"Failed to format: {e}"}
     finally:
@@ -202,22 +206,29 @@ def main():
     parser.add_argument('--workbook', default=None)
     parser.add_argument('--path', default=None)
     parser.add_argument('--range', required=True)
-    parser.add_argument('--format', required=True)
+    parser.add_argument('--format', default=None)
+    parser.add_argument('--format-stdin', action='store_true',
+                        help='Read the format as JSON from stdin (large payloads)')
     parser.add_argument('--sheet', default=None)
+    parser.add_argument('--compact-styles', action='store_true',
+                        help='Merge duplicate styles and drop unused ones when saving (file mode)')
     args = parser.parse_args()
 
     if not args.workbook and not args.path:
         output_json({"error": "Either --workbook or --path is required"})
         return
+    if args.format is None and not args.format_stdin:
+        output_json({"error": "Either --format or --format-stdin is required"})
+        return
 
     try:
-        fmt = json.loads(args.format)
-    except json.JSONDecodeError:
+        fmt = read_stdin_json() if args.format_stdin else json.loads(args.format)
+    except ValueError:
         output_json({"error": "Invalid JSON for format"})
         return
 
     if args.path:
-        result = _format_file(args.path, args.range, fmt, args.sheet)
+        result = _format_file(args.path, args.range, fmt, args.sheet, args.compact_styles)
     else:
         result = _format_live(args.workbook, args.range, fmt, args.sheet)
 
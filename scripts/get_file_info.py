@@ -0,0 +1,40 @@
+"""Describe a .xlsx file on disk: sheets, used ranges, part sizes, names, tables."""
+
+import argparse
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import output_json
+
+
+def _file_info(path):
+    from xlsx_io import file_info
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+
+    start = time.perf_counter()
+    try:
+        info = file_info(path)
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    return {
+        "path": path,
+        **info,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    args = parser.parse_args()
+
+    output_json(_file_info(args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Import a CSV/TSV file into a sheet of a .xlsx file, streaming rows."""
+
+import argparse
+import csv
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from excel_utils import output_json, csv_delimiter
+
+
+def _import_file(path, source, sheet, start_ref, delimiter, strings='shared', compact=False):
+    from xlsx_io import XlsxFile, parse_cell_ref, range_ref, text_to_value
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+    if not os.path.exists(source):
+        return {"error": f"File not found: {source}"}
+    try:
+        r1, c1 = parse_cell_ref(start_ref)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        sheet_name = sheet or xf.sheet_names[0]
+        if sheet_name not in xf.sheet_names:
+            return {"error": f"Sheet '{sheet_name}' not found"}
+
+        start = time.perf_counter()
+        # First pass sizes the target range; the second streams the values
+        count = width = 0
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            for fields in csv.reader(f, delimiter=delimiter):
+                count += 1
+                width = max(width, len(fields))
+        if not count:
+            return {"error": f"No rows in {source}"}
+
+        rng = range_ref(c1, r1, c1 + max(width, 1) - 1, r1 + count - 1)
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            xf.write_rows(sheet_name, rng,
+                          ([text_to_value(v) for v in fields] for fields in reader),
+                          strings)
+        compaction = xf.compact_shared_strings() if compact else None
+        xf.save()
+        elapsed = time.perf_counter() - start
+
+        result = {
+            "success": True,
+            "path": path,
+            "sheet": sheet_name,
+            "range": rng,
+            "source": os.path.abspath(source),
+            "rows": count,
+            "columns": width,
+            "seconds": round(elapsed, 3),
+            "rowsPerSecond": int(count / elapsed) if elapsed > 0 else count
+        }
+        if compaction is not None:
+            result["sharedStrings"] = compaction
+        return result
+    except Exception as e:
+        return {"error": f"Failed to import: {e}"}
+    finally:
+        xf.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--input', required=True)
+    parser.add_argument('--sheet', default=None)
+    parser.add_argument('--start', default='A1')
+    parser.add_argument('--delimiter', default=None)
+    parser.add_argument('--strings', choices=['shared', 'inline', 'auto'], default='shared',
+                        help='How text is stored: shared string table, '
+                             'inline in the cell, or per column by uniqueness')
+    parser.add_argument('--compact-strings', action='store_true',
+                        help='Drop shared strings no longer used by any cell when saving')
+    args = parser.parse_args()
+
+    delimiter = csv_delimiter(args.delimiter, args.input)
+    if len(delimiter) != 1:
+        output_json({"error": f"Delimiter must be a single character: {args.delimiter}"})
+        return
+
+    output_json(_import_file(args.path, args.input, args.sheet, args.start, delimiter,
+                             args.strings, args.compact_strings))
+
+
+if __name__ == "__main__":
+    main()
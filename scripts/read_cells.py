@@ -1,6 +1,8 @@
 """Read cell values and optionally formatting from an Excel range."""
 
 import argparse
+import hashlib
+import json
 import sys
 import os
 from datetime import datetime, date
@@ -28,7 +30,8 @@ def clean_value(val):
 # xlwings (live Excel / workbook mode)
 # ---------------------------------------------------------------------------
 
-def _read_live(workbook, cell_range, sheet, include_formats, values_only=False):
+def _read_live(workbook, cell_range, sheet, include_formats, values_only=False,
+               if_none_match=None, group_formats=False):
     app, err = get_app()
     if err:
         return {"error": err}
@@ -55,6 +58,17 @@ def _read_live(workbook, cell_range, sheet, include_formats, values_only=False):
             ws, top_left.row, top_left.column,
             bottom_right.row, bottom_right.column
         )
+        if group_formats:
+            result["formats"] = _group_formats(result["formats"])
+
+    # Live Excel has no cheap change marker, so the tag hashes the content:
+    # cells are still read, but an unchanged range returns a tiny payload
+    payload = json.dumps([result["values"], result.get("formats")], default=str)
+    etag = hashlib.sha1(f'{cell_range}|{payload}'.encode('utf-8')).hexdigest()[:20]
+    if if_none_match and if_none_match == etag:
+        return {"workbook": wb.name, "sheet": ws.name, "range": cell_range,
+                "etag": etag, "notModified": True}
+    result["etag"] = etag
     return result
 
 
@@ -136,6 +150,23 @@ def _read_formats_live(sheet, r1, c1, r2, c2):
     return formats
 
 
+def _group_formats(formats):
+    """Merge per-cell format dicts into rectangles of equal formats."""
+    from xlsx_io import format_rects, parse_cell_ref
+
+    by_key = {}
+
+    def cells():
+        for fmt in formats:
+            fmt = dict(fmt)
+            row, col = parse_cell_ref(fmt.pop("cell"))
+            key = json.dumps(fmt, sort_keys=True)
+            by_key[key] = fmt
+            yield row, col, key
+
+    return [dict(by_key[key], range=ref) for ref, key in format_rects(cells())]
+
+
 def _borders_live(cell):
     borders = {}
     names_indices = [("top", 8), ("bottom", 9), ("left", 7), ("right", 10)]
@@ -175,28 +206,98 @@ def _alignment_live(cell):
 # xlsx_io (file-based, pure Python ZIP/XML, no Excel needed)
 # ---------------------------------------------------------------------------
 
-def _read_file(path, cell_range, sheet, include_formats):
-    from xlsx_io import XlsxFile
+def _read_file(path, cell_range, sheet, include_formats, if_none_match=None,
+               group_formats=False):
+    from xlsx_io import XlsxFile, sheet_etag
 
     if not os.path.exists(path):
         return {"error": f"File not found: {path}"}
 
+    # The version tag only needs the ZIP directory, so an unchanged range
+    # is answered before anything is inflated or parsed
     try:
-        xf = XlsxFile(path).open()
+        sheet_name, etag = sheet_etag(path, sheet, cell_range, include_formats,
+                                      'grouped' if include_formats and group_formats else None)
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Cannot open file: {e}"}
+    if if_none_match and if_none_match == etag:
+        return {"path": path, "sheet": sheet_name, "range": cell_range,
+                "etag": etag, "notModified": True}
 
     try:
-        sheet_name = sheet or xf.sheet_names[0]
-        if sheet_name not in xf.sheet_names:
-            return {"error": f"Sheet '{sheet_name}' not found"}
+        xf = XlsxFile(path).open(sheets=[sheet_name])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
 
+    try:
         values = xf.read_values(sheet_name, cell_range)
-        result = {"path": path, "sheet": sheet_name, "range": cell_range, "values": values}
+        result = {"path": path, "sheet": sheet_name, "range": cell_range,
+                  "values": values, "etag": etag}
 
         if include_formats:
-            result["formats"] = xf.read_formats(sheet_name, cell_range)
+            result["formats"] = xf.read_formats(sheet_name, cell_range, group_formats)
+
+        return result
+    except Exception as e:
+        return {"error": f"Failed to read: {e}"}
+    finally:
+        xf.close()
+
+
+def _read_filtered(path, cell_range, sheet, expr, header=False, if_none_match=None):
+    """Read the rows of a range that match a filter, with their row numbers."""
+    from xlsx_io import XlsxFile, sheet_etag, parse_range, range_ref
+    from row_filter import compile_filter
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+    try:
+        c1, r1, c2, r2 = parse_range(cell_range)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    try:
+        sheet_name, etag = sheet_etag(path, sheet, cell_range, False,
+                                      f'filter:{int(header)}:{expr}')
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+    if if_none_match and if_none_match == etag:
+        return {"path": path, "sheet": sheet_name, "range": cell_range,
+                "etag": etag, "notModified": True}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet_name])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
 
+    try:
+        # With a header, the first row names the columns and isn't filtered
+        names, columns, first = {}, None, r1
+        if header:
+            columns = xf.read_values(sheet_name, range_ref(c1, r1, c2, r1))[0]
+            for i, name in enumerate(columns):
+                if name is not None:
+                    names.setdefault(str(name).strip(), c1 + i)
+            first = r1 + 1
+        try:
+            where = compile_filter(expr, names, (c1, c2))
+        except ValueError as e:
+            return {"error": f"Invalid filter: {e}"}
+
+        rows, values = [], []
+        if first <= r2:
+            for rn, vals in xf.iter_values(sheet_name, range_ref(c1, first, c2, r2), where):
+                rows.append(rn)
+                values.append(vals)
+
+        result = {"path": path, "sheet": sheet_name, "range": cell_range, "filter": expr}
+        if header:
+            result["header"] = columns
+        result.update({"rows": rows, "values": values, "matched": len(rows), "etag": etag})
         return result
     except Exception as e:
         return {"error": f"Failed to read: {e}"}
@@ -204,6 +305,68 @@ def _read_file(path, cell_range, sheet, include_formats):
         xf.close()
 
 
+def _read_to_file(path, cell_range, sheet, output, header=False):
+    """Write a range to a columnar binary file; returns the path and schema."""
+    from xlsx_io import XlsxFile, parse_range
+    from columnar import output_format, column_names, write_columns
+
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+    fmt = output_format(output)
+    if fmt is None:
+        return {"error": f"Unsupported output format: {output} (use .arrow, .npy or .npz)"}
+    try:
+        c1, r1, c2, r2 = parse_range(cell_range)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    try:
+        xf = XlsxFile(path).open(sheets=[sheet])
+    except Exception as e:
+        return {"error": f"Cannot open file: {e}"}
+
+    try:
+        sheet_name = sheet or xf.sheet_names[0]
+        if sheet_name not in xf.sheet_names:
+            return {"error": f"Sheet '{sheet_name}' not found"}
+
+        # Rows are streamed straight into per-column lists; empty rows
+        # keep their place so array index i is sheet row r1 + i
+        width = c2 - c1 + 1
+        columns = [[] for _ in range(width)]
+        last = r1 - 1
+        for rn, values in xf.iter_values(sheet_name, cell_range, date_objects=True):
+            for col, v in zip(columns, values):
+                col.extend([None] * (rn - last - 1))
+                col.append(v)
+            last = rn
+        for col in columns:
+            col.extend([None] * (r2 - last))
+
+        if header:
+            names = column_names([col[0] for col in columns], width, c1)
+            columns = [col[1:] for col in columns]
+        else:
+            names = column_names(None, width, c1)
+        schema = write_columns(output, names, columns, fmt)
+
+        return {
+            "path": path,
+            "sheet": sheet_name,
+            "range": cell_range,
+            "output": os.path.abspath(output),
+            "format": fmt,
+            "rows": len(columns[0]),
+            "schema": schema
+        }
+    except (RuntimeError, ValueError) as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Failed to read: {e}"}
+    finally:
+        xf.close()
+
+
 # ---------------------------------------------------------------------------
 # main
 # ---------------------------------------------------------------------------
@@ -215,19 +378,48 @@ def main():
     parser.add_argument('--range', required=True)
     parser.add_argument('--sheet', default=None)
     parser.add_argument('--formats', action='store_true')
+    parser.add_argument('--group-formats', action='store_true',
+                        help='With --formats: one entry per rectangle of equally formatted cells')
     parser.add_argument('--values-only', action='store_true',
                         help='Return calculated values instead of formulas (default: return formulas)')
+    parser.add_argument('--if-none-match', default=None,
+                        help='etag from a previous read; returns notModified if unchanged')
+    parser.add_argument('--output', default=None,
+                        help='Write the range to a .arrow/.npy/.npz file instead of returning values')
+    parser.add_argument('--header', action='store_true',
+                        help='With --output or --filter: take column names from the first row')
+    parser.add_argument('--filter', default=None,
+                        help='Return only the rows matching this expression, '
+                             'e.g. \'Status == "Open" and Amount > 10000\'')
     args = parser.parse_args()
 
     if not args.workbook and not args.path:
         output_json({"error": "Either --workbook or --path is required"})
         return
 
-    if args.path:
-        result = _read_file(args.path, args.range, args.sheet, args.formats)
+    if args.filter:
+        if not args.path:
+            result = {"error": "--filter is only supported with --path"}
+        elif args.output or args.formats:
+            result = {"error": "--filter can't be combined with --output or --formats"}
+        else:
+            result = _read_filtered(args.path, args.range, args.sheet, args.filter,
+                                    header=args.header, if_none_match=args.if_none_match)
+    elif args.output:
+        if not args.path:
+            result = {"error": "--output is only supported with --path"}
+        else:
+            result = _read_to_file(args.path, args.range, args.sheet, args.output,
+                                   header=args.header)
+    elif args.path:
+        result = _read_file(args.path, args.range, args.sheet, args.formats,
+                            if_none_match=args.if_none_match,
+                            group_formats=args.group_formats)
     else:
         result = _read_live(args.workbook, args.range, args.sheet, args.formats,
-                           values_only=args.values_only)
+                           values_only=args.values_only,
+                           if_none_match=args.if_none_match,
+                           group_formats=args.group_formats)
 
     output_json(result)
 
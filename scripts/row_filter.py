@@ -0,0 +1,252 @@
+"""Row filter expressions for reading only the matching rows of a range.
+
+    Status == "Open" and Amount > 10000
+    B in ["x", "y"] or not (`Due date` >= "2024-01-01")
+    Name ~ "^acme" and Region != null
+
+Columns are header names (backquoted when they aren't plain words) or
+column letters. Operators: == != < <= > >= (numbers with numbers, text
+with text: ISO dates compare as expected), in / not in [list], ~ and !~
+(regular expression search in the value as text), combined with and, or,
+not and parentheses. Values are numbers, quoted strings, true, false and
+null (an empty cell). A comparison between values of different types is
+false.
+
+Only rows with at least one cell in the range read are filtered; a row
+without any is skipped before the filter runs, so `A == null` matches
+rows that have other cells but none in A, never rows that are empty.
+"""
+
+import ast
+import re
+
+_TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<num>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)(?![\w.])
+  | (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<name>`[^`]+`)
+  | (?P<op>==|!=|<=|>=|!~|<|>|=|~|\(|\)|\[|\]|,)
+  | (?P<word>[^\W\d]\w*)
+)''', re.VERBOSE)
+
+_KEYWORDS = {'and', 'or', 'not', 'in'}
+_CONSTANTS = {'true': True, 'false': False, 'null': None}
+_COLUMN_RE = re.compile(r'^[A-Za-z]{1,3}$')
+
+
+class RowFilter:
+    """A compiled filter: call it with a {column number: value} dict.
+
+    columns is the set of column numbers the expression reads; cells
+    missing from the dict are empty.
+    """
+
+    def __init__(self, text, test, columns):
+        self.text = text
+        self.columns = frozenset(columns)
+        self._test = test
+
+    def __call__(self, values):
+        return self._test(values)
+
+
+def compile_filter(text, names=None, cols=None):
+    """Compile a filter expression into a RowFilter.
+
+    names maps header names to column numbers; cols is the (first, last)
+    column of the range read, which every referenced column must be in.
+    Raises ValueError for a malformed expression or an unknown column.
+    """
+    tokens = _tokenize(text)
+    parser = _Parser(tokens, names or {}, cols)
+    test = parser.expr()
+    if parser.peek() is not None:
+        raise ValueError(f"Unexpected {parser.peek()[1]!r} in filter")
+    return RowFilter(text, test, parser.columns)
+
+
+def column_number(name, names=None, cols=None, letters=True):
+    """Resolve a header name (or, with letters, a column letter) to a number.
+
+    Raises ValueError for an unknown column or one outside cols.
+    """
+    col = (names or {}).get(name)
+    if col is None and letters and _COLUMN_RE.match(name):
+        from xlsx_io import col_to_num
+        col = col_to_num(name.upper())
+    if col is None:
+        raise ValueError(f"Unknown column {name!r}")
+    if cols is not None and not cols[0] <= col <= cols[1]:
+        raise ValueError(f"Column {name!r} is outside the range read")
+    return col
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"Invalid filter at: {text[pos:].strip()[:20]!r}")
+        kind = m.lastgroup
+        tok = m.group(kind)
+        if kind == 'word' and tok.lower() in _KEYWORDS:
+            kind, tok = 'op', tok.lower()
+        tokens.append((kind, tok))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens, names, cols):
+        self.tokens = tokens
+        self.pos = 0
+        self.names = names
+        self.cols = cols
+        self.columns = set()
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, op=None):
+        tok = self.peek()
+        if tok is None:
+            raise ValueError("Filter ends unexpectedly")
+        if op is not None and tok != ('op', op):
+            raise ValueError(f"Expected {op!r} in filter, got {tok[1]!r}")
+        self.pos += 1
+        return tok
+
+    def accept(self, op):
+        if self.peek() == ('op', op):
+            self.pos += 1
+            return True
+        return False
+
+    def expr(self):
+        parts = [self.conjunction()]
+        while self.accept('or'):
+            parts.append(self.conjunction())
+        return parts[0] if len(parts) == 1 else lambda row: any(p(row) for p in parts)
+
+    def conjunction(self):
+        parts = [self.negation()]
+        while self.accept('and'):
+            parts.append(self.negation())
+        return parts[0] if len(parts) == 1 else lambda row: all(p(row) for p in parts)
+
+    def negation(self):
+        if self.accept('not'):
+            inner = self.negation()
+            return lambda row: not inner(row)
+        if self.accept('('):
+            inner = self.expr()
+            self.take(')')
+            return inner
+        return self.comparison()
+
+    def comparison(self):
+        col = self.column()
+        kind, op = self.take()
+        if kind != 'op':
+            raise ValueError(f"Expected an operator after a column, got {op!r}")
+        if op == 'not':
+            self.take('in')
+            op = 'not in'
+        if op in ('in', 'not in'):
+            members = self.list_value()
+            hit = lambda v: any(_equal(v, m) for m in members)
+            if op == 'in':
+                return lambda row: hit(row.get(col))
+            return lambda row: not hit(row.get(col))
+        if op in ('~', '!~'):
+            kind, tok = self.take()
+            if kind != 'str':
+                raise ValueError("A regular expression must be a quoted string")
+            try:
+                pattern = re.compile(ast.literal_eval(tok))
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression {tok}: {e}")
+            found = lambda v: v is not None and pattern.search(_text(v)) is not None
+            if op == '~':
+                return lambda row: found(row.get(col))
+            return lambda row: not found(row.get(col))
+        if op == '=':
+            op = '=='
+        if op not in _ORDER and op not in ('==', '!='):
+            raise ValueError(f"Unknown operator {op!r} in filter")
+        value = self.value()
+        if op == '==':
+            return lambda row: _equal(row.get(col), value)
+        if op == '!=':
+            return lambda row: not _equal(row.get(col), value)
+        if value is None or isinstance(value, bool):
+            raise ValueError(f"{op} needs a number or a string")
+        cmp = _ORDER[op]
+        return lambda row: _ordered(row.get(col), value, cmp)
+
+    def column(self):
+        kind, tok = self.take()
+        if kind == 'name':
+            name = tok[1:-1]
+        elif kind == 'word' and tok.lower() not in _CONSTANTS:
+            name = tok
+        else:
+            raise ValueError(f"Expected a column name or letter, got {tok!r}")
+        col = column_number(name, self.names, self.cols, letters=kind == 'word')
+        self.columns.add(col)
+        return col
+
+    def value(self):
+        kind, tok = self.take()
+        if kind == 'num':
+            return float(tok) if any(ch in tok for ch in '.eE') else int(tok)
+        if kind == 'str':
+            return ast.literal_eval(tok)
+        if kind == 'word' and tok.lower() in _CONSTANTS:
+            return _CONSTANTS[tok.lower()]
+        raise ValueError(f"Expected a value, got {tok!r}")
+
+    def list_value(self):
+        self.take('[')
+        members = []
+        if not self.accept(']'):
+            members.append(self.value())
+            while self.accept(','):
+                members.append(self.value())
+            self.take(']')
+        return members
+
+
+_ORDER = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _equal(v, target):
+    """Equality without matches across types (1, True and "1" differ)."""
+    if target is None:
+        return v is None
+    if isinstance(target, bool) or isinstance(v, bool):
+        return isinstance(v, bool) and isinstance(target, bool) and v == target
+    if _is_number(target):
+        return _is_number(v) and v == target
+    return isinstance(v, str) and v == target
+
+
+def _ordered(v, target, cmp):
+    if _is_number(target):
+        return _is_number(v) and cmp(v, target)
+    return isinstance(v, str) and cmp(v, target)
+
+
+def _text(v):
+    if isinstance(v, bool):
+        return 'TRUE' if v else 'FALSE'
+    return str(v)
@@ -8,7 +8,7 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 from excel_utils import (
     get_app, get_workbook, get_sheet,
-    set_performance_mode, restore_performance_mode, output_json
+    set_performance_mode, restore_performance_mode, output_json, read_stdin_json
 )
 
 
@@ -57,14 +57,14 @@ def _write_live(workbook, cell_range, value, sheet):
 # xlsx_io (file-based, pure Python ZIP/XML, no Excel needed)
 # ---------------------------------------------------------------------------
 
-def _write_file(path, cell_range, value, sheet):
+def _write_file(path, cell_range, value, sheet, strings='shared', compact=False):
     from xlsx_io import XlsxFile, parse_range
 
     if not os.path.exists(path):
         return {"error": f"File not found: {path}"}
 
     try:
-        xf = XlsxFile(path).open()
+        xf = XlsxFile(path).open(sheets=[sheet])
     except Exception as e:
         return {"error": f"Cannot open file: {e}"}
 
@@ -76,18 +76,25 @@ def _write_file(path, cell_range, value, sheet):
         c1, r1, c2, r2 = parse_range(cell_range)
         rows = r2 - r1 + 1
         cols = c2 - c1 + 1
-        value_2d = _to_2d(value, rows, cols)
-
-        xf.write_values(sheet_name, cell_range, value_2d)
+        if isinstance(value, str) and value.startswith('=') and rows * cols > 1:
+            # One formula for a range: shift its references per cell, as
+            # Excel does, stored as a single shared formula
+            xf.fill_formula(sheet_name, cell_range, value)
+        else:
+            xf.write_values(sheet_name, cell_range, _to_2d(value, rows, cols), strings)
+        compaction = xf.compact_shared_strings() if compact else None
         xf.save()
 
-        return {
+        result = {
             "success": True,
             "path": path,
             "sheet": sheet_name,
             "range": cell_range,
             "size": f"{rows}x{cols}"
         }
+        if compaction is not None:
+            result["sharedStrings"] = compaction
+        return result
     except Exception as e:
         return {"error": f"Failed to write: {e}"}
     finally:
@@ -129,21 +136,39 @@ def main():
     parser.add_argument('--workbook', default=None)
     parser.add_argument('--path', default=None)
     parser.add_argument('--range', required=True)
-    parser.add_argument('--value', required=True)
+    parser.add_argument('--value', default=None)
+    parser.add_argument('--value-stdin', action='store_true',
+                        help='Read the value as JSON from stdin (large payloads)')
     parser.add_argument('--sheet', default=None)
+    parser.add_argument('--strings', choices=['shared', 'inline', 'auto'], default='shared',
+                        help='How text is stored in file mode: shared string table, '
+                             'inline in the cell, or per column by uniqueness')
+    parser.add_argument('--compact-strings', action='store_true',
+                        help='Drop shared strings no longer used by any cell when saving (file mode)')
     args = parser.parse_args()
 
     if not args.workbook and not args.path:
         output_json({"error": "Either --workbook or --path is required"})
         return
 
-    try:
-        value = json.loads(args.value)
-    except (json.JSONDecodeError, ValueError):
-        value = args.value
+    if args.value_stdin:
+        try:
+            value = read_stdin_json()
+        except ValueError:
+            output_json({"error": "Invalid JSON for value on stdin"})
+            return
+    elif args.value is None:
+        output_json({"error": "Either --value or --value-stdin is required"})
+        return
+    else:
+        try:
+            value = json.loads(args.value)
+        except (json.JSONDecodeError, ValueError):
+            value = args.value
 
     if args.path:
-        result = _write_file(args.path, args.range, value, args.sheet)
+        result = _write_file(args.path, args.range, value, args.sheet, args.strings,
+                             args.compact_strings)
     else:
         result = _write_live(args.workbook, args.range, value, args.sheet)
 
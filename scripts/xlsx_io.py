@@ -3,18 +3,52 @@
 Manipulates ZIP/XML directly, preserving images, charts, and all
 non-modified content. Only the specific XML files that are changed
 get re-serialized; everything else is passed through byte-for-byte.
+
+XML is handled by lxml when it is installed (faster, and it keeps
+namespace declarations natively) and by xml.etree.ElementTree otherwise.
+Set EXCEL_MCP_XML_BACKEND=stdlib to force the stdlib backend.
 """
 
 import zipfile
-import xml.etree.ElementTree as ET
+import itertools
 import os
+import posixpath
 import re
 import copy
+import json
+import bisect
+import hashlib
+import mmap
+import struct
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from array import array
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+if _lxml_etree is not None and os.environ.get('EXCEL_MCP_XML_BACKEND', 'lxml') != 'stdlib':
+    ET = _lxml_etree
+    XML_BACKEND = 'lxml'
+    _XML_PARSER = ET.XMLParser(huge_tree=True, resolve_entities=False)
+else:
+    import xml.etree.ElementTree as ET
+    XML_BACKEND = 'stdlib'
+    _XML_PARSER = None
+
+# lxml keeps the original xmlns declarations; ElementTree drops unused ones
+_KEEPS_NS = XML_BACKEND == 'lxml'
 
 # OOXML namespaces
 NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
 NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
 NS_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_NS = 'http://www.w3.org/XML/1998/namespace'
 
 # Register known namespaces to preserve prefixes on serialization
 _KNOWN_NS = {
@@ -27,18 +61,97 @@ _KNOWN_NS = {
     'xr10': 'http://schemas.microsoft.com/office/spreadsheetml/2014/revision10',
     'xr2': 'http://schemas.microsoft.com/office/spreadsheetml/2015/revision2',
 }
+
+
+def _register_ns(prefix, uri):
+    """Register a serialization prefix (ElementTree only; lxml keeps nsmaps)."""
+    if _KEEPS_NS:
+        return
+    try:
+        ET.register_namespace(prefix, uri)
+    except ValueError:
+        pass
+
+
 for _p, _u in _KNOWN_NS.items():
-    ET.register_namespace(_p, _u)
+    _register_ns(_p, _u)
+
+
+def _serialize_default_ns(root, uri):
+    """Serialize a part whose default namespace isn't SpreadsheetML.
+
+    The prefix registry is global, so the default is restored afterwards;
+    otherwise sheets serialized later in the process get ns0: prefixes.
+    """
+    _register_ns('', uri)
+    try:
+        return _serialize(root)
+    finally:
+        _register_ns('', NS)
 
 
 def _tag(name):
     return f'{{{NS}}}{name}'
 
 
+# Row offset index: one entry per ROW_BLOCK rows, built for sheet parts of at
+# least ROW_INDEX_MIN_BYTES and persisted under the cache directory.
+ROW_BLOCK = 1024
+ROW_INDEX_MIN_BYTES = 4 * 1024 * 1024
+ROW_INDEX_ENABLED = os.environ.get('EXCEL_MCP_ROW_INDEX', '1') != '0'
+
+# Edits touching at most this many rows patch the raw sheet XML in place
+# instead of parsing and re-serializing the whole sheet
+ROW_PATCH_MAX_ROWS = 1000
+
+# Width given to <col> elements created to style whole columns when the sheet
+# sets no defaultColWidth (Excel's default for Calibri 11); a <col> without
+# a width would hide its columns.
+DEFAULT_COL_WIDTH = '9.140625'
+
+# How written text is stored: 'shared' adds it to sharedStrings.xml, 'inline'
+# puts it in the cell (t="inlineStr"), 'auto' picks per column: inline when at
+# least INLINE_UNIQUE_RATIO of the column's strings are distinct, judged on
+# the first INLINE_SAMPLE_ROWS rows when rows are streamed.
+STRING_MODES = ('shared', 'inline', 'auto')
+INLINE_UNIQUE_RATIO = 0.5
+INLINE_SAMPLE_ROWS = 1000
+
+# Aggregates XlsxFile.aggregate() (aggregate_cells) can compute per column
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max', 'distinct')
+
+# get_file_info reads at most this much of a sheet part looking for its
+# <dimension>, which comes before the cells
+DIMENSION_SCAN_BYTES = 64 * 1024
+
+# Parsed-workbook cache: decoded shared strings, compiled style tables and
+# compact cell data, keyed by ZIP member and shared by all processes. The
+# whole cache directory is kept under CACHE_MAX_BYTES (least recently used
+# entries are evicted first).
+WORKBOOK_CACHE_ENABLED = os.environ.get('EXCEL_MCP_WORKBOOK_CACHE', '1') != '0'
+CACHE_MAX_BYTES = int(os.environ.get('EXCEL_MCP_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# ZIP member storage: parts of SPILL_MIN_BYTES or more, and parts that would
+# take the inflated in-memory total past MAX_MEMORY_BYTES, are inflated into
+# temporary files and memory-mapped instead of being held on the heap.
+SPILL_MIN_BYTES = 16 * 1024 * 1024
+MAX_MEMORY_BYTES = int(os.environ.get('EXCEL_MCP_MAX_MEMORY_MB', '256')) * 1024 * 1024
+# Threads used to inflate the parts open() fetches up front (zlib releases
+# the GIL); below PARALLEL_INFLATE_MIN_BYTES of compressed data the parts
+# are inflated one by one, as thread start-up would cost more than it saves.
+INFLATE_WORKERS = int(os.environ.get('EXCEL_MCP_INFLATE_WORKERS', '0')) or min(8, os.cpu_count() or 1)
+PARALLEL_INFLATE_MIN_BYTES = 1024 * 1024
+
+
 # ---------------------------------------------------------------------------
 # Cell reference utilities
 # ---------------------------------------------------------------------------
 
+# Sheet size limits (XFD1048576)
+MAX_ROW = 1048576
+MAX_COL = 16384
+
+
 def col_to_num(col_str):
     n = 0
     for c in col_str.upper():
@@ -54,9 +167,12 @@ def num_to_col(n):
     return r
 
 
+_CELL_REF_RE = re.compile(r'^([A-Z]+)(\d+)$')
+
+
 def parse_cell_ref(ref):
     """Parse 'A1' -> (row, col)."""
-    m = re.match(r'^([A-Z]+)(\d+)$', ref.upper().replace('$', ''))
+    m = _CELL_REF_RE.match(ref.upper().replace('$', ''))
     if not m:
         raise ValueError(f"Invalid cell reference: {ref}")
     return int(m.group(2)), col_to_num(m.group(1))
@@ -73,10 +189,243 @@ def parse_range(range_str):
     return c1, r1, c2, r2
 
 
+def parse_area(range_str):
+    """parse_range that also takes whole columns ('A:C', rows 1 to MAX_ROW)
+    and whole rows ('2:5', columns 1 to MAX_COL). Spans must run top-left
+    to bottom-right."""
+    parts = range_str.replace('$', '').upper().split(':')
+    if len(parts) == 2 and all(p.isalpha() for p in parts):
+        c1, c2 = col_to_num(parts[0]), col_to_num(parts[1])
+        if not c1 <= c2 <= MAX_COL:
+            raise ValueError(f"Invalid column range: {range_str}")
+        return c1, 1, c2, MAX_ROW
+    if len(parts) == 2 and all(p.isdigit() for p in parts):
+        r1, r2 = int(parts[0]), int(parts[1])
+        if not 1 <= r1 <= r2 <= MAX_ROW:
+            raise ValueError(f"Invalid row range: {range_str}")
+        return 1, r1, MAX_COL, r2
+    c1, r1, c2, r2 = parse_range(range_str)
+    if c1 > c2 or r1 > r2:
+        raise ValueError(f"Invalid range: {range_str}")
+    return c1, r1, c2, r2
+
+
 def cell_ref(row, col):
     return f"{num_to_col(col)}{row}"
 
 
+def format_rects(cells):
+    """Group (row, col, key) cells into rectangles of equal keys.
+
+    cells come in row order, ascending columns within a row. Runs of
+    adjacent cells with the same key in a row are stacked with identical
+    runs (same columns and key) of the rows right below. Yields
+    (range ref, key) ordered by top-left cell; a single cell's ref is 'A1'.
+    """
+    done = []
+    open_rects = {}  # (first col, last col, key) -> [first row, last row]
+    runs, rn, run = {}, None, None
+
+    def end_row():
+        nonlocal open_rects
+        if run is not None:
+            runs[run[0], run[1], run[2]] = None
+        for span in runs:
+            rect = open_rects.pop(span, None)
+            if rect is not None and rect[1] == rn - 1:
+                rect[1] = rn
+            else:
+                if rect is not None:
+                    done.append((rect[0], span, rect[1]))
+                rect = [rn, rn]
+            runs[span] = rect
+        for span, rect in open_rects.items():
+            done.append((rect[0], span, rect[1]))
+        open_rects = dict(runs)
+        runs.clear()
+
+    for cr, cc, key in cells:
+        if cr != rn:
+            if rn is not None:
+                end_row()
+            rn, run = cr, None
+        if run is not None and run[2] == key and run[1] == cc - 1:
+            run[1] = cc
+        else:
+            if run is not None:
+                runs[run[0], run[1], run[2]] = None
+            run = [cc, cc, key]
+    if rn is not None:
+        end_row()
+    for span, rect in open_rects.items():
+        done.append((rect[0], span, rect[1]))
+
+    done.sort(key=lambda t: (t[0], t[1][0]))
+    for r1, (c1, c2, key), r2 in done:
+        if r1 == r2 and c1 == c2:
+            yield cell_ref(r1, c1), key
+        else:
+            yield range_ref(c1, r1, c2, r2), key
+
+
+def range_ref(c1, r1, c2, r2):
+    """(min_col, min_row, max_col, max_row) -> 'A1:C10', or 'A1' for one cell."""
+    if (c1, r1) == (c2, r2):
+        return cell_ref(r1, c1)
+    return f"{cell_ref(r1, c1)}:{cell_ref(r2, c2)}"
+
+
+# Every cell of a sheet, for searches that can't trust <dimension>
+_WHOLE_SHEET = range_ref(1, 1, MAX_COL, MAX_ROW)
+
+
+def _widen_ref(ref, area):
+    """A <dimension> ref grown to cover area, a (c1, r1, c2, r2) tuple."""
+    c1, r1, c2, r2 = area
+    if ref:
+        try:
+            o1, q1, o2, q2 = parse_range(ref)
+            c1, r1, c2, r2 = min(c1, o1), min(r1, q1), max(c2, o2), max(r2, q2)
+        except ValueError:
+            pass
+    return range_ref(c1, r1, c2, r2)
+
+
+# Plain decimal numerals; leading zeros (IDs, postal codes) stay text
+_NUMBER_RE = re.compile(r'^-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?$')
+
+
+def text_to_value(text):
+    """Interpret delimited-text fields as cell values.
+
+    '' -> None, TRUE/FALSE -> bool, numerals -> int or float; anything else,
+    including integers too long for a double to hold exactly, stays text.
+    """
+    if text == '':
+        return None
+    if not _NUMBER_RE.match(text):
+        upper = text.upper()
+        if upper == 'TRUE':
+            return True
+        if upper == 'FALSE':
+            return False
+        return text
+    if '.' in text or 'e' in text or 'E' in text:
+        f = float(text)
+        return f if abs(f) != float('inf') else text
+    if len(text.lstrip('-')) > 15:
+        return text
+    return int(text)
+
+
+def value_to_text(val):
+    """Format a cell value for delimited text (the inverse of text_to_value)."""
+    if val is None:
+        return ''
+    if isinstance(val, bool):
+        return 'TRUE' if val else 'FALSE'
+    return str(val)
+
+
+# Kinds of date/time number formats
+DATE, TIME, DATETIME = 1, 2, 3
+
+# Built-in number formats showing dates and times (ECMA-376 18.8.30)
+_BUILTIN_DATE_FMTS = {
+    14: DATE, 15: DATE, 16: DATE, 17: DATE,
+    18: TIME, 19: TIME, 20: TIME, 21: TIME, 22: DATETIME,
+    45: TIME, 46: TIME, 47: TIME,
+}
+# Quoted text, escaped characters and padding/fill characters
+_FMT_LITERAL_RE = re.compile(r'"[^"]*"|\\.|[_*].')
+_FMT_BRACKET_RE = re.compile(r'\[([^\]]*)\]')
+_FMT_AMPM_RE = re.compile(r'am/pm|a/p', re.IGNORECASE)
+
+
+def date_kind(format_code):
+    """DATE, TIME or DATETIME if a number format shows dates/times, else 0.
+
+    Only the first section counts; literals, colors, conditions and locale
+    tags are ignored. Elapsed-time fields ([h], [mm], [ss]) make a TIME.
+    """
+    code = _FMT_LITERAL_RE.sub('', format_code).split(';')[0]
+    elapsed = False
+
+    def bracket(m):
+        nonlocal elapsed
+        if m.group(1).lower().strip('hms') == '' and m.group(1):
+            elapsed = True
+        return ''
+
+    code = _FMT_BRACKET_RE.sub(bracket, code)
+    ampm = _FMT_AMPM_RE.search(code) is not None
+    code = _FMT_AMPM_RE.sub('', code).lower()
+    has_time = elapsed or ampm or 'h' in code or 's' in code
+    if 'd' in code or 'y' in code:
+        return DATETIME if has_time else DATE
+    if has_time:
+        return TIME
+    return DATE if 'm' in code else 0
+
+
+def serial_to_datetime(serial, kind, date1904=False):
+    """Convert a date serial number to a date, time or datetime.
+
+    DATE gives a date (a datetime if the serial has a time), TIME a time,
+    DATETIME a datetime, all to the millisecond. In the 1900 system serial
+    60, Excel's nonexistent 1900-02-29, reads as 1900-02-28. TIME serials
+    of a day or more are durations ([h]:mm) and are returned unchanged,
+    like serials outside the calendar.
+    """
+    if serial < 0:
+        return serial
+    if kind == DATE and type(serial) is int:
+        # Whole days, the common case
+        try:
+            if date1904:
+                return date.fromordinal(_ORDINAL_1904 + serial)
+            return date.fromordinal(_ORDINAL_1900 + serial + (serial < 60))
+        except ValueError:
+            return serial
+    days, ms = divmod(round(serial * 86400000), 86400000)
+    if kind == TIME:
+        if days:
+            return serial
+        return (datetime.min + timedelta(milliseconds=ms)).time()
+    if date1904:
+        base = _EPOCH_1904
+    else:
+        base = _EPOCH_1900 if days >= 60 else _EPOCH_1900 + timedelta(days=1)
+    try:
+        d = base + timedelta(days=days)
+    except OverflowError:
+        return serial
+    if kind == DATE and not ms:
+        return d
+    return datetime(d.year, d.month, d.day) + timedelta(milliseconds=ms)
+
+
+def serial_to_iso(serial, kind, date1904=False):
+    """Convert a date serial number to ISO 8601 text.
+
+    'YYYY-MM-DD', 'HH:MM:SS' or 'YYYY-MM-DDTHH:MM:SS' for the date, time
+    or datetime of serial_to_datetime(); milliseconds are added when not
+    zero. Serials it leaves unchanged are returned as they are.
+    """
+    value = serial_to_datetime(serial, kind, date1904)
+    if type(value) is date:
+        return value.isoformat()
+    if type(value) in (int, float):
+        return value
+    return value.isoformat(timespec='milliseconds' if value.microsecond else 'seconds')
+
+
+_EPOCH_1900 = date(1899, 12, 30)
+_EPOCH_1904 = date(1904, 1, 1)
+_ORDINAL_1900 = _EPOCH_1900.toordinal()
+_ORDINAL_1904 = _EPOCH_1904.toordinal()
+
+
 # ---------------------------------------------------------------------------
 # XlsxFile
 # ---------------------------------------------------------------------------
@@ -84,39 +433,71 @@ def cell_ref(row, col):
 class XlsxFile:
     def __init__(self, path):
         self.path = os.path.abspath(path)
-        self._entries = {}       # zip_path -> bytes
+        self._entries = {}       # zip_path -> bytes (an _EntryStore once open)
         self._compress = {}      # zip_path -> compress_type
         self._sheets = []        # [(name, zip_path), ...]
         self._shared_strings = []
+        self._ss_lookup = None   # string -> first index, built on first add
+        self._ss_base = 0        # strings in sharedStrings.xml as opened
+        self._ss_refs = 0        # shared-string references written this session
         self._ss_modified = False
         self._sheet_trees = {}   # zip_path -> ET root
-        self._styles_tree = None
+        self._styles_el = None       # parsed lazily, see _styles_tree
+        self._xf_table = None        # compiled cellXfs -> format dicts
+        self._date_kinds = None      # cellXfs -> DATE/TIME/DATETIME (0: not a date)
+        self._date1904 = False       # workbook uses the 1904 date system
+        self._style_memo = None
         self._styles_modified = False
         self._styles_root_ns = []    # preserve styles.xml namespace declarations
         self._modified_sheets = set()
         self._sheet_root_ns = {}  # zip_path -> [(prefix, uri), ...] original ns decls
         self._removed_formulas = set()  # set of (sheet_zip_path, cell_ref) for calcChain cleanup
-
-    def open(self):
-        self._register_ns_from_zip()
-        with zipfile.ZipFile(self.path, 'r') as z:
-            for info in z.infolist():
-                self._entries[info.filename] = z.read(info.filename)
-                self._compress[info.filename] = info.compress_type
+        self._formulas_added = False  # new formulas: recalculate on load, drop calcChain
+        self._crc = {}           # zip_path -> (CRC32, size) from the central directory
+        self._part_keys = {}     # zip_path -> content digest, see _part_key()
+        self._row_index = {}     # zip_path -> row offset index dict (or None)
+        self._cell_cache = {}    # zip_path -> _MappedCells (or None)
+        self._mmaps = []         # open cache file mappings, released on close()
+
+    def open(self, sheets=()):
+        """Open the archive and read the workbook structure.
+
+        Parts are otherwise inflated on first use. `sheets` names the sheets
+        the caller is about to read or edit (None stands for the first sheet,
+        True for all): their parts, styles.xml and sharedStrings.xml are
+        inflated up front, together, on a bounded thread pool. Parts the
+        workbook cache already covers are left alone.
+        """
+        self._bind_entries()
         self._parse_workbook()
-        self._parse_shared_strings()
-        self._parse_styles()
+        need = []
+        ss_path = self._ss_cache_path()
+        if ss_path is None or not os.path.exists(ss_path):
+            need.append('xl/sharedStrings.xml')
+        parts = self._uncached_sheet_parts(sheets)
+        if parts:
+            need.append('xl/styles.xml')
+            need.extend(parts)
+        self._entries.prefetch(need)
+        self._load_shared_strings()
         return self
 
+    def _uncached_sheet_parts(self, sheets):
+        """Parts of the given sheets (see open()) not in the cell cache."""
+        if sheets is True:
+            sheets = self.sheet_names
+        parts = []
+        for name in dict.fromkeys(sheets or ()):
+            if name is None and self._sheets:
+                name = self._sheets[0][0]
+            sp = dict(self._sheets).get(name)
+            if sp is not None and self._get_cell_cache(sp) is None:
+                parts.append(sp)
+        return parts
+
     def save(self):
         # Serialize modified parts, restoring original namespace declarations
-        for sp in self._modified_sheets:
-            if sp in self._sheet_trees:
-                raw = _serialize(self._sheet_trees[sp])
-                # Restore namespace declarations that ElementTree dropped
-                if sp in self._sheet_root_ns:
-                    raw = _restore_root_ns(raw, self._sheet_root_ns[sp])
-                self._entries[sp] = raw
+        self._flush_sheets()
         if self._ss_modified:
             self._serialize_ss()
         if self._styles_modified:
@@ -125,26 +506,88 @@ class XlsxFile:
                 raw = _restore_root_ns(raw, self._styles_root_ns)
             self._entries['xl/styles.xml'] = raw
 
-        # Clean up calcChain.xml when formulas have been removed
-        if self._removed_formulas:
+        # New formulas have no cached values and aren't in calcChain.xml:
+        # let Excel recalculate on load and rebuild the chain. Otherwise
+        # just clean up calcChain.xml when formulas have been removed
+        if self._formulas_added:
+            self._drop_calc_chain()
+            self._set_full_calc_on_load()
+        elif self._removed_formulas:
             self._cleanup_calc_chain()
 
-        # Ensure sharedStrings.xml is in [Content_Types].xml
+        # Ensure sharedStrings.xml is in [Content_Types].xml and linked
         if self._ss_modified:
             self._ensure_content_type('xl/sharedStrings.xml',
                 'application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml')
+            self._ensure_workbook_rel('sharedStrings.xml',
+                'http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings')
 
+        # Untouched members are copied in compressed form, without inflating
         tmp = self.path + '.tmp'
         with zipfile.ZipFile(tmp, 'w') as zout:
-            for name, data in self._entries.items():
+            for name in self._entries.names():
+                if self._entries.is_pristine(name):
+                    self._entries.write_raw(zout, name)
+                    continue
                 info = zipfile.ZipInfo(name)
                 info.compress_type = self._compress.get(name, zipfile.ZIP_DEFLATED)
-                zout.writestr(info, data)
+                data = self._entries[name]
+                if isinstance(data, bytes):
+                    zout.writestr(info, data)
+                    continue
+                # Memory-mapped part: compress it in chunks
+                info.file_size = len(data)
+                with zout.open(info, 'w') as dst:
+                    for i in range(0, len(data), _FEED_CHUNK):
+                        dst.write(data[i:i + _FEED_CHUNK])
+        # Release the mapping of the old archive before replacing it
+        # (required on Windows), then map the new one
+        self._entries.close()
         os.replace(tmp, self.path)
+        self._bind_entries()
+        # The strings added so far are in sharedStrings.xml now; a later
+        # save() must not append them (or count their references) again
+        self._ss_base, self._ss_refs = len(self._shared_strings), 0
+        self._ss_modified = False
+
+    def _flush_sheets(self):
+        """Serialize the parsed trees of modified sheets into their parts."""
+        for sp in self._modified_sheets:
+            if sp in self._sheet_trees:
+                raw = _serialize(self._sheet_trees[sp])
+                # Restore namespace declarations that ElementTree dropped
+                if sp in self._sheet_root_ns:
+                    raw = _restore_root_ns(raw, self._sheet_root_ns[sp])
+                self._entries[sp] = raw
+
+    def _bind_entries(self):
+        self._entries = _EntryStore(self.path)
+        self._part_keys = {}
+        for name, info in self._entries.infos.items():
+            self._compress[name] = info.compress_type
+            self._crc[name] = (info.CRC, info.file_size)
 
     def close(self):
-        self._entries.clear()
+        if isinstance(self._entries, _EntryStore):
+            self._entries.close()
+        self._entries = {}
         self._sheet_trees.clear()
+        self._row_index.clear()
+        self._cell_cache.clear()
+        self._shared_strings = []
+        self._ss_lookup = None
+        for mm in self._mmaps:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # a caller still holds a view; released with it
+        self._mmaps.clear()
+
+    @property
+    def _styles_tree(self):
+        if self._styles_el is None:
+            self._parse_styles()
+        return self._styles_el
 
     # -- Sheet listing --
 
@@ -162,35 +605,575 @@ class XlsxFile:
         sp = self._sheet_path(name)
         if sp not in self._sheet_trees:
             # Preserve original namespace declarations before parsing
-            if sp not in self._sheet_root_ns:
+            if not _KEEPS_NS and sp not in self._sheet_root_ns:
+                _register_ns_from(self._entries[sp])
                 self._sheet_root_ns[sp] = _extract_root_ns(self._entries[sp])
             self._sheet_trees[sp] = _parse(self._entries[sp])
         return sp, self._sheet_trees[sp]
 
+    def _iter_rows(self, sheet_name, r1, r2):
+        """Yield (row_number, row_el) for rows r1..r2.
+
+        Large unmodified sheets are read through the row offset index, so
+        only the bytes covering the requested rows get parsed.
+        """
+        sp = self._sheet_path(sheet_name)
+        if sp not in self._sheet_trees:
+            rows = self._parse_row_slice(sp, r1, r2)
+            if rows is not None:
+                for row_el in rows:
+                    rn = int(row_el.get('r'))
+                    if rn > r2:
+                        return
+                    if rn >= r1:
+                        yield rn, row_el
+                return
+        _, tree = self._get_sheet_tree(sheet_name)
+        for row_el in tree.iter(_tag('row')):
+            rn = int(row_el.get('r'))
+            if r1 <= rn <= r2:
+                yield rn, row_el
+
+    # -- Row index --
+
+    def sheet_summary(self, sheet_name):
+        """Return the used range and per-column cell type counts of a sheet.
+
+        Builds (or loads) the row offset index regardless of sheet size.
+        Returns None for modified sheets or sheets without explicit row numbers.
+        """
+        sp = self._sheet_path(sheet_name)
+        idx = self._get_row_index(sp, force=True)
+        if idx is None:
+            return None
+        return {"usedRange": idx['usedRange'], "columns": idx['columns']}
+
+    def _part_key(self, zip_path):
+        """Content key of an unmodified part: a digest of its stored bytes.
+
+        The cache is shared by every workbook on the host, so the key
+        hashes the member itself rather than trusting its CRC32 and size.
+        """
+        if zip_path in self._modified_sheets or zip_path not in self._crc:
+            return None
+        key = self._part_keys.get(zip_path)
+        if key is None:
+            key = self._part_keys[zip_path] = self._entries.digest(zip_path)
+        return key
+
+    def _get_row_index(self, sp, force=False):
+        key = self._part_key(sp)
+        if key is None:
+            return None
+        if sp in self._row_index:
+            return self._row_index[sp]
+        data = self._entries.get(sp)
+        if (data is None or not ROW_INDEX_ENABLED
+                or (not force and len(data) < ROW_INDEX_MIN_BYTES)):
+            return None
+        path = os.path.join(_cache_dir('rowindex'), key + '.json')
+        idx = _load_json(path)
+        if idx is None or idx.get('block') != ROW_BLOCK:
+            idx = _build_row_index(data)
+            if idx is not None:
+                _store_json(path, idx)
+        self._row_index[sp] = idx
+        return idx
+
+    def _parse_row_slice(self, sp, r1, r2):
+        """Parse only the <row> elements of blocks overlapping r1..r2.
+
+        Returns a list of row elements, or None when the index is unavailable.
+        """
+        idx = self._get_row_index(sp)
+        if idx is None:
+            return None
+        blocks = idx['rows']
+        if not blocks:
+            return []
+        firsts = [b[0] for b in blocks]
+        i = max(bisect.bisect_right(firsts, r1) - 1, 0)
+        j = bisect.bisect_right(firsts, r2)
+        start = blocks[i][1]
+        end = blocks[j][1] if j < len(blocks) else idx['end']
+
+        data = self._entries[sp]
+        decls = ''.join(
+            f' xmlns:{p}="{u}"' if p else f' xmlns="{u}"'
+            for p, u in _extract_root_ns(data))
+        frag = (f'<sheetData{decls}>'.encode('utf-8') + data[start:end]
+                + b'</sheetData>')
+        return _parse(frag).findall(_tag('row'))
+
+    def _iter_cells(self, sheet_name, c1, r1, c2, r2, values=True):
+        """Yield (row, col, style_idx, value) for cells present in a range.
+
+        Sources, in order: a tree already parsed in this session, the
+        compact cell cache, the row offset index, and finally a full parse
+        (whose cells are then written to the cell cache). Numbers in cells
+        with a date or time format come as ISO 8601 text. With
+        values=False the value slot is always None.
+        """
+        sp = self._sheet_path(sheet_name)
+        fresh = sp not in self._sheet_trees
+        if fresh:
+            cached = self._get_cell_cache(sp)
+            if cached is not None:
+                yield from self._iter_cached_cells(cached, c1, r1, c2, r2, values)
+                return
+
+        dates = self._date_styles() if values else b''
+        for _, row_el in self._iter_rows(sheet_name, r1, r2):
+            for cell_el in row_el.iter(_tag('c')):
+                ref = cell_el.get('r', '')
+                try:
+                    cr, cc = parse_cell_ref(ref)
+                except ValueError:
+                    continue
+                if c1 <= cc <= c2:
+                    s_idx = int(cell_el.get('s', '0'))
+                    val = None
+                    if values:
+                        val = self._cell_value(cell_el)
+                        if s_idx < len(dates) and dates[s_idx] and type(val) in (int, float):
+                            val = serial_to_iso(val, dates[s_idx], self._date1904)
+                    yield cr, cc, s_idx, val
+
+        if fresh and sp in self._sheet_trees:
+            self._store_cell_cache(sp)
+
+    # -- Workbook cache --
+
+    def _map_cache(self, path):
+        """Memory-map a cache file read-only; None if it does not exist."""
+        try:
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        self._mmaps.append(mm)
+        _touch(path)
+        return memoryview(mm)
+
+    def _get_cell_cache(self, sp):
+        key = self._part_key(sp)
+        if key is None:
+            return None  # modified in this session: the cache describes the old part
+        if sp in self._cell_cache:
+            return self._cell_cache[sp]
+        cells = None
+        if WORKBOOK_CACHE_ENABLED:
+            buf = self._map_cache(os.path.join(_cache_dir('workbook'), f'cells-{key}.bin'))
+            if buf is not None:
+                cells = _MappedCells.from_buffer(buf)
+        self._cell_cache[sp] = cells
+        return cells
+
+    def _store_cell_cache(self, sp):
+        """Write the compact cell arrays of a freshly parsed, unmodified sheet."""
+        key = self._part_key(sp)
+        if key is None or not WORKBOOK_CACHE_ENABLED:
+            return
+        path = os.path.join(_cache_dir('workbook'), f'cells-{key}.bin')
+        if os.path.exists(path):
+            return
+        records = []
+        texts = []
+        for row_el in self._sheet_trees[sp].iter(_tag('row')):
+            for cell_el in row_el.iter(_tag('c')):
+                try:
+                    rn, cn = parse_cell_ref(cell_el.get('r', ''))
+                except ValueError:
+                    continue
+                v_el = cell_el.find(_tag('v'))
+                if cell_el.get('t') == 's' and v_el is not None:
+                    kind, num = _K_SHARED, int(v_el.text)
+                else:
+                    val = self._cell_value(cell_el)
+                    if val is None:
+                        kind, num = _K_NONE, 0
+                    elif isinstance(val, bool):
+                        kind, num = _K_BOOL, int(val)
+                    elif isinstance(val, (int, float)):
+                        kind, num = _K_NUM, val
+                    else:
+                        kind, num = _K_TEXT, len(texts)
+                        texts.append(val)
+                records.append((rn, cn, int(cell_el.get('s', '0')), kind, num))
+        records.sort(key=lambda rec: (rec[0], rec[1]))
+        _store_cache(path, _pack_cells(records, texts))
+
+    def _iter_cached_cells(self, cells, c1, r1, c2, r2, values, to_date=serial_to_iso):
+        rows, cols, styles = cells.rows, cells.cols, cells.styles
+        kinds, nums = cells.kinds, cells.nums
+        ss = self._shared_strings
+        dates = self._date_styles() if values else b''
+        for i in range(bisect.bisect_left(rows, r1), bisect.bisect_right(rows, r2)):
+            cn = cols[i]
+            if cn < c1 or cn > c2:
+                continue
+            val = None
+            if values:
+                kind = kinds[i]
+                if kind == _K_NUM:
+                    fv = nums[i]
+                    val = int(fv) if fv == int(fv) else fv
+                    s_idx = styles[i]
+                    if s_idx < len(dates) and dates[s_idx]:
+                        val = to_date(val, dates[s_idx], self._date1904)
+                elif kind == _K_SHARED:
+                    idx = int(nums[i])
+                    val = ss[idx] if idx < len(ss) else None
+                elif kind == _K_BOOL:
+                    val = nums[i] == 1
+                elif kind == _K_TEXT:
+                    val = cells.texts[int(nums[i])]
+            yield rows[i], cn, styles[i], val
+
     # -- Reading values --
 
     def read_values(self, sheet_name, range_str):
         """Read a 2D list of values from a range."""
-        _, tree = self._get_sheet_tree(sheet_name)
         c1, r1, c2, r2 = parse_range(range_str)
 
         # Index cells by (row, col) for fast lookup
         cells = {}
-        for row_el in tree.iter(_tag('row')):
+        for cr, cc, _, val in self._iter_cells(sheet_name, c1, r1, c2, r2):
+            cells[(cr, cc)] = val
+
+        return [[cells.get((r, c)) for c in range(c1, c2 + 1)]
+                for r in range(r1, r2 + 1)]
+
+    def iter_values(self, sheet_name, range_str=None, where=None, date_objects=False):
+        """Yield (row_number, values) for the rows of a range that hold cells, in order.
+
+        A row is yielded when it has at least one <c> inside the range
+        (a styled empty cell counts), whether the sheet is read from the
+        cell cache, a parsed tree or its XML. Rows are produced one at a
+        time: the <row> elements of an unparsed sheet are found with a
+        regex scan and parsed as fragments of _STREAM_BATCH_ROWS rows
+        (starting at the nearest row index block), so memory use doesn't
+        grow with the sheet. Without a range, the sheet's <dimension> is
+        used. Dates and times come as in _iter_cells, or with date_objects
+        as the date, time or datetime of serial_to_datetime().
+
+        where (e.g. a row_filter.RowFilter) selects among those rows: it
+        is called with a {column number: value} dict of the row's cells in
+        where.columns (an empty cell is None) and only rows it accepts are
+        yielded. Their other cells are decoded only then.
+        """
+        sp = self._sheet_path(sheet_name)
+        if range_str is None:
+            range_str = self.sheet_dimension(sheet_name)
+            if range_str is None:
+                return
+        c1, r1, c2, r2 = parse_range(range_str)
+        width = c2 - c1 + 1
+        to_date = serial_to_datetime if date_objects else serial_to_iso
+
+        if sp not in self._sheet_trees:
+            cached = self._get_cell_cache(sp)
+            if cached is not None:
+                cur, vals = None, None
+                for rn, cn, _, val in self._iter_cached_cells(cached, c1, r1, c2, r2, True,
+                                                               to_date):
+                    if rn != cur:
+                        if vals is not None and _accepts(where, vals, c1):
+                            yield cur, vals
+                        cur, vals = rn, [None] * width
+                    vals[cn - c1] = val
+                if vals is not None and _accepts(where, vals, c1):
+                    yield cur, vals
+                return
+            rows = self._stream_row_elements(sp, r1)
+        else:
+            rows = self._sheet_trees[sp].iter(_tag('row'))
+
+        dates = self._date_styles()
+
+        def decode(cell_el):
+            val = self._cell_value(cell_el)
+            if dates and type(val) in (int, float):
+                s_idx = int(cell_el.get('s', '0'))
+                if s_idx < len(dates) and dates[s_idx]:
+                    val = to_date(val, dates[s_idx], self._date1904)
+            return val
+
+        probe = where.columns if where is not None else ()
+        for row_el in rows:
             rn = int(row_el.get('r'))
-            if rn < r1 or rn > r2:
+            if rn > r2:
+                break
+            if rn < r1:
                 continue
+            cells = []
             for cell_el in row_el.iter(_tag('c')):
-                ref = cell_el.get('r', '')
                 try:
-                    cr, cc = parse_cell_ref(ref)
+                    _, cn = parse_cell_ref(cell_el.get('r', ''))
                 except ValueError:
                     continue
-                if c1 <= cc <= c2:
-                    cells[(cr, cc)] = self._cell_value(cell_el)
+                if c1 <= cn <= c2:
+                    cells.append((cn, cell_el))
+            if not cells:
+                continue
+            vals = [None] * width
+            if where is not None:
+                seen = {cn: decode(cell_el) for cn, cell_el in cells if cn in probe}
+                if not where(seen):
+                    continue
+                for cn, val in seen.items():
+                    vals[cn - c1] = val
+            for cn, cell_el in cells:
+                if cn not in probe:
+                    vals[cn - c1] = decode(cell_el)
+            yield rn, vals
+
+    def aggregate(self, sheet_name, range_str, columns, group_by=(), where=None,
+                  aggregates=AGGREGATES):
+        """Summarize columns of a range in one pass, optionally per group.
+
+        columns and group_by are column numbers; where is a row filter as
+        in iter_values. Returns [{"key": [...], "rows": n, "columns":
+        [{aggregate: value}, ...]}] in order of first appearance, a single
+        entry with an empty key without group_by. Shared strings are
+        grouped and counted by their index: only group keys, text minima
+        and maxima and distinct values are looked up. Memory doesn't grow
+        with the sheet unless there are groups or distinct counts.
+        """
+        strings = self._shared_strings
+        distinct = 'distinct' in aggregates
+        extremes = 'min' in aggregates or 'max' in aggregates
+        groups = {}
+        for _, keys in self._iter_row_keys(sheet_name, range_str):
+            if where is not None and not where(
+                    {cn: _key_value(keys.get(cn), strings) for cn in where.columns}):
+                continue
+            gk = tuple(keys.get(cn) for cn in group_by)
+            group = groups.get(gk)
+            if group is None:
+                group = groups[gk] = [0, [_ColumnStats(distinct) for _ in columns]]
+            group[0] += 1
+            for stats, cn in zip(group[1], columns):
+                key = keys.get(cn)
+                if key is not None:
+                    stats.add(key, strings, extremes)
+
+        # Equal text can be both shared and inline: merge those groups
+        merged = {}
+        for gk, (rows, stats) in groups.items():
+            values = tuple(_key_value(k, strings) for k in gk)
+            tagged = tuple(map(_typed, values))
+            if tagged in merged:
+                merged[tagged][1] += rows
+                for a, b in zip(merged[tagged][2], stats):
+                    a.merge(b)
+            else:
+                merged[tagged] = [values, rows, stats]
+        return [{"key": list(values), "rows": rows,
+                 "columns": [st.summary(aggregates, strings) for st in stats]}
+                for values, rows, stats in merged.values()]
+
+    def _iter_row_keys(self, sheet_name, range_str):
+        """Yield (row_number, {column: key}) for the non-empty rows of a range.
+
+        A key is (shared string index, None) for shared strings, (-2, value)
+        for booleans and (-1, value) otherwise, values decoded as in
+        iter_values. Equal keys mean equal cells: TRUE and 1 differ.
+        """
+        sp = self._sheet_path(sheet_name)
+        c1, r1, c2, r2 = parse_range(range_str)
+        dates = self._date_styles()
 
-        return [[cells.get((r, c)) for c in range(c1, c2 + 1)]
-                for r in range(r1, r2 + 1)]
+        if sp not in self._sheet_trees:
+            cached = self._get_cell_cache(sp)
+            if cached is not None:
+                rows, cols, styles = cached.rows, cached.cols, cached.styles
+                kinds, nums = cached.kinds, cached.nums
+                cur, keys = None, None
+                for i in range(bisect.bisect_left(rows, r1), bisect.bisect_right(rows, r2)):
+                    cn = cols[i]
+                    if cn < c1 or cn > c2:
+                        continue
+                    if rows[i] != cur:
+                        if keys:
+                            yield cur, keys
+                        cur, keys = rows[i], {}
+                    kind = kinds[i]
+                    if kind == _K_SHARED:
+                        keys[cn] = (int(nums[i]), None)
+                    elif kind == _K_NUM:
+                        fv = nums[i]
+                        val = int(fv) if fv == int(fv) else fv
+                        s_idx = styles[i]
+                        if s_idx < len(dates) and dates[s_idx]:
+                            val = serial_to_iso(val, dates[s_idx], self._date1904)
+                        keys[cn] = (-1, val)
+                    elif kind == _K_BOOL:
+                        keys[cn] = (-2, nums[i] == 1)
+                    elif kind == _K_TEXT:
+                        keys[cn] = (-1, cached.texts[int(nums[i])])
+                if keys:
+                    yield cur, keys
+                return
+            row_els = self._stream_row_elements(sp, r1)
+        else:
+            row_els = self._sheet_trees[sp].iter(_tag('row'))
+
+        v_tag = _tag('v')
+        for row_el in row_els:
+            rn = int(row_el.get('r'))
+            if rn > r2:
+                break
+            if rn < r1:
+                continue
+            keys = {}
+            for cell_el in row_el.iter(_tag('c')):
+                try:
+                    _, cn = parse_cell_ref(cell_el.get('r', ''))
+                except ValueError:
+                    continue
+                if cn < c1 or cn > c2:
+                    continue
+                if cell_el.get('t') == 's':
+                    v_el = cell_el.find(v_tag)
+                    if v_el is not None:
+                        keys[cn] = (int(v_el.text), None)
+                    continue
+                val = self._cell_value(cell_el)
+                if val is None:
+                    continue
+                if type(val) is bool:
+                    keys[cn] = (-2, val)
+                    continue
+                if dates and type(val) in (int, float):
+                    s_idx = int(cell_el.get('s', '0'))
+                    if s_idx < len(dates) and dates[s_idx]:
+                        val = serial_to_iso(val, dates[s_idx], self._date1904)
+                keys[cn] = (-1, val)
+            if keys:
+                yield rn, keys
+
+    def find_cells(self, query, match='contains', case_sensitive=False,
+                   sheets=None, use_index=False):
+        """Yield (sheet, row, col, text) for cells whose text matches query.
+
+        match is 'exact', 'contains' or 'regex'; cells are compared as text
+        (TRUE/FALSE, numbers as written, dates as ISO 8601). Sheets are
+        searched whole, whatever their <dimension> says (writers often
+        leave it stale), in workbook order and each in row order. The shared string
+        table is matched first, so a shared string cell is checked by its
+        index alone. With use_index, each sheet is searched through an
+        inverted value-to-cells index, built on first use and cached
+        against the sheet, shared string, style and workbook parts.
+        """
+        test = _text_matcher(query, match, case_sensitive)
+        shared = None
+        for sheet_name in sheets or self.sheet_names:
+            if use_index:
+                index = self._find_index(sheet_name)
+                values = index.values
+                if match == 'exact' and case_sensitive:
+                    i = bisect.bisect_left(values, query)
+                    hits = [i] if i < len(values) and values[i] == query else []
+                else:
+                    hits = [i for i, text in enumerate(values) if test(text)]
+                found = sorted((rn, cn, values[i]) for i in hits for rn, cn in index.cells(i))
+                for rn, cn, text in found:
+                    yield sheet_name, rn, cn, text
+                continue
+
+            if shared is None:
+                shared = {i for i, text in enumerate(self._shared_strings) if test(text)}
+            for rn, keys in self._iter_row_keys(sheet_name, _WHOLE_SHEET):
+                for cn in sorted(keys):
+                    idx, val = keys[cn]
+                    if idx >= 0:
+                        if idx in shared:
+                            yield sheet_name, rn, cn, self._shared_strings[idx]
+                    else:
+                        text = value_to_text(val)
+                        if test(text):
+                            yield sheet_name, rn, cn, text
+
+    def _find_index(self, sheet_name):
+        """Return the inverted value-to-cells index of a sheet (_MappedFindIndex)."""
+        sp = self._sheet_path(sheet_name)
+        path = None
+        parts = [self._part_key(sp)]
+        if parts[0] is not None and not self._styles_modified and WORKBOOK_CACHE_ENABLED:
+            # Cell text also depends on the shared strings and date formats
+            parts += [self._part_key(p) or '-' for p in
+                      ('xl/sharedStrings.xml', 'xl/styles.xml', 'xl/workbook.xml')]
+            key = hashlib.sha1('|'.join(parts).encode('ascii')).hexdigest()[:24]
+            path = os.path.join(_cache_dir('workbook'), f'find-{key}.bin')
+            buf = self._map_cache(path)
+            index = _MappedFindIndex.from_buffer(buf) if buf is not None else None
+            if index is not None:
+                return index
+
+        by_key = {}
+        for rn, keys in self._iter_row_keys(sheet_name, _WHOLE_SHEET):
+            for cn, key in keys.items():
+                by_key.setdefault(key, []).append((rn, cn))
+        by_text = {}
+        for key, cells in by_key.items():
+            text = value_to_text(_key_value(key, self._shared_strings))
+            if not text:
+                continue
+            if text in by_text:
+                by_text[text] = sorted(by_text[text] + cells)
+            else:
+                by_text[text] = cells
+        data = _pack_find_index(sorted(by_text.items()))
+        if path is not None:
+            _store_cache(path, data)
+        return _MappedFindIndex.from_buffer(memoryview(data))
+
+    def sheet_dimension(self, sheet_name):
+        """Return the ref of a sheet's <dimension> element, or None."""
+        sp = self._sheet_path(sheet_name)
+        if sp in self._sheet_trees:
+            dim = self._sheet_trees[sp].find(_tag('dimension'))
+            return dim.get('ref') if dim is not None else None
+        bounds = _sheet_data_bounds(self._entries[sp])
+        if bounds is None or bounds[3] is None:
+            return None
+        return bounds[3][2]
+
+    def _stream_row_elements(self, sp, r1=1):
+        """Yield the <row> elements of an unparsed sheet in document order.
+
+        Rows are parsed in runs of _STREAM_BATCH_ROWS, so only one run is
+        held at a time. With a row index, parsing starts at r1's block.
+        """
+        data = self._entries[sp]
+        bounds = _sheet_data_bounds(data)
+        if bounds is None or bounds[2] is None:
+            return
+        p, open_m, close, _ = bounds
+        start = open_m.end()
+        idx = self._get_row_index(sp)
+        if idx is not None and idx['rows']:
+            i = bisect.bisect_right([b[0] for b in idx['rows']], r1) - 1
+            if i > 0:
+                start = idx['rows'][i][1]
+        wrap = ''.join(f' xmlns:{q}="{u}"' if q else f' xmlns="{u}"'
+                       for q, u in _extract_root_ns(data))
+        wrap = f'<sheetData{wrap}>'.encode('utf-8')
+
+        def run(a, b):
+            return _parse(wrap + data[a:b] + b'</sheetData>').findall(_tag('row'))
+
+        first, n = None, 0
+        for m in _row_tag_re(p).finditer(data, start, close):
+            if n == _STREAM_BATCH_ROWS:
+                yield from run(first, m.start())
+                n = 0
+            if n == 0:
+                first = m.start()
+            n += 1
+        if n:
+            yield from run(first, close)
 
     def _cell_value(self, cell_el):
         t = cell_el.get('t', '')
@@ -217,10 +1200,96 @@ class XlsxFile:
 
     # -- Writing values --
 
-    def write_values(self, sheet_name, range_str, values_2d):
-        """Write a 2D list of values to a range."""
-        sp, tree = self._get_sheet_tree(sheet_name)
+    def write_values(self, sheet_name, range_str, values_2d, strings='shared'):
+        """Write a 2D list of values to a range.
+
+        strings is one of STRING_MODES: how text values are stored.
+        """
         c1, r1, c2, r2 = parse_range(range_str)
+        values_2d = [r if isinstance(r, list) else [r] for r in values_2d]
+        inline = _inline_columns(values_2d, c2 - c1 + 1, strings)
+
+        def write_row(rn, row_el):
+            self._write_row(row_el, rn, c1, c2, values_2d[rn - r1], inline)
+
+        r2 = min(r2, r1 + len(values_2d) - 1)
+        self._edit_rows(sheet_name, range(r1, r2 + 1), write_row, (c1, c2))
+
+    def write_rows(self, sheet_name, range_str, rows, strings='shared'):
+        """Write rows from an iterable of value lists to a range.
+
+        Rows are consumed one at a time, in order, so they can come from a
+        generator (a CSV reader, say) without being held in memory. The
+        range sets how many rows are read; longer rows are cut at its edge.
+        With strings='auto', the first INLINE_SAMPLE_ROWS rows decide.
+        """
+        c1, r1, c2, r2 = parse_range(range_str)
+        it = iter(rows)
+        if strings == 'auto':
+            sample = list(itertools.islice(it, INLINE_SAMPLE_ROWS))
+            inline = _inline_columns(sample, c2 - c1 + 1, strings)
+            it = itertools.chain(sample, it)
+        else:
+            inline = _inline_columns((), c2 - c1 + 1, strings)
+
+        def write_row(rn, row_el):
+            self._write_row(row_el, rn, c1, c2, next(it), inline)
+
+        self._edit_rows(sheet_name, range(r1, r2 + 1), write_row, (c1, c2))
+
+    def _write_row(self, row_el, rn, c1, c2, row_vals, inline=()):
+        """Write values into a <row> element from column c1 (up to c2, if given).
+
+        inline holds the offsets (from c1) of the columns whose strings are
+        written as inline strings.
+        """
+        cell_map = _cell_map(row_el)
+        new_cells = False
+        for cn, val in enumerate(row_vals, c1):
+            if c2 is not None and cn > c2:
+                break
+            c_el = cell_map.get(cn)
+            if c_el is None:
+                if val is None:
+                    continue
+                c_el = ET.SubElement(row_el, _tag('c'))
+                c_el.set('r', cell_ref(rn, cn))
+                cell_map[cn] = c_el
+                new_cells = True
+
+            self._set_cell_value(c_el, val, cn - c1 in inline)
+        if new_cells:
+            _put_in_order(row_el, cell_map)
+
+    def _edit_rows(self, sheet_name, row_numbers, edit, cols, widen=True):
+        """Call edit(rn, row_el) for a range of rows, creating missing rows.
+
+        cols is the (first, last) column the edit touches: it must not
+        change cells outside them (row_el may hold only those cells), and
+        unless widen is false <dimension> is widened to cover them. With
+        cols None the edit gets whole rows and may change their attributes;
+        <dimension> is left alone. Sheets not parsed in this session are edited
+        on the raw XML, so every byte outside the affected <row> elements
+        is kept as is: small edits patch those rows in place, large ones
+        stream the part through a merge with the edited rows. Otherwise the
+        whole sheet is parsed into a tree.
+        """
+        sp = self._sheet_path(sheet_name)
+        if not row_numbers:
+            return
+        area = None
+        if cols is not None and widen:
+            area = (cols[0], row_numbers[0], cols[1], row_numbers[-1])
+        if sp not in self._sheet_trees:
+            if len(row_numbers) <= ROW_PATCH_MAX_ROWS:
+                done = self._patch_rows(sp, row_numbers, edit, area)
+            else:
+                done = self._stream_rows(sp, row_numbers, edit, cols, area)
+            if done:
+                self._modified_sheets.add(sp)
+                return
+
+        _, tree = self._get_sheet_tree(sheet_name)
         sheet_data = tree.find(_tag('sheetData'))
         if sheet_data is None:
             sheet_data = ET.SubElement(tree, _tag('sheetData'))
@@ -229,41 +1298,212 @@ class XlsxFile:
         row_map = {}
         for row_el in sheet_data.findall(_tag('row')):
             row_map[int(row_el.get('r'))] = row_el
+        new_rows = False
 
-        for ri, row_vals in enumerate(values_2d):
-            rn = r1 + ri
-            if rn > r2:
-                break
+        for rn in row_numbers:
             row_el = row_map.get(rn)
             if row_el is None:
                 row_el = ET.SubElement(sheet_data, _tag('row'))
                 row_el.set('r', str(rn))
                 row_map[rn] = row_el
-
-            # Index existing cells in this row
-            cell_map = {}
-            for c_el in row_el.findall(_tag('c')):
-                try:
-                    _, cc = parse_cell_ref(c_el.get('r', ''))
-                    cell_map[cc] = c_el
-                except ValueError:
-                    pass
-
-            for ci, val in enumerate(row_vals if isinstance(row_vals, list) else [row_vals]):
-                cn = c1 + ci
-                if cn > c2:
-                    break
-                ref = cell_ref(rn, cn)
-                c_el = cell_map.get(cn)
-                if c_el is None:
-                    c_el = ET.SubElement(row_el, _tag('c'))
-                    c_el.set('r', ref)
-
-                self._set_cell_value(c_el, val)
-
+                new_rows = True
+            edit(rn, row_el)
+
+        if new_rows:
+            _put_in_order(sheet_data, row_map)
+        dim_el = tree.find(_tag('dimension'))
+        if dim_el is not None and area is not None:
+            dim_el.set('ref', _widen_ref(dim_el.get('ref'), area))
         self._modified_sheets.add(sp)
 
-    def _set_cell_value(self, c_el, val):
+    def _patch_rows(self, sp, row_numbers, edit, area):
+        """Edit rows in the raw sheet XML; False if the layout needs a tree."""
+        data = self._entries[sp]
+        found = _locate_rows(data, row_numbers)
+        if found is None:
+            return False
+        prefixes = {u: p for p, u in reversed(_extract_root_ns(data))}
+        prefixes[_XML_NS] = 'xml'
+        names = {}
+
+        # Parse the existing rows together, wrapped with the root's xmlns
+        spans = sorted(found['rows'].values())
+        row_els = {}
+        if spans:
+            decls = ''.join(
+                f' xmlns:{p}="{u}"' if p else f' xmlns="{u}"'
+                for p, u in _extract_root_ns(data))
+            frag = b''.join([f'<sheetData{decls}>'.encode('utf-8')]
+                            + [data[a:b] for a, b in spans] + [b'</sheetData>'])
+            for row_el in _parse(frag).findall(_tag('row')):
+                row_els[int(row_el.get('r'))] = row_el
+            try:
+                for row_el in row_els.values():
+                    _check_names(row_el, prefixes)
+            except KeyError:
+                return False  # namespace declared below the root element
+
+        pieces = []
+        for rn in row_numbers:
+            row_el = row_els.get(rn)
+            if row_el is None:
+                row_el = ET.Element(_tag('row'))
+                row_el.set('r', str(rn))
+                start = end = found['insert'][rn]
+            else:
+                start, end = found['rows'][rn]
+            edit(rn, row_el)
+            pieces.append((start, end, rn, _element_bytes(row_el, prefixes, names)))
+        pieces.sort()
+
+        out, pos = [], 0
+        if found['selfClosing'] is not None:
+            # <sheetData/> -> <sheetData>...</sheetData>
+            start, end = found['selfClosing']
+            p = found['prefix']
+            out = [data[:start], f'<{p}sheetData>'.encode('utf-8')]
+            out += [xml for _, _, _, xml in pieces]
+            out += [f'</{p}sheetData>'.encode('utf-8'), data[end:]]
+        else:
+            for start, end, _, xml in pieces:
+                out += [data[pos:start], xml]
+                pos = end
+            out.append(data[pos:])
+        if found['dimension'] is not None and area is not None:
+            # out[0] runs up to the first edit, which is past <dimension>
+            d_start, d_end, ref = found['dimension']
+            out[0:1] = [data[:d_start], _widen_ref(ref, area).encode('ascii'),
+                        data[d_end:len(out[0])]]
+        self._entries[sp] = b''.join(out)
+        return True
+
+    def _stream_rows(self, sp, row_numbers, edit, cols, area):
+        """Rewrite a sheet as a merge of its rows with a range of edited rows.
+
+        The original part is read sequentially and written to a temporary
+        file: rows outside the range are copied as raw bytes, rows inside
+        it are edited and missing rows are created in order. Of an existing
+        row only the cells in the given columns are parsed and re-serialized;
+        the rest of the row is copied too. <dimension> is widened to cover
+        area, if given. Memory use doesn't depend on sheet size. Returns
+        False if the layout needs a tree.
+        """
+        data = self._entries[sp]
+        bounds = _sheet_data_bounds(data)
+        if bounds is None:
+            return False
+        p, open_m, close, dim = bounds
+        row_re = _row_tag_re(p)
+        if close is not None and not _rows_streamable(data, open_m.end(), close, row_re):
+            return False
+        ns = _extract_root_ns(data)
+        prefixes = {u: q for q, u in reversed(ns)}
+        prefixes[_XML_NS] = 'xml'
+        names = {}
+        wrap = ''.join(f' xmlns:{q}="{u}"' if q else f' xmlns="{u}"' for q, u in ns)
+        wrap = f'<sheetData{wrap}>'.encode('utf-8')
+        end_tag = f'</{p}row>'.encode('ascii')
+        cell_re = _cell_tag_re(p)
+        if cols is not None:
+            k1, k2 = _col_key(cols[0]), _col_key(cols[1])
+
+        def new_row(rn):
+            row_el = ET.Element(_tag('row'))
+            row_el.set('r', str(rn))
+            edit(rn, row_el)
+            return _element_bytes(row_el, prefixes, names)
+
+        view = memoryview(data)
+        out = tempfile.TemporaryFile(prefix='excel-mcp-')
+        try:
+            head = 0
+            if dim is not None and area is not None:
+                out.write(view[:dim[0]])
+                out.write(_widen_ref(dim[2], area).encode('ascii'))
+                head = dim[1]
+            if close is None:
+                # <sheetData/> -> <sheetData>...</sheetData>
+                out.write(view[head:open_m.start()])
+                out.write(f'<{p}sheetData>'.encode('utf-8'))
+                for rn in row_numbers:
+                    out.write(new_row(rn))
+                out.write(f'</{p}sheetData>'.encode('utf-8'))
+                out.write(view[open_m.end():])
+            else:
+                todo = iter(row_numbers)
+                pending = next(todo, None)
+                copied = head
+                batch = []  # (rn, start, end, cells) of existing rows to edit
+
+                def flush():
+                    # Parse a run of rows together, then edit them in order.
+                    # Where the cells in the edited columns could be located,
+                    # a row holding only those stands in for the whole row
+                    nonlocal copied
+                    if not batch:
+                        return
+                    frag = [wrap]
+                    for rn, a, b, cells in batch:
+                        if cells is None:
+                            frag.append(view[a:b])
+                        else:
+                            frag += [f'<{p}row r="{rn}">'.encode('ascii'),
+                                     view[cells[0]:cells[1]], end_tag]
+                    frag.append(b'</sheetData>')
+                    for (rn, a, b, cells), row_el in zip(batch, list(_parse(b''.join(frag)))):
+                        edit(rn, row_el)
+                        if cells is None:
+                            out.write(view[copied:a])
+                            out.write(_element_bytes(row_el, prefixes, names))
+                            copied = b
+                        else:
+                            out.write(view[copied:cells[0]])
+                            for c_el in row_el:
+                                out.write(_element_bytes(c_el, prefixes, names))
+                            copied = cells[1]
+                    batch.clear()
+
+                for m in row_re.finditer(data, open_m.end(), close):
+                    if pending is None:
+                        break
+                    rn = int(_R_ATTR_RE.search(m.group(0)).group(1))
+                    if pending > rn:
+                        continue
+                    if pending < rn:
+                        flush()
+                        out.write(view[copied:m.start()])
+                        copied = m.start()
+                        while pending is not None and pending < rn:
+                            out.write(new_row(pending))
+                            pending = next(todo, None)
+                    if pending == rn:
+                        if m.group(0).endswith(b'/>'):
+                            end = m.end()
+                        else:
+                            end = data.find(end_tag, m.end(), close) + len(end_tag)
+                        cells = None
+                        if cols is not None:
+                            cells = _cell_span(data, m, end, k1, k2, cell_re, p.encode('ascii'))
+                        batch.append((rn, m.start(), end, cells))
+                        if len(batch) >= _STREAM_BATCH_ROWS:
+                            flush()
+                        pending = next(todo, None)
+                flush()
+                out.write(view[copied:close])
+                while pending is not None:
+                    out.write(new_row(pending))
+                    pending = next(todo, None)
+                out.write(view[close:])
+        except BaseException:
+            out.close()
+            raise
+        finally:
+            view.release()
+        self._entries.replace_with_file(sp, out)
+        return True
+
+    def _set_cell_value(self, c_el, val, inline=False):
+        """Set a cell's value; with inline, text goes in the cell (inlineStr)."""
         # Remove formula if present and track for calcChain cleanup
         f_el = c_el.find(_tag('f'))
         if f_el is not None:
@@ -273,6 +1513,9 @@ class XlsxFile:
                 self._removed_formulas.add(cell_ref_str)
 
         v_el = c_el.find(_tag('v'))
+        is_el = c_el.find(_tag('is'))
+        if is_el is not None:
+            c_el.remove(is_el)
 
         if val is None:
             if v_el is not None:
@@ -280,6 +1523,29 @@ class XlsxFile:
             c_el.attrib.pop('t', None)
             return
 
+        if isinstance(val, str) and len(val) > 1 and val[0] == '=':
+            # Formula: no cached value, Excel computes it on load
+            if v_el is not None:
+                c_el.remove(v_el)
+            c_el.attrib.pop('t', None)
+            f_el = ET.Element(_tag('f'))
+            f_el.text = val[1:]
+            c_el.insert(0, f_el)
+            self._formulas_added = True
+            return
+
+        if inline and not isinstance(val, (bool, int, float)):
+            if v_el is not None:
+                c_el.remove(v_el)
+            text = str(val)
+            is_el = ET.SubElement(c_el, _tag('is'))
+            t_el = ET.SubElement(is_el, _tag('t'))
+            if text and (text[0].isspace() or text[-1].isspace()):
+                t_el.set(f'{{{_XML_NS}}}space', 'preserve')
+            t_el.text = text
+            c_el.set('t', 'inlineStr')
+            return
+
         if v_el is None:
             v_el = ET.SubElement(c_el, _tag('v'))
 
@@ -295,46 +1561,409 @@ class XlsxFile:
             v_el.text = str(idx)
             c_el.set('t', 's')
 
-    # -- Reading formats --
+    # -- Filling formulas --
 
-    def read_formats(self, sheet_name, range_str):
-        """Read formatting info for cells with non-default formatting."""
-        _, tree = self._get_sheet_tree(sheet_name)
+    def fill_formula(self, sheet_name, range_str, formula):
+        """Fill a range with a formula, shifting its relative references per
+        cell the way Excel's fill does.
+
+        The range is written as one shared formula: the top-left cell holds
+        the formula text and the range, every other cell only the group's
+        index, so the sheet grows by a few bytes per cell.
+        """
         c1, r1, c2, r2 = parse_range(range_str)
-        formats = []
+        text = formula[1:] if formula.startswith('=') else formula
+        if not text:
+            raise ValueError("Empty formula")
+        if (c1, r1) == (c2, r2):
+            self.write_values(sheet_name, range_str, [['=' + text]])
+            return
 
-        for row_el in tree.iter(_tag('row')):
-            rn = int(row_el.get('r'))
-            if rn < r1 or rn > r2:
-                continue
-            for cell_el in row_el.iter(_tag('c')):
-                ref = cell_el.get('r', '')
-                try:
-                    cr, cc = parse_cell_ref(ref)
-                except ValueError:
-                    continue
-                if cc < c1 or cc > c2:
+        sp = self._sheet_path(sheet_name)
+        ref = range_ref(c1, r1, c2, r2)
+        si = str(self._next_shared_index(sp))
+
+        def fill_row(rn, row_el):
+            cell_map = _cell_map(row_el)
+            new_cells = False
+            for cn in range(c1, c2 + 1):
+                c_el = cell_map.get(cn)
+                if c_el is None:
+                    c_el = ET.SubElement(row_el, _tag('c'))
+                    c_el.set('r', cell_ref(rn, cn))
+                    cell_map[cn] = c_el
+                    new_cells = True
+                else:
+                    f_el = c_el.find(_tag('f'))
+                    if f_el is not None and f_el.get('ref') and f_el.get('t') == 'shared':
+                        # Dependents of an overwritten master would be orphaned
+                        o1, q1, o2, q2 = parse_range(f_el.get('ref'))
+                        if o1 < c1 or q1 < r1 or o2 > c2 or q2 > r2:
+                            raise ValueError(
+                                f"{cell_ref(rn, cn)} holds the shared formula of "
+                                f"{f_el.get('ref')}, which extends outside {ref}")
+                    for el in list(c_el):
+                        if el.tag in (_tag('f'), _tag('v'), _tag('is')):
+                            c_el.remove(el)
+                    c_el.attrib.pop('t', None)
+                f_el = ET.Element(_tag('f'))
+                f_el.set('t', 'shared')
+                if (rn, cn) == (r1, c1):
+                    f_el.set('ref', ref)
+                    f_el.text = text
+                f_el.set('si', si)
+                c_el.insert(0, f_el)
+            if new_cells:
+                _put_in_order(row_el, cell_map)
+
+        self._edit_rows(sheet_name, range(r1, r2 + 1), fill_row, (c1, c2))
+        self._formulas_added = True
+
+    def _next_shared_index(self, sp):
+        """An unused shared-formula group index (si) for a sheet."""
+        if sp in self._sheet_trees:
+            found = (f.get('si') for f in self._sheet_trees[sp].iter(_tag('f')))
+        else:
+            found = (m.group(1) for m in _SHARED_SI_RE.finditer(self._entries[sp]))
+        return max((int(si) for si in found if si and si.isdigit()), default=-1) + 1
+
+    # -- Appending rows --
+
+    def append_rows(self, sheet_name, values_2d, start_col=1, strings='shared'):
+        """Append rows below the last row of a sheet; returns the range written.
+
+        XML is generated for the new rows only and spliced in before
+        </sheetData>, with <dimension> widened to match, so existing rows
+        are neither parsed nor re-serialized. strings is as for write_values.
+        """
+        rows = [r if isinstance(r, list) else [r] for r in values_2d]
+        width = max((len(r) for r in rows), default=0)
+        if not width:
+            raise ValueError("No values to append")
+        inline = _inline_columns(rows, width, strings)
+
+        sp = self._sheet_path(sheet_name)
+        spot = None if sp in self._sheet_trees else _find_append_spot(self._entries[sp])
+        if spot is None:
+            # Already parsed in this session, or a layout the scan can't handle
+            _, tree = self._get_sheet_tree(sheet_name)
+            last = max((int(r.get('r')) for r in tree.iter(_tag('row'))), default=0)
+        else:
+            last = spot['last']
+        c1, r1 = start_col, last + 1
+        c2, r2 = start_col + width - 1, last + len(rows)
+        rng = range_ref(c1, r1, c2, r2)
+        if spot is None:
+            self.write_values(sheet_name, rng, rows, strings)
+            return rng
+
+        p = spot['prefix']
+        xml = []
+        for rn, row_vals in enumerate(rows, r1):
+            xml.append(f'<{p}row r="{rn}">')
+            for cn, val in enumerate(row_vals, c1):
+                if val is not None:
+                    xml.append(self._cell_xml(p, cell_ref(rn, cn), val, cn - c1 in inline))
+            xml.append(f'</{p}row>')
+        new_rows = ''.join(xml).encode('utf-8')
+        if spot['selfClosing']:
+            new_rows = f'<{p}sheetData>'.encode() + new_rows + f'</{p}sheetData>'.encode()
+
+        data = self._entries[sp]
+        start, end = spot['splice']
+        parts = [data[:start], new_rows, data[end:]]
+        if spot['dimension'] is not None:
+            d_start, d_end, ref = spot['dimension']
+            # An empty sheet's dimension is a placeholder "A1": replace it
+            new_ref = _widen_ref(ref if last else None, (c1, r1, c2, r2))
+            parts[0:1] = [data[:d_start], new_ref.encode('ascii'), data[d_end:start]]
+        self._entries[sp] = b''.join(parts)
+        self._modified_sheets.add(sp)
+        return rng
+
+    def _cell_xml(self, prefix, ref, val, inline=False):
+        """XML of one new <c> element, typed the way _set_cell_value does."""
+        if isinstance(val, str) and len(val) > 1 and val[0] == '=':
+            self._formulas_added = True
+            return f'<{prefix}c r="{ref}"><{prefix}f>{_xml_escape(val[1:])}</{prefix}f></{prefix}c>'
+        if isinstance(val, bool):
+            t, v = ' t="b"', '1' if val else '0'
+        elif isinstance(val, (int, float)):
+            t, v = '', str(val)
+        elif inline:
+            return (f'<{prefix}c r="{ref}" t="inlineStr">'
+                    f'{_si_xml(prefix, str(val), "is")}</{prefix}c>')
+        else:
+            t, v = ' t="s"', self._add_shared_string(str(val))
+        return f'<{prefix}c r="{ref}"{t}><{prefix}v>{v}</{prefix}v></{prefix}c>'
+
+    # -- Compacting shared strings --
+
+    def compact_shared_strings(self):
+        """Drop shared strings no cell references any more; call before save().
+
+        Every sheet part is scanned for the string indexes its cells use,
+        the live strings are renumbered in order, and the <v> indexes that
+        change are rewritten on the raw XML (streamed to a temporary file,
+        like large row edits). Live <si> entries are kept byte for byte.
+        Returns {"strings", "removed", "bytesReclaimed"}, the last being
+        the size change of sharedStrings.xml; nothing is changed when a
+        cell references a missing string or the workbook has revision logs.
+        """
+        self._flush_sheets()
+        if self._ss_modified:
+            self._serialize_ss()
+            self._ss_base, self._ss_refs = len(self._shared_strings), 0
+        data = self._entries.get('xl/sharedStrings.xml')
+        total = len(self._shared_strings)
+        result = {"strings": total, "removed": 0, "bytesReclaimed": 0}
+        if not data or not total or any(n.startswith('xl/revisions/') for n in self._entries.names()):
+            return result
+        parts = [sp for _, sp in self._sheets if sp in self._entries]
+
+        # Mark
+        live = bytearray(total)
+        refs = 0
+        for sp in parts:
+            for _, _, idx in _iter_shared_refs(self._entries[sp]):
+                if idx >= total:
+                    return result  # dangling reference: renumbering would redirect it
+                live[idx] = 1
+                refs += 1
+        first = live.find(0)
+        if first < 0:
+            return result
+        spans = _si_spans(data)
+        if spans is None or len(spans) != total:
+            return result
+        remap = array('l', [-1]) * total
+        n = 0
+        for i in range(total):
+            if live[i]:
+                remap[i] = n
+                n += 1
+
+        self._renumber_refs(parts, _iter_shared_refs, remap)
+
+        # Keep the live <si> entries, with count/uniqueCount patched
+        m = re.search(rb'<([\w.-]+:)?sst(?=[\s/>])[^>]*>', bytes(data[:4096]))
+        tag = _set_attr(_set_attr(m.group(0), b'count', str(refs)), b'uniqueCount', str(n))
+        new = b''.join([data[:m.start()], tag, data[m.end():spans[0][0]]]
+                       + [data[a:b] for (a, b), keep in zip(spans, live) if keep]
+                       + [data[spans[-1][1]:]])
+        result.update(removed=total - n, bytesReclaimed=len(data) - len(new))
+        self._entries['xl/sharedStrings.xml'] = new
+        self._shared_strings = [self._shared_strings[i] for i in range(total) if live[i]]
+        self._ss_lookup = None
+        self._ss_base, self._ss_refs = n, 0
+        self._ss_modified = True
+        return result
+
+    def _renumber_refs(self, parts, iter_refs, remap):
+        """Rewrite the numbers iter_refs(data) finds in sheet parts through remap.
+
+        Only parts with a number that changes are rewritten, on the raw XML,
+        streamed to a temporary file.
+        """
+        for sp in parts:
+            part = self._entries[sp]
+            out, pos = None, 0
+            for start, end, idx in iter_refs(part):
+                if remap[idx] == idx:
                     continue
+                if out is None:
+                    out = tempfile.TemporaryFile(prefix='excel-mcp-')
+                out.write(part[pos:start])
+                out.write(str(remap[idx]).encode('ascii'))
+                pos = end
+            if out is None:
+                continue
+            out.write(part[pos:])
+            self._entries.replace_with_file(sp, out)
+            self._modified_sheets.add(sp)
+            # Parsed state of the part holds the old numbers
+            self._sheet_trees.pop(sp, None)
+            self._row_index.pop(sp, None)
+            self._cell_cache.pop(sp, None)
 
-                s_idx = int(cell_el.get('s', '0'))
-                if s_idx == 0:
-                    continue  # default style
+    # -- Reading formats --
 
-                fmt = self._xf_to_fmt(s_idx)
-                if fmt:
-                    fmt['cell'] = ref.replace('$', '')
-                    formats.append(fmt)
+    def read_formats(self, sheet_name, range_str, group=False):
+        """Read formatting info for cells with non-default formatting.
+
+        One dict per cell, with its 'cell'; with group, one per rectangle
+        of cells with the same format, with its 'range' (see format_rects).
+        Positions without a <c> element report the style they show: their
+        row's (<row customFormat>), else their column's (<col style>).
+        """
+        c1, r1, c2, r2 = parse_range(range_str)
+        formats = []
+        table = self._xf_formats()
+        cells = self._iter_styles(sheet_name, c1, r1, c2, r2)
+
+        if group:
+            # Styles that decode to the same format share a key
+            keys, by_key = {}, {}
+
+            def styled():
+                for cr, cc, s_idx in cells:
+                    if s_idx == 0 or s_idx >= len(table) or not table[s_idx]:
+                        continue
+                    key = keys.get(s_idx)
+                    if key is None:
+                        fmt = table[s_idx]
+                        key = keys[s_idx] = json.dumps(fmt, sort_keys=True)
+                        by_key[key] = fmt
+                    yield cr, cc, key
+
+            for ref, key in format_rects(styled()):
+                fmt = dict(by_key[key])
+                fmt['range'] = ref
+                formats.append(fmt)
+            return formats
+
+        for cr, cc, s_idx in cells:
+            if s_idx == 0 or s_idx >= len(table):
+                continue  # default style
+
+            if table[s_idx]:
+                fmt = dict(table[s_idx])
+                fmt['cell'] = cell_ref(cr, cc)
+                formats.append(fmt)
 
         return formats
 
+    def _iter_styles(self, sheet_name, c1, r1, c2, r2):
+        """Yield (row, col, style_idx) for a range in row order: its cells,
+        and the empty positions that show a row or column style."""
+        cells = ((cr, cc, s_idx) for cr, cc, s_idx, _ in
+                 self._iter_cells(sheet_name, c1, r1, c2, r2, values=False))
+        col_spans, row_styles = self._line_styles(sheet_name)
+        col_xf = {}
+        for lo, hi, xf in col_spans:
+            for cn in range(max(lo, c1), min(hi, c2) + 1):
+                col_xf[cn] = xf
+        row_xf = {rn: xf for rn, xf in row_styles if r1 <= rn <= r2}
+        if not col_xf and not any(row_xf.values()):
+            yield from cells
+            return
+
+        # Every row of the range shows the column styles; otherwise only
+        # the styled rows have anything to fill
+        filled = range(r1, r2 + 1) if col_xf else sorted(row_xf)
+        by_row = itertools.groupby(cells, key=lambda cell: cell[0])
+        pending = next(by_row, None)
+        for rn in filled:
+            while pending is not None and pending[0] < rn:
+                yield from pending[1]
+                pending = next(by_row, None)
+            present = {}
+            if pending is not None and pending[0] == rn:
+                present = {cc: s_idx for _, cc, s_idx in pending[1]}
+                pending = next(by_row, None)
+            xf = row_xf.get(rn)
+            if xf is None:
+                cols = sorted(present.keys() | col_xf.keys())
+                fill = col_xf
+            else:
+                cols = range(c1, c2 + 1) if xf else sorted(present)
+                fill = {}
+            for cn in cols:
+                yield rn, cn, present.get(cn, fill.get(cn, xf or 0))
+        while pending is not None:
+            yield from pending[1]
+            pending = next(by_row, None)
+
+    def _line_styles(self, sheet_name):
+        """Return ([(min, max, style)] of styled columns, [(row, style)] of
+        rows with customFormat) of a sheet.
+
+        Kept in the workbook cache per sheet part content, so reading the
+        formats of a cached sheet does not inflate its XML.
+        """
+        sp = self._sheet_path(sheet_name)
+        key = self._part_key(sp)
+        path = None
+        if key is not None and WORKBOOK_CACHE_ENABLED:
+            path = os.path.join(_cache_dir('workbook'), f'lines-{_JSON_CACHE_VERSION}-{key}.json')
+            cached = _load_json(path)
+            if cached is not None:
+                return cached['cols'], cached['rows']
+        cols = self._col_styles(sheet_name)
+        rows = [(rn, xf) for rn, xf in self._row_styles(sheet_name) if xf is not None]
+        if path is not None:
+            _store_json(path, {'cols': cols, 'rows': rows})
+        return cols, rows
+
+    def _xf_formats(self):
+        """Return the format dict of every cellXf, indexed by xf number.
+
+        The table is compiled once per styles.xml content and kept in the
+        workbook cache; it is rebuilt while styles are modified in-session.
+        """
+        if self._xf_table is not None and not self._styles_modified:
+            return self._xf_table
+        key = None if self._styles_modified else self._part_key('xl/styles.xml')
+        path = None
+        table = None
+        if key is not None and WORKBOOK_CACHE_ENABLED:
+            path = os.path.join(_cache_dir('workbook'), f'styles-{_JSON_CACHE_VERSION}-{key}.json')
+            table = _load_json(path)
+        if table is None:
+            self._style_memo = {}
+            try:
+                table = [self._xf_to_fmt(i)
+                         for i in range(len(self._style_list('cellXfs', 'xf')))]
+            finally:
+                self._style_memo = None
+            if path is not None:
+                _store_json(path, table)
+        self._xf_table = table
+        return table
+
+    def _date_styles(self):
+        """Return the date kind (DATE, TIME, DATETIME or 0) of every cellXf.
+
+        A bytes string indexed by xf number, from each xf's number format.
+        Compiled once per styles.xml content like _xf_formats(), so reading
+        a cell costs only an index lookup.
+        """
+        if self._date_kinds is not None and not self._styles_modified:
+            return self._date_kinds
+        key = None if self._styles_modified else self._part_key('xl/styles.xml')
+        path = None
+        kinds = None
+        if key is not None and WORKBOOK_CACHE_ENABLED:
+            path = os.path.join(_cache_dir('workbook'), f'dates-{_JSON_CACHE_VERSION}-{key}.json')
+            kinds = _load_json(path)
+        if kinds is None:
+            nfs = self._styles_tree.find(_tag('numFmts'))
+            codes = {int(nf.get('numFmtId', '0')): nf.get('formatCode', '')
+                     for nf in (nfs if nfs is not None else ())}
+            kinds = []
+            for xf in self._style_list('cellXfs', 'xf'):
+                fid = int(xf.get('numFmtId', '0'))
+                kinds.append(date_kind(codes[fid]) if fid in codes
+                             else _BUILTIN_DATE_FMTS.get(fid, 0))
+            if path is not None:
+                _store_json(path, kinds)
+        self._date_kinds = bytes(kinds) if any(kinds) else b''
+        return self._date_kinds
+
+    def _style_list(self, coll, item):
+        """Child elements of a styles.xml collection (memoized while compiling)."""
+        memo = self._style_memo
+        if memo is not None and coll in memo:
+            return memo[coll]
+        el = self._styles_tree.find(_tag(coll))
+        items = el.findall(_tag(item)) if el is not None else []
+        if memo is not None:
+            memo[coll] = items
+        return items
+
     def _xf_to_fmt(self, xf_idx):
         """Convert cellXf index to our format dict."""
-        if self._styles_tree is None:
-            return {}
-        xfs = self._styles_tree.find(_tag('cellXfs'))
-        if xfs is None:
-            return {}
-        xf_list = xfs.findall(_tag('xf'))
+        xf_list = self._style_list('cellXfs', 'xf')
         if xf_idx >= len(xf_list):
             return {}
         xf = xf_list[xf_idx]
@@ -378,10 +2007,7 @@ class XlsxFile:
         return fmt
 
     def _read_font(self, font_id, fmt):
-        fonts = self._styles_tree.find(_tag('fonts'))
-        if fonts is None:
-            return
-        font_list = fonts.findall(_tag('font'))
+        font_list = self._style_list('fonts', 'font')
         if font_id >= len(font_list):
             return
         font = font_list[font_id]
@@ -407,10 +2033,7 @@ class XlsxFile:
                 fmt['fontColor'] = f'#{rgb.lower()}'
 
     def _read_fill(self, fill_id, fmt):
-        fills = self._styles_tree.find(_tag('fills'))
-        if fills is None:
-            return
-        fill_list = fills.findall(_tag('fill'))
+        fill_list = self._style_list('fills', 'fill')
         if fill_id >= len(fill_list):
             return
         pf = fill_list[fill_id].find(_tag('patternFill'))
@@ -425,10 +2048,7 @@ class XlsxFile:
                 fmt['bg'] = f'#{rgb.lower()}'
 
     def _read_border(self, border_id, fmt):
-        borders_el = self._styles_tree.find(_tag('borders'))
-        if borders_el is None:
-            return
-        border_list = borders_el.findall(_tag('border'))
+        border_list = self._style_list('borders', 'border')
         if border_id >= len(border_list):
             return
         border = border_list[border_id]
@@ -462,49 +2082,267 @@ class XlsxFile:
     # -- Writing formats --
 
     def apply_format(self, sheet_name, range_str, fmt):
-        """Apply formatting to a range of cells."""
-        sp, tree = self._get_sheet_tree(sheet_name)
-        c1, r1, c2, r2 = parse_range(range_str)
-        sheet_data = tree.find(_tag('sheetData'))
-        if sheet_data is None:
-            return
+        """Apply formatting to a range of cells.
 
-        # Ensure rows and cells exist for the range
-        row_map = {}
-        for row_el in sheet_data.findall(_tag('row')):
-            row_map[int(row_el.get('r'))] = row_el
+        Whole columns ('A:C') and whole rows ('2:5') are styled through
+        <col style> and <row s customFormat> rather than a cell per
+        position: only cells that already exist are restyled, plus those
+        where the range crosses a row or column with a style of its own
+        (Excel shows a row's style over a column's, so those cells need
+        their own).
+        """
+        c1, r1, c2, r2 = parse_area(range_str)
 
         # Cache: old_xf_idx -> new_xf_idx
         xf_cache = {}
 
-        for rn in range(r1, r2 + 1):
-            row_el = row_map.get(rn)
-            if row_el is None:
-                row_el = ET.SubElement(sheet_data, _tag('row'))
-                row_el.set('r', str(rn))
-                row_map[rn] = row_el
+        def style(old_xf):
+            if old_xf not in xf_cache:
+                xf_cache[old_xf] = self._build_xf(old_xf, fmt)
+            return xf_cache[old_xf]
 
-            cell_map = {}
-            for c_el in row_el.findall(_tag('c')):
-                try:
-                    _, cc = parse_cell_ref(c_el.get('r', ''))
-                    cell_map[cc] = c_el
-                except ValueError:
-                    pass
+        if r1 == 1 and r2 == MAX_ROW:
+            self._format_columns(sheet_name, c1, c2, style)
+        elif c1 == 1 and c2 == MAX_COL:
+            self._format_rows(sheet_name, r1, r2, style)
+        else:
+            def format_row(rn, row_el):
+                cell_map = _cell_map(row_el)
+                new_cells = False
+                for cn in range(c1, c2 + 1):
+                    c_el = cell_map.get(cn)
+                    if c_el is None:
+                        c_el = ET.SubElement(row_el, _tag('c'))
+                        c_el.set('r', cell_ref(rn, cn))
+                        cell_map[cn] = c_el
+                        new_cells = True
+                    c_el.set('s', str(style(int(c_el.get('s', '0')))))
+                if new_cells:
+                    _put_in_order(row_el, cell_map)
+
+            self._edit_rows(sheet_name, range(r1, r2 + 1), format_row, (c1, c2))
+        self._styles_modified = True
 
+    def _format_columns(self, sheet_name, c1, c2, style):
+        """Style columns c1..c2 through <cols>, touching only existing rows."""
+        width = self._default_col_width(sheet_name)
+        self._edit_cols(sheet_name, lambda cols_el: _restyle_cols(cols_el, c1, c2, style, width))
+
+        rows = self._row_styles(sheet_name)
+        # Styled rows get a cell in each column; their new style is
+        # resolved now, as the row may reach edit() without its attributes
+        row_xf = {rn: style(s) for rn, s in rows if s is not None}
+        # With every column formatted, a styled row takes the new style
+        # itself (edit() then gets whole rows, attributes included)
+        whole = c1 == 1 and c2 == MAX_COL
+
+        def format_row(rn, row_el):
+            cell_map = _cell_map(row_el)
+            for cn, c_el in cell_map.items():
+                if c1 <= cn <= c2:
+                    c_el.set('s', str(style(int(c_el.get('s', '0')))))
+            if rn not in row_xf:
+                return
+            if whole:
+                # Every position of the row changes: restyle the row itself
+                row_el.set('s', str(row_xf[rn]))
+                return
+            new_cells = False
             for cn in range(c1, c2 + 1):
-                c_el = cell_map.get(cn)
-                if c_el is None:
+                if cn not in cell_map:
                     c_el = ET.SubElement(row_el, _tag('c'))
                     c_el.set('r', cell_ref(rn, cn))
+                    c_el.set('s', str(row_xf[rn]))
+                    cell_map[cn] = c_el
+                    new_cells = True
+            if new_cells:
+                _put_in_order(row_el, cell_map)
+
+        self._edit_rows(sheet_name, [rn for rn, _ in rows], format_row,
+                        None if whole else (c1, c2), widen=False)
+
+    def _format_rows(self, sheet_name, r1, r2, style):
+        """Style rows r1..r2 through <row s customFormat="1">."""
+        plan = []
+
+        def plain_row_plan():
+            """(row style, [(first col, last col, style)] needing cells) for
+            rows without customFormat, whose empty positions showed their
+            column's style until now and show the row's from now on.
+
+            The row takes the style most of its positions should show;
+            cells are created only where a column should show another one,
+            so a sheet-wide <col> style adds no cells at all.
+            """
+            if not plan:
+                layout, prev = [], 0
+                for lo, hi, xf in sorted(self._col_styles(sheet_name)):
+                    lo, hi = max(lo, prev + 1), min(hi, MAX_COL)
+                    if lo > hi:
+                        continue
+                    if lo > prev + 1:
+                        layout.append((prev + 1, lo - 1, style(0)))
+                    layout.append((lo, hi, style(xf)))
+                    prev = hi
+                if prev < MAX_COL:
+                    layout.append((prev + 1, MAX_COL, style(0)))
+                widths = {}
+                for lo, hi, xf in layout:
+                    widths[xf] = widths.get(xf, 0) + hi - lo + 1
+                row_xf = max(widths, key=widths.get)
+                plan.extend([row_xf, [span for span in layout if span[2] != row_xf]])
+            return plan
+
+        def format_row(rn, row_el):
+            custom = row_el.get('customFormat') in ('1', 'true')
+            cell_map = _cell_map(row_el)
+            for c_el in cell_map.values():
+                c_el.set('s', str(style(int(c_el.get('s', '0')))))
+            if custom:
+                row_xf = style(int(row_el.get('s', '0')))
+            else:
+                row_xf, fill = plain_row_plan()
+                new_cells = False
+                for lo, hi, xf in fill:
+                    for cn in range(lo, hi + 1):
+                        if cn not in cell_map:
+                            c_el = ET.SubElement(row_el, _tag('c'))
+                            c_el.set('r', cell_ref(rn, cn))
+                            c_el.set('s', str(xf))
+                            cell_map[cn] = c_el
+                            new_cells = True
+                if new_cells:
+                    _put_in_order(row_el, cell_map)
+            row_el.set('s', str(row_xf))
+            row_el.set('customFormat', '1')
+
+        self._edit_rows(sheet_name, range(r1, r2 + 1), format_row, None)
+
+    def _default_col_width(self, sheet_name):
+        """Width for new <col> elements: the sheet's defaultColWidth, if set."""
+        sp = self._sheet_path(sheet_name)
+        if sp in self._sheet_trees:
+            pr = self._sheet_trees[sp].find(_tag('sheetFormatPr'))
+            width = pr.get('defaultColWidth') if pr is not None else None
+        else:
+            data = self._entries[sp]
+            bounds = _sheet_data_bounds(data)
+            head = bytes(data[:bounds[1].start()]) if bounds is not None else b''
+            m = re.search(rb'<(?:[\w.-]+:)?sheetFormatPr\s[^>]*?defaultColWidth="([^"]+)"', head)
+            width = m.group(1).decode('ascii') if m is not None else None
+        return width or DEFAULT_COL_WIDTH
+
+    def _edit_cols(self, sheet_name, edit):
+        """Call edit(cols_el) on a sheet's <cols>, created empty if missing.
+
+        edit returns whether it changed the element; an empty <cols> is
+        dropped. Sheets not parsed in this session get only their <cols>
+        re-serialized.
+        """
+        sp = self._sheet_path(sheet_name)
+        if sp not in self._sheet_trees:
+            data = self._entries[sp]
+            bounds = _sheet_data_bounds(data)
+            if bounds is not None:
+                p, open_m, _, _ = bounds
+                head = bytes(data[:open_m.start()])
+                m = re.search(rb'<' + re.escape(p.encode('ascii')) + rb'cols(?=[\s/>])[^>]*>', head)
+                ns = _extract_root_ns(data)
+                prefixes = {u: q for q, u in reversed(ns)}
+                prefixes[_XML_NS] = 'xml'
+                if m is None:
+                    start = end = open_m.start()
+                    cols_el = ET.Element(_tag('cols'))
+                else:
+                    start = m.start()
+                    if m.group(0).endswith(b'/>'):
+                        end = m.end()
+                    else:
+                        end = head.find(b'</' + p.encode('ascii') + b'cols>', m.end())
+                        end = end + len(p) + 7 if end >= 0 else -1
+                    decls = ''.join(f' xmlns:{q}="{u}"' if q else f' xmlns="{u}"' for q, u in ns)
+                    cols_el = None
+                    if end >= 0:
+                        frag = f'<sheetData{decls}>'.encode('utf-8') + head[start:end] + b'</sheetData>'
+                        cols_el = _parse(frag).find(_tag('cols'))
+                try:
+                    if cols_el is not None:
+                        _check_names(cols_el, prefixes)
+                except KeyError:
+                    cols_el = None  # namespace declared below the root element
+                if cols_el is not None:
+                    if edit(cols_el):
+                        xml = _element_bytes(cols_el, prefixes, {}) if len(cols_el) else b''
+                        self._entries[sp] = b''.join([data[:start], xml, data[end:]])
+                        self._modified_sheets.add(sp)
+                    return
 
-                old_xf = int(c_el.get('s', '0'))
-                if old_xf not in xf_cache:
-                    xf_cache[old_xf] = self._build_xf(old_xf, fmt)
-                c_el.set('s', str(xf_cache[old_xf]))
-
+        _, tree = self._get_sheet_tree(sheet_name)
+        cols_el = tree.find(_tag('cols'))
+        created = cols_el is None
+        if created:
+            cols_el = ET.SubElement(tree, _tag('cols'))
+        changed = edit(cols_el)
+        if not len(cols_el):
+            tree.remove(cols_el)
+        elif created:
+            # <cols> goes right before <sheetData>
+            tree.remove(cols_el)
+            sheet_data = tree.find(_tag('sheetData'))
+            tree.insert(list(tree).index(sheet_data) if sheet_data is not None else len(tree),
+                        cols_el)
+        if not changed:
+            return
         self._modified_sheets.add(sp)
-        self._styles_modified = True
+
+    def _col_styles(self, sheet_name):
+        """[(min, max, style)] of a sheet's <col> spans that have a style."""
+        styled_cols = []
+
+        def read_cols(cols_el):
+            for col in cols_el.findall(_tag('col')):
+                xf = int(col.get('style', '0'))
+                if xf:
+                    styled_cols.append((int(col.get('min')), int(col.get('max')), xf))
+            return False
+
+        self._edit_cols(sheet_name, read_cols)
+        return styled_cols
+
+    def _row_styles(self, sheet_name):
+        """[(row number, style)] of a sheet's existing rows, in order.
+
+        style is the row's s for rows with customFormat, else None.
+        """
+        sp = self._sheet_path(sheet_name)
+        if sp not in self._sheet_trees:
+            data = self._entries[sp]
+            bounds = _sheet_data_bounds(data)
+            if bounds is not None:
+                p, open_m, close, _ = bounds
+                rows = []
+                if close is not None:
+                    for m in _row_tag_re(p).finditer(data, open_m.end(), close):
+                        tag = m.group(0)
+                        r_m = _R_ATTR_RE.search(tag)
+                        if r_m is None:
+                            break
+                        xf = None
+                        if _CUSTOM_FORMAT_RE.search(tag):
+                            s_m = _S_ATTR_RE.search(tag)
+                            xf = int(s_m.group(1)) if s_m is not None else 0
+                        rows.append((int(r_m.group(1)), xf))
+                    else:
+                        return sorted(rows)
+        _, tree = self._get_sheet_tree(sheet_name)
+        sheet_data = tree.find(_tag('sheetData'))
+        rows = []
+        for row_el in (sheet_data if sheet_data is not None else ()):
+            if row_el.tag != _tag('row') or row_el.get('r') is None:
+                continue
+            custom = row_el.get('customFormat') in ('1', 'true')
+            rows.append((int(row_el.get('r')), int(row_el.get('s', '0')) if custom else None))
+        return sorted(rows)
 
     def _build_xf(self, base_xf_idx, fmt):
         """Create a new cellXf by merging base style with new format properties."""
@@ -683,11 +2521,12 @@ class XlsxFile:
 
         nfs = self._styles_tree.find(_tag('numFmts'))
         if nfs is None:
-            # Use ET.Element + insert instead of ET.SubElement to avoid
-            # the element appearing twice (SubElement appends, then insert
-            # would add a second reference).
-            nfs = ET.Element(_tag('numFmts'))
+            # Create in place, then move to the front: a detached element
+            # would carry its own xmlns declaration under lxml. Remove before
+            # insert so ElementTree does not hold two references to it.
+            nfs = ET.SubElement(self._styles_tree, _tag('numFmts'))
             nfs.set('count', '0')
+            self._styles_tree.remove(nfs)
             self._styles_tree.insert(0, nfs)
 
         # Check if already exists as custom format
@@ -756,43 +2595,147 @@ class XlsxFile:
         xfs.set('count', str(idx + 1))
         return idx
 
-    # -- Internal helpers --
+    # -- Compacting styles --
+
+    def compact_styles(self):
+        """Merge duplicate style records and drop unused ones; call before save().
+
+        Identical fonts, fills and borders are merged, then identical
+        cellXfs. cellXfs no cell, row (s) or column (style) references
+        are dropped, then the fonts, fills and borders no remaining xf
+        uses, and every sheet's references are renumbered on the raw XML.
+        cellStyleXfs and dxfs (conditional formats, table styles) are kept
+        as they are. Returns {"removed": {collection: count},
+        "bytesReclaimed"}, the last being the size change of styles.xml;
+        nothing is changed when a reference points past cellXfs.
+        """
+        self._flush_sheets()
+        root = self._styles_tree
+        before = len(_serialize(root))
+        parts = [sp for _, sp in self._sheets if sp in self._entries]
+        colls = (('fonts', 'font', 'fontId'), ('fills', 'fill', 'fillId'),
+                 ('borders', 'border', 'borderId'))
+        result = {"removed": {c: 0 for c in ('cellXfs', 'fonts', 'fills', 'borders')},
+                  "bytesReclaimed": 0}
+        xfs_el = root.find(_tag('cellXfs'))
+        if xfs_el is None:
+            return result
+        xfs = xfs_el.findall(_tag('xf'))
+        style_xfs = root.find(_tag('cellStyleXfs'))
+        style_xfs = style_xfs.findall(_tag('xf')) if style_xfs is not None else []
+
+        # Duplicates map to their first occurrence
+        items, dup = {}, {}
+        for coll, item, attr in colls:
+            el = root.find(_tag(coll))
+            items[attr] = el.findall(_tag(item)) if el is not None else []
+            first = {}
+            dup[attr] = [first.setdefault(_style_key(x), i) for i, x in enumerate(items[attr])]
+
+        def ids(xf, maps):
+            # xf attributes with its font/fill/border ids mapped
+            attrs = dict(xf.attrib)
+            for attr, m in maps.items():
+                i = int(attrs.get(attr, '0'))
+                if i < len(m):
+                    attrs[attr] = str(m[i])
+            return attrs
+
+        first = {}
+        xf_dup = []
+        for i, xf in enumerate(xfs):
+            key = (tuple(sorted(ids(xf, dup).items())),
+                   tuple(_style_key(c) for c in xf if isinstance(c.tag, str)))
+            xf_dup.append(first.setdefault(key, i))
+
+        # Mark the xfs cells, rows and columns use
+        used = bytearray(len(xfs))
+        used[0] = 1
+        for sp in parts:
+            for _, _, idx in _iter_style_refs(self._entries[sp]):
+                if idx >= len(xfs):
+                    return result
+                used[xf_dup[idx]] = 1
+        xf_new = array('l', [-1]) * len(xfs)
+        n = 0
+        for i in range(len(xfs)):
+            if used[i]:
+                xf_new[i] = n
+                n += 1
+        for i in range(len(xfs)):
+            xf_new[i] = xf_new[xf_dup[i]]
+        for i, xf in enumerate(xfs):
+            if not used[i]:
+                xfs_el.remove(xf)
+        xfs = [xf for i, xf in enumerate(xfs) if used[i]]
+        xfs_el.set('count', str(len(xfs)))
+        result["removed"]["cellXfs"] = len(used) - n
+
+        # Fonts, fills and borders still used by an xf; the first of each
+        # (and fill 1, gray125) is a default Excel expects in place
+        for coll, item, attr in colls:
+            live = bytearray(len(items[attr]))
+            for i in range(min(len(live), 2 if attr == 'fillId' else 1)):
+                live[i] = 1
+            for xf in xfs + style_xfs:
+                i = int(xf.get(attr, '0'))
+                if i < len(live):
+                    live[dup[attr][i]] = 1
+            new, k = [-1] * len(live), 0
+            for i in range(len(live)):
+                if live[i]:
+                    new[i] = k
+                    k += 1
+            for xf in xfs + style_xfs:
+                i = int(xf.get(attr, '0'))
+                if attr in xf.attrib and i < len(live):
+                    xf.set(attr, str(new[dup[attr][i]]))
+            el = root.find(_tag(coll))
+            for i, x in enumerate(items[attr]):
+                if not live[i]:
+                    el.remove(x)
+            if el is not None:
+                el.set('count', str(k))
+            result["removed"][coll] = len(live) - k
 
-    def _register_ns_from_zip(self):
-        """Extract and register namespace prefixes from XML files in the ZIP."""
-        try:
-            with zipfile.ZipFile(self.path, 'r') as z:
-                for name in z.namelist():
-                    if name.endswith('.xml') or name.endswith('.rels'):
-                        data = z.read(name)
-                        for m in re.finditer(rb'xmlns:(\w+)=["\']([^"\']+)["\']', data):
-                            prefix = m.group(1).decode('utf-8')
-                            uri = m.group(2).decode('utf-8')
-                            try:
-                                ET.register_namespace(prefix, uri)
-                            except Exception:
-                                pass
-        except Exception:
-            pass
+        self._renumber_refs(parts, _iter_style_refs, xf_new)
+        self._styles_modified = True
+        self._xf_table = None
+        self._date_kinds = None
+        result["bytesReclaimed"] = before - len(_serialize(root))
+        return result
+
+    # -- Internal helpers --
 
     def _parse_workbook(self):
-        wb_tree = _parse(self._entries.get('xl/workbook.xml', b''))
-        rels_data = self._entries.get('xl/_rels/workbook.xml.rels', b'')
-        rels_tree = _parse(rels_data)
-
-        rid_map = {}
-        for rel in rels_tree.iter(f'{{{NS_REL}}}Relationship'):
-            rid_map[rel.get('Id')] = rel.get('Target')
-
-        for sheet in wb_tree.iter(_tag('sheet')):
-            name = sheet.get('name')
-            rid = sheet.get(f'{{{NS_R}}}id')
-            target = rid_map.get(rid, '')
-            if not target.startswith('/'):
-                sp = f'xl/{target}'
-            else:
-                sp = target[1:]
-            self._sheets.append((name, sp))
+        wb_data = self._entries.get('xl/workbook.xml', b'')
+        self._sheets = _sheet_parts(
+            wb_data, self._entries.get('xl/_rels/workbook.xml.rels', b''))
+        self._date1904 = _DATE1904_RE.search(bytes(wb_data)) is not None
+
+    def _ss_cache_path(self):
+        """Workbook cache file of the shared strings; None if not cacheable."""
+        ss = 'xl/sharedStrings.xml'
+        key = self._part_key(ss) if self._crc.get(ss, (0, 0))[1] else None
+        if key is None or not WORKBOOK_CACHE_ENABLED:
+            return None
+        return os.path.join(_cache_dir('workbook'), f'ss-{key}.bin')
+
+    def _load_shared_strings(self):
+        """Load shared strings from the workbook cache, or parse and cache them."""
+        path = self._ss_cache_path()
+        if path is None:
+            self._parse_shared_strings()
+            self._ss_base = len(self._shared_strings)
+            return
+        buf = self._map_cache(path)
+        strings = _MappedStrings.from_buffer(buf) if buf is not None else None
+        if strings is not None:
+            self._shared_strings = strings
+        else:
+            self._parse_shared_strings()
+            _store_cache(path, _pack_strings(self._shared_strings))
+        self._ss_base = len(self._shared_strings)
 
     def _parse_shared_strings(self):
         data = self._entries.get('xl/sharedStrings.xml')
@@ -805,37 +2748,69 @@ class XlsxFile:
             self._shared_strings.append(_inline_text(si))
 
     def _add_shared_string(self, s):
+        if not isinstance(self._shared_strings, list):
+            self._shared_strings = list(self._shared_strings)  # cache-backed
+        if self._ss_lookup is None:
+            self._ss_lookup = {}
+            for i, t in enumerate(self._shared_strings):
+                self._ss_lookup.setdefault(t, i)
+        self._ss_refs += 1
         # Check if already exists
-        try:
-            return self._shared_strings.index(s)
-        except ValueError:
-            pass
+        idx = self._ss_lookup.get(s)
+        if idx is not None:
+            return idx
+        self._ss_lookup[s] = len(self._shared_strings)
         self._shared_strings.append(s)
         self._ss_modified = True
         return len(self._shared_strings) - 1
 
     def _serialize_ss(self):
-        root = ET.Element(_tag('sst'))
-        root.set('count', str(len(self._shared_strings)))
-        root.set('uniqueCount', str(len(self._shared_strings)))
-        for s in self._shared_strings:
-            si = ET.SubElement(root, _tag('si'))
-            t = ET.SubElement(si, _tag('t'))
-            if s and (s[0] == ' ' or s[-1] == ' '):
-                t.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
-            t.text = s
-        self._entries['xl/sharedStrings.xml'] = _serialize(root)
+        """Append the strings added in this session to sharedStrings.xml.
+
+        Existing <si> entries, rich text included, are kept byte for byte:
+        only the new strings are turned into XML, spliced in before </sst>,
+        and count/uniqueCount are patched in the start tag. count can only
+        grow this way (references overwritten here aren't subtracted), but
+        it is advisory.
+        """
+        data = self._entries.get('xl/sharedStrings.xml')
+        total = len(self._shared_strings)
+        m = re.search(rb'<([\w.-]+:)?sst(?=[\s/>])[^>]*>', bytes(data[:4096])) if data else None
+        if m is None:
+            items = ''.join(_si_xml('', t) for t in self._shared_strings).encode('utf-8')
+            self._entries['xl/sharedStrings.xml'] = (
+                _XML_DECL + f'<sst xmlns="{NS}" count="{total}" uniqueCount="{total}">'.encode('ascii')
+                + items + b'</sst>')
+            return
+
+        p = (m.group(1) or b'').decode('ascii')
+        items = ''.join(_si_xml(p, t) for t in self._shared_strings[self._ss_base:])
+        tag = m.group(0)
+        c_m = re.search(rb'\scount="(\d+)"', tag)
+        count = max(int(c_m.group(1)) + self._ss_refs if c_m else total, total)
+        tag = _set_attr(_set_attr(tag, b'count', str(count)), b'uniqueCount', str(total))
+        if tag.endswith(b'/>'):
+            # <sst/> -> <sst>...</sst>
+            self._entries['xl/sharedStrings.xml'] = b''.join([
+                data[:m.start()], tag[:-2].rstrip() + b'>', items.encode('utf-8'),
+                f'</{p}sst>'.encode('ascii'), data[m.end():]])
+            return
+        close = data.rfind(f'</{p}sst>'.encode('ascii'))
+        self._entries['xl/sharedStrings.xml'] = b''.join([
+            data[:m.start()], tag, data[m.end():close], items.encode('utf-8'), data[close:]])
 
     def _parse_styles(self):
         data = self._entries.get('xl/styles.xml')
         if data:
-            self._styles_root_ns = _extract_root_ns(data)
-            self._styles_tree = _parse(data)
+            if not _KEEPS_NS:
+                _register_ns_from(data)
+                self._styles_root_ns = _extract_root_ns(data)
+            self._styles_el = _parse(data)
         else:
             # Create minimal styles
-            self._styles_tree = ET.Element(_tag('styleSheet'))
+            self._styles_el = _new_root(_tag('styleSheet'))
             for coll in ('fonts', 'fills', 'borders', 'cellXfs'):
-                el = ET.SubElement(self._styles_tree, _tag(coll))
+                el = ET.SubElement(self._styles_el, _tag(coll))
                 el.set('count', '1')
                 if coll == 'fonts':
                     font = ET.SubElement(el, _tag('font'))
@@ -875,28 +2850,56 @@ class XlsxFile:
         # If no entries left, remove calcChain.xml entirely
         remaining = tree.findall(_tag('c'))
         if not remaining:
-            del self._entries['xl/calcChain.xml']
-            if 'xl/calcChain.xml' in self._compress:
-                del self._compress['xl/calcChain.xml']
-            # Remove from [Content_Types].xml
-            self._remove_content_type('xl/calcChain.xml')
-            # Remove relationship from workbook.xml.rels
-            self._remove_workbook_rel_by_target('calcChain.xml')
+            self._drop_calc_chain()
         else:
             self._entries['xl/calcChain.xml'] = _serialize(tree)
 
+    def _drop_calc_chain(self):
+        """Remove calcChain.xml; Excel rebuilds it when the workbook is calculated."""
+        if 'xl/calcChain.xml' not in self._entries:
+            return
+        del self._entries['xl/calcChain.xml']
+        if 'xl/calcChain.xml' in self._compress:
+            del self._compress['xl/calcChain.xml']
+        # Remove from [Content_Types].xml
+        self._remove_content_type('xl/calcChain.xml')
+        # Remove relationship from workbook.xml.rels
+        self._remove_workbook_rel_by_target('calcChain.xml')
+
+    def _set_full_calc_on_load(self):
+        """Set <calcPr fullCalcOnLoad="1"> in workbook.xml, editing it as text."""
+        data = bytes(self._entries.get('xl/workbook.xml', b''))
+        m = re.search(rb'<([\w.-]+:)?workbook[\s>]', data)
+        if m is None:
+            return
+        p = m.group(1) or b''
+        calc = re.search(rb'<' + re.escape(p) + rb'calcPr(?=[\s/>])[^>]*>', data)
+        if calc is not None:
+            tag = _set_attr(calc.group(0), b'fullCalcOnLoad', '1')
+            data = data[:calc.start()] + tag + data[calc.end():]
+        else:
+            # <calcPr> goes before these in CT_Workbook's sequence
+            after = re.search(rb'<' + re.escape(p) + rb'(?:oleSize|customWorkbookViews|'
+                              rb'pivotCaches|smartTagPr|smartTagTypes|webPublishing|'
+                              rb'fileRecoveryPr|webPublishObjects|extLst)(?=[\s/>])|</'
+                              + re.escape(p) + rb'workbook>', data)
+            if after is None:
+                return
+            tag = b'<' + p + b'calcPr fullCalcOnLoad="1"/>'
+            data = data[:after.start()] + tag + data[after.start():]
+        self._entries['xl/workbook.xml'] = data
+
     def _remove_content_type(self, part_name):
         """Remove a part from [Content_Types].xml."""
         ct_data = self._entries.get('[Content_Types].xml')
         if not ct_data:
             return
         ns_ct = 'http://schemas.openxmlformats.org/package/2006/content-types'
-        ET.register_namespace('', ns_ct)
         tree = _parse(ct_data)
         for ov in tree.findall(f'{{{ns_ct}}}Override'):
             if ov.get('PartName') == f'/{part_name}':
                 tree.remove(ov)
-                self._entries['[Content_Types].xml'] = _serialize(tree)
+                self._entries['[Content_Types].xml'] = _serialize_default_ns(tree, ns_ct)
                 return
 
     def _remove_workbook_rel_by_target(self, target):
@@ -909,16 +2912,36 @@ class XlsxFile:
             t = rel.get('Target', '')
             if t == target or t.endswith('/' + target):
                 tree.remove(rel)
-                self._entries['xl/_rels/workbook.xml.rels'] = _serialize(tree)
+                self._entries['xl/_rels/workbook.xml.rels'] = _serialize_default_ns(tree, NS_REL)
                 return
 
+    def _ensure_workbook_rel(self, target, rel_type):
+        """Ensure xl/_rels/workbook.xml.rels has a relationship to target."""
+        rels_data = self._entries.get('xl/_rels/workbook.xml.rels')
+        if not rels_data:
+            return
+        tree = _parse(rels_data)
+        ids = set()
+        for rel in tree.findall(f'{{{NS_REL}}}Relationship'):
+            t = rel.get('Target', '')
+            if t == target or t.endswith('/' + target):
+                return
+            ids.add(rel.get('Id'))
+        n = len(ids) + 1
+        while f'rId{n}' in ids:
+            n += 1
+        rel = ET.SubElement(tree, f'{{{NS_REL}}}Relationship')
+        rel.set('Id', f'rId{n}')
+        rel.set('Type', rel_type)
+        rel.set('Target', target)
+        self._entries['xl/_rels/workbook.xml.rels'] = _serialize_default_ns(tree, NS_REL)
+
     def _ensure_content_type(self, part_name, content_type):
         """Ensure a part is registered in [Content_Types].xml."""
         ct_data = self._entries.get('[Content_Types].xml')
         if not ct_data:
             return
         ns_ct = 'http://schemas.openxmlformats.org/package/2006/content-types'
-        ET.register_namespace('', ns_ct)
         tree = _parse(ct_data)
         # Check if Override already exists
         for ov in tree.findall(f'{{{ns_ct}}}Override'):
@@ -928,28 +2951,183 @@ class XlsxFile:
         ov = ET.SubElement(tree, f'{{{ns_ct}}}Override')
         ov.set('PartName', f'/{part_name}')
         ov.set('ContentType', content_type)
-        self._entries['[Content_Types].xml'] = _serialize(tree)
+        self._entries['[Content_Types].xml'] = _serialize_default_ns(tree, ns_ct)
+
+
+# ---------------------------------------------------------------------------
+# Conditional reads
+# ---------------------------------------------------------------------------
+
+def sheet_etag(path, sheet_name=None, range_str='', formats=False, variant=None):
+    """Return (sheet_name, etag) for a range without inflating sheet data.
+
+    The tag hashes the CRC32/size of the sheet part and of the parts its
+    values depend on (shared strings, styles and workbook.xml),
+    as recorded in the ZIP central directory, together with the range.
+    variant names a different shape of the same read (e.g. grouped
+    formats), which gets its own tag. Only workbook.xml and its rels are
+    inflated, to locate the sheet.
+    """
+    with zipfile.ZipFile(path, 'r') as z:
+        names = set(z.namelist())
+
+        def _read(name):
+            return z.read(name) if name in names else b''
+
+        sheets = _sheet_parts(_read('xl/workbook.xml'),
+                              _read('xl/_rels/workbook.xml.rels'))
+        if not sheets:
+            raise ValueError("Workbook has no sheets")
+        name = sheet_name or sheets[0][0]
+        sp = dict(sheets).get(name)
+        if sp is None:
+            raise ValueError(f"Sheet '{name}' not found")
+
+        # Styles and the date system also decide how dates are returned
+        deps = [sp, 'xl/sharedStrings.xml', 'xl/styles.xml', 'xl/workbook.xml']
+        parts = []
+        for dep in deps:
+            if dep in names:
+                info = z.getinfo(dep)
+                parts.append(f'{dep}:{info.CRC:08x}:{info.file_size}')
+    parts.append(range_str.replace('$', '').upper())
+    parts.append('formats' if formats else 'values')
+    if variant:
+        parts.append(variant)
+    return name, hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def file_info(path):
+    """Describe a workbook without inflating its cell data.
+
+    Only the ZIP central directory, workbook.xml, the rels, table parts
+    and the leading bytes of each sheet part (up to its <dimension>) are
+    read. Returns the file size, the date system, the sheets (name,
+    state, used range, part sizes, tables) and the defined names. A
+    sheet's used range is its <dimension>, None if the sheet has none.
+    """
+    with zipfile.ZipFile(path, 'r') as z:
+        infos = {i.filename: i for i in z.infolist()}
+
+        def _read(name):
+            return z.read(name) if name in infos else b''
+
+        wb_data = _read('xl/workbook.xml')
+        sheets = _sheet_parts(wb_data, _read('xl/_rels/workbook.xml.rels'))
+        wb_tree = _parse(wb_data)
+        states = {s.get('name'): s.get('state', 'visible')
+                  for s in wb_tree.iter(_tag('sheet'))}
+
+        defined = []
+        for dn in wb_tree.iter(_tag('definedName')):
+            entry = {"name": dn.get('name'), "refersTo": dn.text or ''}
+            local = dn.get('localSheetId')
+            if local is not None and local.isdigit() and int(local) < len(sheets):
+                entry["sheet"] = sheets[int(local)][0]
+            if dn.get('hidden') in ('1', 'true'):
+                entry["hidden"] = True
+            defined.append(entry)
+
+        result = []
+        for name, sp in sheets:
+            info = infos.get(sp)
+            result.append({
+                "name": name,
+                "state": states.get(name, 'visible'),
+                "usedRange": _leading_dimension(z, sp) if info is not None else None,
+                "bytes": info.file_size if info is not None else 0,
+                "compressedBytes": info.compress_size if info is not None else 0,
+                "tables": _sheet_tables(z, infos, sp),
+            })
+
+    return {
+        "fileBytes": os.path.getsize(path),
+        "date1904": _DATE1904_RE.search(wb_data) is not None,
+        "sheets": result,
+        "definedNames": defined,
+    }
+
+
+def _leading_dimension(z, sp):
+    """The <dimension> ref of a sheet part, inflating only its first bytes."""
+    head = b''
+    with z.open(sp) as f:
+        while len(head) < DIMENSION_SCAN_BYTES:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            head += chunk
+            m = _DIMENSION_REF_RE.search(head)
+            if m is not None:
+                return m.group(1).decode('ascii')
+            if _SHEETDATA_RE.search(head):
+                break  # <dimension> comes before the cells
+    return None
+
+
+def _sheet_tables(z, infos, sp):
+    """[{"name", "ref"}] of the tables (ListObjects) on a sheet."""
+    rels = posixpath.join(posixpath.dirname(sp), '_rels', posixpath.basename(sp) + '.rels')
+    if rels not in infos:
+        return []
+    tables = []
+    for rel in _parse(z.read(rels)).iter(f'{{{NS_REL}}}Relationship'):
+        if not rel.get('Type', '').endswith('/table'):
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            part = target[1:]
+        else:
+            part = posixpath.normpath(posixpath.join(posixpath.dirname(sp), target))
+        if part not in infos:
+            continue
+        table = _parse(z.read(part))
+        tables.append({"name": table.get('displayName') or table.get('name'),
+                       "ref": table.get('ref')})
+    return tables
 
 
 # ---------------------------------------------------------------------------
 # Module-level helpers
 # ---------------------------------------------------------------------------
 
+def _sheet_parts(wb_data, rels_data):
+    """Return [(sheet_name, zip_path), ...] from workbook.xml and its rels."""
+    wb_tree = _parse(wb_data)
+    rels_tree = _parse(rels_data)
+
+    rid_map = {}
+    for rel in rels_tree.iter(f'{{{NS_REL}}}Relationship'):
+        rid_map[rel.get('Id')] = rel.get('Target')
+
+    sheets = []
+    for sheet in wb_tree.iter(_tag('sheet')):
+        name = sheet.get('name')
+        rid = sheet.get(f'{{{NS_R}}}id')
+        target = rid_map.get(rid, '')
+        if not target.startswith('/'):
+            sp = f'xl/{target}'
+        else:
+            sp = target[1:]
+        sheets.append((name, sp))
+    return sheets
+
+
 def _extract_root_ns(data):
     """Extract namespace declarations from the root element of XML bytes."""
     if isinstance(data, str):
         data = data.encode('utf-8')
-    text = data.decode('utf-8', errors='replace')
-    # Find the first opening tag (skip XML declaration)
-    m = re.search(r'<([a-zA-Z][\w]*)', text)
+    # Find the first opening tag (skip XML declaration); only the root
+    # tag is decoded, so this stays cheap on very large parts
+    m = re.search(rb'<([a-zA-Z][\w]*)', data)
     if not m:
         return []
     # Extract the full opening tag
     start = m.start()
-    end = text.find('>', start)
+    end = data.find(b'>', start)
     if end < 0:
         return []
-    root_tag = text[start:end + 1]
+    root_tag = data[start:end + 1].decode('utf-8', errors='replace')
     # Extract all xmlns declarations
     ns_decls = []
     for nm in re.finditer(r'xmlns(?::(\w+))?=["\']([^"\']+)["\']', root_tag):
@@ -1004,17 +3182,621 @@ def _restore_root_ns(data, original_ns):
     return text.encode('utf-8') if isinstance(data, bytes) else text
 
 
+_XML_DECL = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+_FEED_CHUNK = 1024 * 1024
+
+
 def _parse(data):
-    """Parse XML bytes into ElementTree root."""
-    if isinstance(data, bytes):
-        return ET.fromstring(data)
-    return ET.fromstring(data.encode('utf-8'))
+    """Parse XML bytes (or a spilled, memory-mapped part) into ElementTree root."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if not isinstance(data, bytes):
+        # Feed mapped parts in chunks instead of copying them whole
+        if _KEEPS_NS:
+            parser = ET.XMLParser(huge_tree=True, resolve_entities=False)
+        else:
+            parser = ET.XMLParser()
+        view = memoryview(data)
+        for i in range(0, len(view), _FEED_CHUNK):
+            parser.feed(bytes(view[i:i + _FEED_CHUNK]))
+        view.release()
+        return parser.close()
+    if _XML_PARSER is not None:
+        return ET.fromstring(data, _XML_PARSER)
+    return ET.fromstring(data)
+
+
+def _register_ns_from(data):
+    """Register every prefixed namespace declared in a part (ElementTree only)."""
+    for m in re.finditer(rb'xmlns:(\w+)=["\']([^"\']+)["\']', data):
+        _register_ns(m.group(1).decode('utf-8'), m.group(2).decode('utf-8'))
 
 
 def _serialize(root):
     """Serialize ElementTree root to bytes with XML declaration."""
+    if _KEEPS_NS:
+        return _XML_DECL + ET.tostring(root, encoding='UTF-8', xml_declaration=False)
     xml_str = ET.tostring(root, encoding='unicode', xml_declaration=False)
-    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n' + xml_str).encode('utf-8')
+    return _XML_DECL + xml_str.encode('utf-8')
+
+
+def _new_root(tag):
+    """Create a detached root element in the main namespace."""
+    if _KEEPS_NS:
+        return ET.Element(tag, nsmap={None: NS})
+    return ET.Element(tag)
+
+
+def _sheet_data_bounds(data):
+    """Find <sheetData> in raw sheet XML without parsing it.
+
+    Returns (prefix, open_match, close_pos, dimension) where open_match
+    group 1 is '/' for a self-closing <sheetData/>, close_pos is the offset
+    of </sheetData> (or None) and dimension is the (start, end, ref) span
+    of <dimension ref="..."> (or None). Returns None if not found.
+    """
+    m = re.search(rb'<([\w.-]+:)?worksheet[\s>]', bytes(data[:4096]))
+    if m is None:
+        return None
+    p = m.group(1) or b''
+    open_m = re.search(rb'<' + re.escape(p) + rb'sheetData\s*(/?)>', data)
+    if open_m is None:
+        return None
+    dim = None
+    dim_m = re.search(rb'<' + re.escape(p) + rb'dimension\s[^>]*?ref="([^"]*)"',
+                      data[:open_m.start()])
+    if dim_m is not None:
+        dim = (dim_m.start(1), dim_m.end(1), dim_m.group(1).decode('ascii'))
+    close = None
+    if not open_m.group(1):
+        close = data.rfind(b'</' + p + b'sheetData>')
+        if close < open_m.end():
+            return None
+    return p.decode('ascii'), open_m, close, dim
+
+
+def _row_tag_re(prefix):
+    return re.compile(rb'<' + re.escape(prefix.encode('ascii')) + rb'row(?=[\s/>])[^>]*>')
+
+
+def _find_append_spot(data):
+    """Locate where rows can be appended to raw sheet XML, scanning backwards.
+
+    Returns a dict with the element prefix, the last row number, the byte
+    span to replace with new rows, whether <sheetData/> is self-closing and
+    the (start, end, ref) span of <dimension ref="...">; or None when the
+    layout can't be handled without parsing.
+    """
+    bounds = _sheet_data_bounds(data)
+    if bounds is None:
+        return None
+    p, open_m, close, dim = bounds
+    if close is None:
+        return {'prefix': p, 'last': 0, 'selfClosing': True,
+                'splice': open_m.span(), 'dimension': dim}
+
+    last, pos, tag = 0, close, b'<' + p.encode('ascii') + b'row'
+    while True:
+        pos = data.rfind(tag, open_m.end(), pos)
+        if pos < 0:
+            break
+        if data[pos + len(tag):pos + len(tag) + 1] in (b' ', b'>', b'\t', b'\n', b'\r', b'/'):
+            gt = data.find(b'>', pos)
+            r_m = _R_ATTR_RE.search(data[pos:gt])
+            if r_m is None:
+                return None  # rows without numbers: position is implicit
+            last = int(r_m.group(1))
+            break
+    if dim is not None and last:
+        # Rows out of order (the last one isn't the highest): parse instead
+        try:
+            if parse_range(dim[2])[3] > last:
+                return None
+        except ValueError:
+            pass
+    return {'prefix': p, 'last': last, 'selfClosing': False,
+            'splice': (close, close), 'dimension': dim}
+
+
+def _locate_rows(data, row_numbers):
+    """Find the byte spans of rows in raw sheet XML by scanning row tags.
+
+    Returns a dict with the element prefix, 'rows' ({rn: (start, end)} for
+    rows that exist), 'insert' ({rn: offset} where missing rows go),
+    'selfClosing' (the span of <sheetData/>, or None) and 'dimension' (as
+    in _sheet_data_bounds); or None when rows lack numbers or are out of
+    order.
+    """
+    bounds = _sheet_data_bounds(data)
+    if bounds is None:
+        return None
+    p, open_m, close, dim = bounds
+    wanted = sorted(row_numbers)
+    if close is None:
+        return {'prefix': p, 'rows': {}, 'insert': dict.fromkeys(wanted),
+                'selfClosing': open_m.span(), 'dimension': dim}
+
+    row_re, end_tag = _row_tag_re(p), f'</{p}row>'.encode('ascii')
+    rows, insert = {}, {}
+    pos, prev, i = open_m.end(), 0, 0
+    while i < len(wanted):
+        m = row_re.search(data, pos, close)
+        if m is None:
+            break
+        r_m = _R_ATTR_RE.search(m.group(0))
+        if r_m is None:
+            return None
+        rn = int(r_m.group(1))
+        if rn <= prev:
+            return None
+        prev = rn
+        if m.group(0).endswith(b'/>'):
+            end = m.end()
+        else:
+            end = data.find(end_tag, m.end(), close)
+            if end < 0:
+                return None
+            end += len(end_tag)
+        while i < len(wanted) and wanted[i] < rn:
+            insert[wanted[i]] = m.start()
+            i += 1
+        if i < len(wanted) and wanted[i] == rn:
+            rows[rn] = (m.start(), end)
+            i += 1
+        pos = end
+    for rn in wanted[i:]:
+        insert[rn] = close
+
+    if insert:
+        # Rows added at the end out of order by older versions would make
+        # the insertion point wrong; the last row must be the highest
+        spot = _find_append_spot(data)
+        if spot is None or spot['last'] < prev:
+            return None
+    return {'prefix': p, 'rows': rows, 'insert': insert, 'selfClosing': None,
+            'dimension': dim}
+
+
+_STREAM_BATCH_ROWS = 256
+
+
+def _cell_tag_re(prefix):
+    return re.compile(rb'<' + re.escape(prefix.encode('ascii')) + rb'c(?=[\s/>])[^>]*>')
+
+
+def _col_key(col):
+    """Sort key of a column, comparable with (len, letters) of a reference
+    without converting the letters to a number."""
+    letters = num_to_col(col).encode('ascii')
+    return len(letters), letters
+
+
+def _cell_span(data, row_m, row_end, k1, k2, cell_re, prefix):
+    """Byte span of the cells of a column range in a row of raw sheet XML.
+
+    row_m is the match of the row's start tag; k1 and k2 are the _col_key
+    of the first and last column, cell_re and prefix (bytes) those of the
+    part's <c> elements. Cells of a row are sorted, so those columns are
+    one contiguous run; when there are none the span is empty, at the
+    position where they would go. None for a self-closing row, or cells
+    without references or out of order.
+    """
+    if row_m.group(0).endswith(b'/>'):
+        return None
+    # Filling a new column: every cell is left of the range, so check the
+    # last one before scanning the row
+    cell_end = b'</' + prefix + b'c>'
+    pos = data.rfind(b'<' + prefix + b'c', row_m.end(), row_end)
+    last = cell_re.match(data, pos) if pos >= 0 else None
+    if last is not None:
+        r_m = _CELL_R_RE.search(last.group(0))
+        if r_m is not None and (len(r_m.group(1)), r_m.group(1)) < k1:
+            if last.group(0).endswith(b'/>'):
+                return last.end(), last.end()
+            end = data.find(cell_end, last.end(), row_end) + len(cell_end)
+            return end, end
+    start = end = row_m.end()
+    before, prev, found = None, (0, b''), False
+    for m in cell_re.finditer(data, row_m.end(), row_end):
+        r_m = _CELL_R_RE.search(m.group(0))
+        if r_m is None:
+            return None
+        letters = r_m.group(1)
+        key = (len(letters), letters)
+        if key <= prev:
+            return None
+        prev = key
+        if key < k1:
+            before = m
+            continue
+        if key > k2:
+            break
+        if not found:
+            start, found = m.start(), True
+        if m.group(0).endswith(b'/>'):
+            end = m.end()
+        else:
+            end = data.find(cell_end, m.end(), row_end) + len(cell_end)
+    if not found and before is not None:
+        # Insert after the last cell left of the columns
+        if before.group(0).endswith(b'/>'):
+            start = before.end()
+        else:
+            start = data.find(cell_end, before.end(), row_end) + len(cell_end)
+        end = start
+    return start, end
+
+
+def _rows_streamable(data, start, end, row_re):
+    """Check that rows can be merged with edits as raw bytes: every row is
+    numbered and ascending, and no namespace declarations, comments or
+    processing instructions appear inside <sheetData>."""
+    for marker in (b'xmlns', b'<!--', b'<?'):
+        if data.find(marker, start, end) >= 0:
+            return False
+    prev = 0
+    for m in row_re.finditer(data, start, end):
+        r_m = _R_ATTR_RE.search(m.group(0))
+        if r_m is None or int(r_m.group(1)) <= prev:
+            return False
+        prev = int(r_m.group(1))
+    return True
+
+
+def _accepts(where, vals, c1):
+    """Whether a row of decoded values passes an iter_values() filter."""
+    return where is None or where({cn: vals[cn - c1] for cn in where.columns})
+
+
+def _key_value(key, strings):
+    """The value of an _iter_row_keys() key (None for a missing cell)."""
+    if key is None:
+        return None
+    idx, val = key
+    if idx < 0:
+        return val
+    return strings[idx] if idx < len(strings) else None
+
+
+def _typed(value):
+    """A value as a set/dict key that keeps TRUE apart from 1 (True == 1)."""
+    return (type(value) is bool, value)
+
+
+class _ColumnStats:
+    """Running aggregates of one column's cells for XlsxFile.aggregate()."""
+
+    __slots__ = ('count', 'numbers', 'total', 'low', 'high', 'text_low', 'text_high', 'keys')
+
+    def __init__(self, distinct):
+        self.count = self.numbers = self.total = 0
+        self.low = self.high = self.text_low = self.text_high = None
+        self.keys = set() if distinct else None
+
+    def add(self, key, strings, extremes):
+        self.count += 1
+        if self.keys is not None:
+            self.keys.add(key)
+        idx, val = key
+        if idx < 0 and type(val) in (int, float):
+            self.numbers += 1
+            self.total += val
+            if self.low is None or val < self.low:
+                self.low = val
+            if self.high is None or val > self.high:
+                self.high = val
+        elif extremes and not self.numbers and (idx >= 0 or isinstance(val, str)):
+            # Text (including ISO dates) only decides min/max of a column
+            # without numbers
+            text = _key_value(key, strings)
+            if text is None:
+                return
+            if self.text_low is None or text < self.text_low:
+                self.text_low = text
+            if self.text_high is None or text > self.text_high:
+                self.text_high = text
+
+    def merge(self, other):
+        self.count += other.count
+        self.numbers += other.numbers
+        self.total += other.total
+        for attr, pick in (('low', min), ('high', max), ('text_low', min), ('text_high', max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            if theirs is not None:
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+        if self.keys is not None:
+            self.keys |= other.keys
+
+    def summary(self, aggregates, strings):
+        numeric = self.numbers > 0
+        out = {}
+        for name in aggregates:
+            if name == 'count':
+                out['count'] = self.count
+            elif name == 'sum':
+                out['sum'] = self.total if numeric else None
+            elif name == 'mean':
+                out['mean'] = self.total / self.numbers if numeric else None
+            elif name == 'min':
+                out['min'] = self.low if numeric else self.text_low
+            elif name == 'max':
+                out['max'] = self.high if numeric else self.text_high
+            elif name == 'distinct':
+                out['distinct'] = len({_typed(_key_value(k, strings)) for k in self.keys})
+        if numeric and self.numbers != self.count:
+            out['numbers'] = self.numbers
+        return out
+
+
+def _text_matcher(query, match='contains', case_sensitive=False):
+    """Return a predicate over cell text for XlsxFile.find_cells().
+
+    Raises ValueError for an unknown match mode or an invalid regex.
+    """
+    if match == 'regex':
+        try:
+            pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+        return lambda text: pattern.search(text) is not None
+    if match not in ('exact', 'contains'):
+        raise ValueError(f"Unknown match mode: {match}")
+    if not case_sensitive:
+        query = query.casefold()
+        if match == 'exact':
+            return lambda text: text.casefold() == query
+        return lambda text: query in text.casefold()
+    if match == 'exact':
+        return lambda text: text == query
+    return lambda text: query in text
+
+
+def _cell_map(row_el):
+    """Index the <c> elements of a row by column number."""
+    cell_map = {}
+    for c_el in row_el.findall(_tag('c')):
+        try:
+            _, cc = parse_cell_ref(c_el.get('r', ''))
+            cell_map[cc] = c_el
+        except ValueError:
+            pass
+    return cell_map
+
+
+def _xml_name(qname, prefixes, attr=False):
+    """'{uri}local' -> 'prefix:local' using the part's root declarations.
+
+    Raises KeyError when the namespace has no usable prefix there.
+    """
+    if qname[0] != '{':
+        return qname
+    uri, local = qname[1:].split('}', 1)
+    p = prefixes[uri]
+    if not p:
+        if attr:
+            raise KeyError(uri)  # attributes can't use the default namespace
+        return local
+    return f'{p}:{local}'
+
+
+def _check_names(el, prefixes):
+    """Raise KeyError if _element_bytes() can't serialize an element."""
+    for e in el.iter():
+        if not isinstance(e.tag, str):
+            raise KeyError(e.tag)  # comment or processing instruction
+        _xml_name(e.tag, prefixes)
+        for k in e.attrib:
+            _xml_name(k, prefixes, attr=True)
+
+
+_XMLNS_ATTR_RE = re.compile(rb'\sxmlns(?::[\w.-]+)?="[^"]*"')
+_NEEDS_ESCAPE_RE = re.compile(r'[&<>\r"\n\t]')
+
+
+def _xml_escape(text, attr=False):
+    if not _NEEDS_ESCAPE_RE.search(text):
+        return text
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    text = text.replace('\r', '&#13;')
+    if attr:
+        text = text.replace('"', '&quot;').replace('\n', '&#10;').replace('\t', '&#9;')
+    return text
+
+
+def _si_xml(prefix, text, tag='si'):
+    """XML of a plain-text string item: <si> in sharedStrings.xml, or the <is>
+    of an inline string."""
+    space = ' xml:space="preserve"' if text and (text[0].isspace() or text[-1].isspace()) else ''
+    return f'<{prefix}{tag}><{prefix}t{space}>{_xml_escape(text)}</{prefix}t></{prefix}{tag}>'
+
+
+_SHARED_T_RE = re.compile(rb'\st="s"')
+_V_DIGITS_RE = re.compile(rb'\s*<(?:[\w.-]+:)?v>(\d+)</')
+_STYLE_ATTR_RE = re.compile(rb'\s(s|style)="(\d+)"')
+_TAG_NAME_RE = re.compile(rb'([\w.-]+:)?([\w.-]+)')
+
+
+def _owner_tag(data, pos):
+    """(prefix, local name) of the element whose start tag holds pos.
+
+    Attribute values and text can't contain a raw '<', so the last one
+    before pos opens that tag; a match in text content resolves to the
+    enclosing element instead.
+    """
+    m = _TAG_NAME_RE.match(data, data.rfind(b'<', 0, pos) + 1)
+    return (m.group(1) or b'', m.group(2)) if m else (b'', b'')
+
+
+def _iter_shared_refs(data):
+    """Yield (start, end, index) for the <v> digits of each shared-string
+    cell (t="s") in sheet XML."""
+    for m in _SHARED_T_RE.finditer(data):
+        p, name = _owner_tag(data, m.start())
+        if name != b'c':
+            continue
+        gt = data.find(b'>', m.end())
+        if data[gt - 1:gt] == b'/':
+            continue
+        v = _V_DIGITS_RE.match(data, gt + 1)
+        if v is None:
+            # <v> isn't the first child: look for it before the cell's end
+            close = data.find(b'</' + p + b'c>', gt)
+            v = _V_DIGITS_RE.search(data, gt + 1, close)
+            if v is None:
+                continue
+        yield v.start(1), v.end(1), int(v.group(1))
+
+
+def _iter_style_refs(data):
+    """Yield (start, end, index) for the cellXfs index of each cell (s),
+    row (s) and column (style) in sheet XML."""
+    for m in _STYLE_ATTR_RE.finditer(data):
+        name = _owner_tag(data, m.start())[1]
+        if name == (b'col' if m.group(1) == b'style' else b'c') or (
+                name == b'row' and m.group(1) == b's'):
+            yield m.start(2), m.end(2), int(m.group(2))
+
+
+def _style_key(el):
+    """Canonical form of a styles.xml record: equal keys, equal styles."""
+    return (el.tag, tuple(sorted(el.attrib.items())), (el.text or '').strip(),
+            tuple(_style_key(c) for c in el if isinstance(c.tag, str)))
+
+
+def _si_spans(data):
+    """(start, end) of each <si> item in sharedStrings.xml; None if the
+    part can't be scanned."""
+    m = re.search(rb'<([\w.-]+:)?sst(?=[\s/>])[^>]*>', bytes(data[:4096]))
+    if m is None or m.group(0).endswith(b'/>'):
+        return None
+    p = re.escape(m.group(1) or b'')
+    si_re = re.compile(rb'<' + p + rb'si(?:\s[^>]*)?(?:/>|>.*?</' + p + rb'si>)', re.S)
+    spans = [s.span() for s in si_re.finditer(data, m.end())]
+    return spans or None
+
+
+def _inline_columns(rows, width, strings):
+    """Offsets of the columns whose strings are written inline, for a
+    STRING_MODES mode; in 'auto' mode judged on rows."""
+    if strings not in STRING_MODES:
+        raise ValueError(f"Unknown strings mode '{strings}' (use {', '.join(STRING_MODES)})")
+    if strings == 'shared':
+        return frozenset()
+    if strings == 'inline':
+        return frozenset(range(width))
+    inline = set()
+    for i in range(width):
+        texts = [row[i] for row in rows if i < len(row) and row[i] is not None
+                 and not isinstance(row[i], (bool, int, float))
+                 and not (isinstance(row[i], str) and len(row[i]) > 1 and row[i][0] == '=')]
+        if texts and len(set(map(str, texts))) >= INLINE_UNIQUE_RATIO * len(texts):
+            inline.add(i)
+    return frozenset(inline)
+
+
+def _set_attr(tag, name, value):
+    """Set an attribute in the raw bytes of a start tag."""
+    value = value.encode('ascii')
+    pat = rb'(\s' + re.escape(name) + rb'=)"[^"]*"'
+    if re.search(pat, tag):
+        return re.sub(pat, lambda m: m.group(1) + b'"' + value + b'"', tag, count=1)
+    end = len(tag) - (2 if tag.endswith(b'/>') else 1)
+    return tag[:end].rstrip() + b' ' + name + b'="' + value + b'"' + tag[end:]
+
+
+def _element_bytes(el, prefixes, names):
+    """Serialize one element with the namespace prefixes of its part's root,
+    without the xmlns declarations a standalone serialization would add.
+
+    `names` memoizes qualified names across calls for the same part.
+    """
+    if _KEEPS_NS and el.getparent() is not None:
+        # Parsed from a fragment: lxml keeps the original prefixes, and the
+        # declarations it repeats from the wrapper can be dropped
+        raw = ET.tostring(el, encoding='UTF-8', with_tail=False)
+        gt = raw.index(b'>')
+        return _XMLNS_ATTR_RE.sub(b'', raw[:gt]) + raw[gt:]
+    out = []
+
+    def name_of(qname, attr=False):
+        name = names.get((qname, attr))
+        if name is None:
+            name = names[qname, attr] = _xml_name(qname, prefixes, attr)
+        return name
+
+    def walk(e):
+        name = name_of(e.tag)
+        out.append('<' + name)
+        for k, v in e.attrib.items():
+            out.append(f' {name_of(k, True)}="{_xml_escape(v, True)}"')
+        if e.text is None and len(e) == 0:
+            out.append('/>')
+            return
+        out.append('>')
+        if e.text:
+            out.append(_xml_escape(e.text))
+        for child in e:
+            walk(child)
+            if child.tail:
+                out.append(_xml_escape(child.tail))
+        out.append(f'</{name}>')
+
+    walk(el)
+    return ''.join(out).encode('utf-8')
+
+
+def _restyle_cols(cols_el, c1, c2, style, width):
+    """Give columns c1..c2 of a <cols> element the style style(old style).
+
+    <col> spans crossing c1 or c2 are split; columns not covered by any
+    <col> get new ones of the given width. Returns True (the element always
+    changes).
+    """
+    spans = []  # (min, max, col element) after splitting
+    for col in cols_el.findall(_tag('col')):
+        lo, hi = int(col.get('min')), int(col.get('max'))
+        for a, b in ((lo, min(hi, c1 - 1)), (max(lo, c1), min(hi, c2)), (max(lo, c2 + 1), hi)):
+            if a > b:
+                continue
+            part = copy.deepcopy(col) if (a, b) != (lo, hi) else col
+            part.set('min', str(a))
+            part.set('max', str(b))
+            if c1 <= a <= c2:
+                part.set('style', str(style(int(part.get('style', '0')))))
+            spans.append((a, b, part))
+
+    gaps, pos = [], c1
+    for a, b, _ in sorted(spans, key=lambda t: t[0]):
+        if b < c1 or a > c2:
+            continue
+        if a > pos:
+            gaps.append((pos, a - 1))
+        pos = max(pos, b + 1)
+    if pos <= c2:
+        gaps.append((pos, c2))
+    for a, b in gaps:
+        col = ET.SubElement(cols_el, _tag('col'))
+        col.set('min', str(a))
+        col.set('max', str(b))
+        col.set('width', width)
+        col.set('style', str(style(0)))
+        spans.append((a, b, col))
+
+    cols_el[:] = [col for _, _, col in sorted(spans, key=lambda t: t[0])]
+    return True
+
+
+def _put_in_order(parent, children):
+    """Re-append `children` ({row or column number: element}) in key order.
+
+    Excel requires rows and cells to appear in ascending order; elements
+    created for new rows/cells are appended at the end and moved here.
+    """
+    ordered = [children[k] for k in sorted(children)]
+    if ordered == list(children.values()):
+        return
+    members = set(ordered)
+    parent[:] = ordered + [el for el in parent if el not in members]
 
 
 def _inline_text(si_or_is_el):
@@ -1029,3 +3811,561 @@ def _inline_text(si_or_is_el):
         if t is not None and t.text:
             parts.append(t.text)
     return ''.join(parts) if parts else ''
+
+
+# ---------------------------------------------------------------------------
+# Row offset index and on-disk cache helpers
+# ---------------------------------------------------------------------------
+
+_SHEETDATA_RE = re.compile(rb'<(?:\w+:)?sheetData\b[^>]*>')
+_ROW_TAG_RE = re.compile(rb'<(?:\w+:)?row\b[^>]*>')
+_CELL_TAG_RE = re.compile(rb'<(?:\w+:)?c\b([^>]*)>')
+_R_ATTR_RE = re.compile(rb'\sr="(\d+)"')
+_SHARED_SI_RE = re.compile(rb'<(?:[\w.-]+:)?f\s[^>]*?\bsi="(\d+)"')
+_CELL_R_RE = re.compile(rb'\sr="([A-Z]+)(\d+)"')
+_T_ATTR_RE = re.compile(rb'\st="(\w+)"')
+_DIMENSION_REF_RE = re.compile(rb'<(?:[\w.-]+:)?dimension\s[^>]*?ref="([^"]*)"')
+_DATE1904_RE = re.compile(rb'<(?:[\w.-]+:)?workbookPr\s[^>]*?date1904="(?:1|true)"')
+_S_ATTR_RE = re.compile(rb'\ss="(\d+)"')
+_CUSTOM_FORMAT_RE = re.compile(rb'\scustomFormat="(?:1|true)"')
+
+
+def _cache_base():
+    return os.environ.get('EXCEL_MCP_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'excel-mcp')
+
+
+def _cache_dir(kind):
+    """Return (and create) the cache subdirectory for `kind`."""
+    path = os.path.join(_cache_base(), kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _touch(path):
+    """Mark a cache entry as recently used (eviction is by mtime)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            obj = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _touch(path)
+    return obj
+
+
+def _store_json(path, obj):
+    _store_cache(path, json.dumps(obj, separators=(',', ':')).encode('utf-8'))
+
+
+def _store_cache(path, data):
+    """Write a cache entry atomically, then enforce the size bound.
+
+    Readers either see the old file or the complete new one; mappings of a
+    replaced or evicted file stay valid on POSIX. Failures are not fatal.
+    """
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    _evict_cache()
+
+
+def _evict_cache():
+    """Delete least recently used cache files until under CACHE_MAX_BYTES."""
+    files = []
+    total = 0
+    for root, _, names in os.walk(_cache_base()):
+        for name in names:
+            p = os.path.join(root, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+    if total <= CACHE_MAX_BYTES:
+        return
+    # Evict down to 90% so that every store does not trigger another pass
+    target = CACHE_MAX_BYTES - CACHE_MAX_BYTES // 10
+    for _, size, p in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(p)
+            total -= size
+        except OSError:
+            pass
+
+
+# Packed cache formats (native byte order; the cache is per host).
+# Strings: magic, count, (count + 1) uint64 offsets, UTF-8 blob.
+# Cells: magic, count, float64 nums, uint32 rows/cols/styles, uint8 kinds,
+# padding to 8 bytes, then a string table for text values.
+_STR_MAGIC = b'XMCSTR01'
+_CELL_MAGIC = b'XMCCEL01'
+_K_NONE, _K_NUM, _K_SHARED, _K_BOOL, _K_TEXT = range(5)
+# Find index: magic, value count, cell count, (count + 1) uint64 offsets
+# into the cell arrays, uint32 rows and cols, then the sorted values.
+_FIND_MAGIC = b'XMCFND01'
+# JSON entries (compiled styles, date kinds, row and column styles) carry
+# their format version in the file name instead; bump it when one changes.
+_JSON_CACHE_VERSION = 'v1'
+
+
+def _pack_strings(strings):
+    blobs = [s.encode('utf-8') for s in strings]
+    offsets = array('Q', [0])
+    pos = 0
+    for b in blobs:
+        pos += len(b)
+        offsets.append(pos)
+    return b''.join([_STR_MAGIC, struct.pack('=Q', len(blobs)), offsets.tobytes()] + blobs)
+
+
+def _pack_cells(records, texts):
+    """Pack (row, col, style, kind, num) records sorted by row and column."""
+    rows, cols, styles = array('I'), array('I'), array('I')
+    kinds, nums = array('B'), array('d')
+    for rn, cn, s_idx, kind, num in records:
+        rows.append(rn)
+        cols.append(cn)
+        styles.append(s_idx)
+        kinds.append(kind)
+        nums.append(num)
+    n = len(records)
+    return b''.join([_CELL_MAGIC, struct.pack('=Q', n), nums.tobytes(),
+                     rows.tobytes(), cols.tobytes(), styles.tobytes(),
+                     kinds.tobytes(), b'\0' * (-n % 8), _pack_strings(texts)])
+
+
+def _pack_find_index(entries):
+    """Pack (text, [(row, col), ...]) entries sorted by text."""
+    offsets, rows, cols = array('Q', [0]), array('I'), array('I')
+    for _, cells in entries:
+        for rn, cn in cells:
+            rows.append(rn)
+            cols.append(cn)
+        offsets.append(len(rows))
+    return b''.join([_FIND_MAGIC, struct.pack('=QQ', len(entries), len(rows)),
+                     offsets.tobytes(), rows.tobytes(), cols.tobytes(),
+                     _pack_strings([text for text, _ in entries])])
+
+
+class _MappedStrings:
+    """Read-only string table over a packed buffer; decodes on access."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """Return a table over `buf`, or None if it is not a valid one."""
+        if len(buf) < 16 or bytes(buf[:8]) != _STR_MAGIC:
+            return None
+        n = struct.unpack_from('=Q', buf, 8)[0]
+        end = 16 + 8 * (n + 1)
+        if len(buf) < end:
+            return None
+        offsets = buf[16:end].cast('Q')
+        if len(buf) != end + offsets[n]:
+            return None
+        return cls(offsets, buf[end:])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0 or i >= len(self._offsets) - 1:
+            raise IndexError(i)
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _MappedCells:
+    """Row-sorted compact cell arrays of one sheet over a packed buffer."""
+
+    def __init__(self, rows, cols, styles, kinds, nums, texts):
+        self.rows = rows
+        self.cols = cols
+        self.styles = styles
+        self.kinds = kinds
+        self.nums = nums
+        self.texts = texts
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """Return cell arrays over `buf`, or None if it is not valid."""
+        if len(buf) < 16 or bytes(buf[:8]) != _CELL_MAGIC:
+            return None
+        n = struct.unpack_from('=Q', buf, 8)[0]
+        pos = 16
+        if len(buf) < pos + 21 * n:
+            return None
+        nums = buf[pos:pos + 8 * n].cast('d')
+        pos += 8 * n
+        rows = buf[pos:pos + 4 * n].cast('I')
+        pos += 4 * n
+        cols = buf[pos:pos + 4 * n].cast('I')
+        pos += 4 * n
+        styles = buf[pos:pos + 4 * n].cast('I')
+        pos += 4 * n
+        kinds = buf[pos:pos + n]
+        pos += n + (-n % 8)
+        texts = _MappedStrings.from_buffer(buf[pos:])
+        if texts is None:
+            return None
+        return cls(rows, cols, styles, kinds, nums, texts)
+
+
+class _MappedFindIndex:
+    """Sorted cell texts of one sheet, each with the cells holding it."""
+
+    def __init__(self, values, offsets, rows, cols):
+        self.values = values
+        self._offsets = offsets
+        self._rows = rows
+        self._cols = cols
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """Return an index over `buf`, or None if it is not a valid one."""
+        if len(buf) < 24 or bytes(buf[:8]) != _FIND_MAGIC:
+            return None
+        n, m = struct.unpack_from('=QQ', buf, 8)
+        pos = 24
+        if len(buf) < pos + 8 * (n + 1) + 8 * m:
+            return None
+        offsets = buf[pos:pos + 8 * (n + 1)].cast('Q')
+        pos += 8 * (n + 1)
+        rows = buf[pos:pos + 4 * m].cast('I')
+        pos += 4 * m
+        cols = buf[pos:pos + 4 * m].cast('I')
+        pos += 4 * m
+        values = _MappedStrings.from_buffer(buf[pos:])
+        if values is None or len(values) != n:
+            return None
+        return cls(values, offsets, rows, cols)
+
+    def cells(self, i):
+        """Yield the (row, col) of every cell holding values[i]."""
+        for j in range(self._offsets[i], self._offsets[i + 1]):
+            yield self._rows[j], self._cols[j]
+
+
+def _build_row_index(data):
+    """Scan raw sheet XML for row block offsets, used range and column types.
+
+    Returns None if any row lacks an explicit r attribute or rows are not
+    in ascending order.
+    """
+    m = _SHEETDATA_RE.search(data)
+    if not m or m.group(0).endswith(b'/>'):
+        return {"block": ROW_BLOCK, "rows": [], "end": 0,
+                "usedRange": None, "columns": {}}
+    start = m.end()
+    end = data.rfind(b'</', start, data.rfind(b'sheetData>'))
+
+    rows = []
+    prev = 0
+    for n, rm in enumerate(_ROW_TAG_RE.finditer(data, start, end)):
+        r = _R_ATTR_RE.search(rm.group(0))
+        if r is None:
+            return None
+        rn = int(r.group(1))
+        if rn <= prev:
+            return None  # out-of-order rows cannot be bisected
+        prev = rn
+        if n % ROW_BLOCK == 0:
+            rows.append([rn, rm.start()])
+
+    # Per-column type counts and the true used range (rows are ascending,
+    # so the first and last non-empty cells bound the row span)
+    columns = {}
+    first_r = last_r = None
+    for cm in _CELL_TAG_RE.finditer(data, start, end):
+        attrs = cm.group(1)
+        ref = _CELL_R_RE.search(attrs)
+        if ref is None:
+            continue
+        col = ref.group(1).decode('ascii')
+        t = _T_ATTR_RE.search(attrs)
+        # Self-closing cells carry only a style and hold no value
+        kind = t.group(1).decode('ascii') if t else (
+            'empty' if attrs.endswith(b'/') else 'n')
+        counts = columns.setdefault(col, {})
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind != 'empty':
+            if first_r is None:
+                first_r = ref.group(2)
+            last_r = ref.group(2)
+
+    used = None
+    value_cols = [col_to_num(c) for c, counts in columns.items()
+                  if any(k != 'empty' for k in counts)]
+    if first_r is not None and value_cols:
+        used = (f'{cell_ref(int(first_r), min(value_cols))}:'
+                f'{cell_ref(int(last_r), max(value_cols))}')
+    return {"block": ROW_BLOCK, "rows": rows, "end": end,
+            "usedRange": used, "columns": columns}
+
+
+# ---------------------------------------------------------------------------
+# ZIP member storage
+# ---------------------------------------------------------------------------
+
+class _EntryStore:
+    """Lazily inflated ZIP members of one archive, keyed by member name.
+
+    The archive is memory-mapped and a member is inflated on first access.
+    Large parts (see SPILL_MIN_BYTES and MAX_MEMORY_BYTES) are inflated
+    into a temporary file and returned as a read-only mmap; everything
+    else is returned as bytes. Members that were never replaced can be
+    copied to a new archive in compressed form with write_raw().
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            with zipfile.ZipFile(self._file) as z:
+                infos = z.infolist()
+        except Exception:
+            self._file.close()
+            raise
+        self.infos = {info.filename: info for info in infos}
+        self._order = dict.fromkeys(self.infos)  # member order for save
+        self._data = {}        # name -> bytes or mmap, inflated or replaced
+        self._replaced = set()
+        self._spills = []      # (mmap, temp file) pairs
+        self._heap = 0
+        self._lock = threading.Lock()  # guards self._file for zipfile reads
+
+    def names(self):
+        return list(self._order)
+
+    def is_pristine(self, name):
+        return name in self.infos and name not in self._replaced
+
+    def __contains__(self, name):
+        return name in self._order
+
+    def __getitem__(self, name):
+        data = self._data.get(name)
+        if data is None:
+            if name not in self._order or name in self._replaced:
+                raise KeyError(name)
+            info = self.infos[name]
+            data = self._data[name] = self._inflate(info, self._reserve(info))
+        return data
+
+    def prefetch(self, names):
+        """Inflate several members at once, on up to INFLATE_WORKERS threads.
+
+        Members already inflated, replaced or absent are skipped. Whether a
+        member spills is decided up front in the given order, so the store
+        ends up as if the members had been accessed one by one.
+        """
+        infos = [self.infos[n] for n in dict.fromkeys(names)
+                 if self.is_pristine(n) and n not in self._data]
+        plans = [(info, self._reserve(info)) for info in infos]
+        workers = min(INFLATE_WORKERS, len(plans))
+        if workers <= 1 or sum(i.compress_size for i in infos) < PARALLEL_INFLATE_MIN_BYTES:
+            results = [self._inflate(info, spill) for info, spill in plans]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda plan: self._inflate(*plan), plans))
+        for info, data in zip(infos, results):
+            self._data[info.filename] = data
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __setitem__(self, name, data):
+        self._forget(name)
+        self._data[name] = data
+        self._heap += len(data)
+        self._replaced.add(name)
+        self._order.setdefault(name)
+
+    def replace_with_file(self, name, f):
+        """Replace a member with the contents of a temporary file.
+
+        Large contents stay in the file, memory-mapped, off the heap.
+        """
+        f.flush()
+        size = f.seek(0, os.SEEK_END)
+        if size < SPILL_MIN_BYTES and self._heap + size <= MAX_MEMORY_BYTES:
+            f.seek(0)
+            data = f.read()
+            f.close()
+            self[name] = data
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._spills.append((mm, f))
+        self._forget(name)
+        self._data[name] = mm
+        self._replaced.add(name)
+        self._order.setdefault(name)
+
+    def __delitem__(self, name):
+        if name not in self._order:
+            raise KeyError(name)
+        self._forget(name)
+        self._replaced.add(name)
+        del self._order[name]
+
+    def _forget(self, name):
+        old = self._data.pop(name, None)
+        if isinstance(old, bytes):
+            self._heap -= len(old)
+
+    def digest(self, name):
+        """SHA-1 (hex, truncated) of a member's compression method, size
+        and stored bytes; equal digests mean equal contents."""
+        info = self.infos[name]
+        h = hashlib.sha1(f'{info.compress_type}:{info.file_size}:'.encode('ascii'))
+        raw = self._raw(info)
+        try:
+            h.update(raw)
+        finally:
+            raw.release()
+        return h.hexdigest()[:24]
+
+    def _raw(self, info):
+        """Compressed bytes of a member, as a view into the archive mapping."""
+        off = info.header_offset
+        if self._map[off:off + 4] != b'PK\x03\x04':
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        name_len, extra_len = struct.unpack_from('<HH', self._map, off + 26)
+        start = off + 30 + name_len + extra_len
+        return memoryview(self._map)[start:start + info.compress_size]
+
+    @staticmethod
+    def _via_zipfile(info):
+        # Encrypted or unusual compression: left to zipfile
+        return bool(info.flag_bits & 0x1) or info.compress_type not in (
+            zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+    def _reserve(self, info):
+        """Decide whether a member spills; if not, count it against the heap."""
+        spill = not self._via_zipfile(info) and (
+            info.file_size >= SPILL_MIN_BYTES
+            or self._heap + info.file_size > MAX_MEMORY_BYTES)
+        if not spill:
+            self._heap += info.file_size
+        return spill
+
+    def _inflate(self, info, spill):
+        """Inflate a member as planned by _reserve(); safe on worker threads."""
+        if self._via_zipfile(info):
+            with self._lock, zipfile.ZipFile(self._file) as z:
+                return z.read(info.filename)
+
+        raw = self._raw(info)
+        try:
+            if not spill:
+                if info.compress_type == zipfile.ZIP_STORED:
+                    data = bytes(raw)
+                else:
+                    data = zlib.decompress(raw, -15)
+                _check_crc(info, zlib.crc32(data))
+                return data
+            return self._spill(info, raw)
+        finally:
+            raw.release()
+
+    def _spill(self, info, raw):
+        tmp = tempfile.TemporaryFile(prefix='excel-mcp-')
+        crc = 0
+        inflater = zlib.decompressobj(-15) if info.compress_type == zipfile.ZIP_DEFLATED else None
+        try:
+            for i in range(0, len(raw), _FEED_CHUNK):
+                chunk = raw[i:i + _FEED_CHUNK]
+                out = inflater.decompress(chunk) if inflater else bytes(chunk)
+                crc = zlib.crc32(out, crc)
+                tmp.write(out)
+            if inflater:
+                out = inflater.flush()
+                crc = zlib.crc32(out, crc)
+                tmp.write(out)
+            _check_crc(info, crc)
+            tmp.flush()
+            if info.file_size == 0:
+                tmp.close()
+                return b''
+            mm = mmap.mmap(tmp.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            tmp.close()
+            raise
+        self._spills.append((mm, tmp))
+        return mm
+
+    def write_raw(self, zout, name):
+        """Copy a pristine member's compressed bytes into zout as-is.
+
+        zipfile has no public API for this, so the local header is written
+        through zout.fp and the member is registered the way
+        ZipFile.writestr does it (filelist, NameToInfo, start_dir).
+        """
+        src = self.infos[name]
+        info = zipfile.ZipInfo(name, src.date_time)
+        info.compress_type = src.compress_type
+        info.CRC = src.CRC
+        info.compress_size = src.compress_size
+        info.file_size = src.file_size
+        # Sizes go in the local header, not in a trailing data descriptor
+        info.flag_bits = src.flag_bits & ~0x08
+        info.create_system = src.create_system
+        info.external_attr = src.external_attr
+        raw = self._raw(src)
+        try:
+            info.header_offset = zout.fp.tell()
+            zout.fp.write(info.FileHeader())
+            zout.fp.write(raw)
+        finally:
+            raw.release()
+        zout.filelist.append(info)
+        zout.NameToInfo[name] = info
+        zout.start_dir = zout.fp.tell()
+
+    def close(self):
+        self._data.clear()
+        self._heap = 0
+        for mm, tmp in self._spills:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # still referenced; released with its last view
+            tmp.close()
+        self._spills.clear()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+def _check_crc(info, crc):
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
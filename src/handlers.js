@@ -1,19 +1,67 @@
 import { spawn } from 'child_process';
+import { statSync } from 'fs';
 import { join } from 'path';
 import { schemas } from './tools.js';
 
+// Read-ahead for sequential page-by-page reads in path mode
+const READ_AHEAD_WINDOWS = 2;
+const READ_AHEAD_MAX_ENTRIES = 8;
+
+// JSON payloads larger than this go to the script on stdin instead of argv
+// (Windows caps a whole command line at 32K characters)
+const ARGV_PAYLOAD_MAX = 8 * 1024;
+
+function colToNum(col) {
+  let n = 0;
+  for (const ch of col) n = n * 26 + (ch.charCodeAt(0) - 64);
+  return n;
+}
+
+function numToCol(n) {
+  let s = '';
+  while (n > 0) {
+    const rem = (n - 1) % 26;
+    s = String.fromCharCode(65 + rem) + s;
+    n = Math.floor((n - 1) / 26);
+  }
+  return s;
+}
+
+function parseRange(range) {
+  // 'A1:J50' or 'A1' -> { c1, r1, c2, r2 }, or null for other forms
+  const m = /^([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$/.exec(range.replace(/\$/g, '').toUpperCase());
+  if (!m) return null;
+  const c1 = colToNum(m[1]), r1 = Number(m[2]);
+  const c2 = m[3] ? colToNum(m[3]) : c1, r2 = m[4] ? Number(m[4]) : r1;
+  return { c1, r1, c2, r2 };
+}
+
+function fileStamp(path) {
+  try {
+    const st = statSync(path);
+    return `${st.mtimeMs}:${st.size}`;
+  } catch {
+    return null;
+  }
+}
+
 export class ToolHandlers {
   constructor(scriptsPath) {
     this.scriptsPath = scriptsPath;
+    this._lastRead = new Map();   // path\0sheet\0flags -> last range read
+    this._readAhead = new Map();  // path\0sheet\0flags\0range -> { stamp, promise }
   }
 
-  _run(scriptName, args = [], timeout = 30000) {
+  _run(scriptName, args = [], timeout = 30000, input = null) {
     return new Promise((resolve) => {
       const scriptPath = join(this.scriptsPath, scriptName);
       const pythonCmd = process.env.EXCEL_MCP_PYTHON || 'python';
       const python = spawn(pythonCmd, [scriptPath, ...args], {
         env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
       });
+      // A script that exits early closes the pipe; its output reports why
+      python.stdin.on('error', () => {});
+      python.stdin.end(input ?? undefined);
 
       let output = '';
       let error = '';
@@ -51,6 +99,12 @@ export class ToolHandlers {
     });
   }
 
+  _payload(flag, json) {
+    // [args, stdin] for a JSON payload: inline when small, else on stdin
+    if (json.length <= ARGV_PAYLOAD_MAX) return [[flag, json], null];
+    return [[`${flag}-stdin`], json];
+  }
+
   _target(v) {
     // Build --workbook or --path args from validated input
     const a = [];
@@ -63,28 +117,169 @@ export class ToolHandlers {
     return this._run('excel_info.py');
   }
 
+  async getFileInfo(args) {
+    const v = schemas.getFileInfo.parse(args);
+    return this._run('get_file_info.py', ['--path', v.path]);
+  }
+
   async readCells(args) {
     const v = schemas.readCells.parse(args);
-    const a = [...this._target(v), '--range', v.range];
-    if (v.sheet) a.push('--sheet', v.sheet);
-    if (v.formats) a.push('--formats');
-    if (v.valuesOnly) a.push('--values-only');
-    return this._run('read_cells.py', a);
+    const readArgs = (range) => {
+      const a = [...this._target(v), '--range', range];
+      if (v.sheet) a.push('--sheet', v.sheet);
+      if (v.formats) a.push('--formats');
+      if (v.formats && v.groupFormats) a.push('--group-formats');
+      if (v.valuesOnly) a.push('--values-only');
+      return a;
+    };
+
+    if (v.output) {
+      const a = [...readArgs(v.range), '--output', v.output];
+      if (v.header) a.push('--header');
+      return this._run('read_cells.py', a, 600000);
+    }
+
+    if (v.filter) {
+      const a = [...readArgs(v.range), '--filter', v.filter];
+      if (v.header) a.push('--header');
+      if (v.ifNoneMatch) a.push('--if-none-match', v.ifNoneMatch);
+      return this._run('read_cells.py', a, 600000);
+    }
+
+    if (!v.path || v.ifNoneMatch) {
+      const a = readArgs(v.range);
+      if (v.ifNoneMatch) a.push('--if-none-match', v.ifNoneMatch);
+      return this._run('read_cells.py', a);
+    }
+
+    const seq = [v.path, v.sheet || '', v.formats ? (v.groupFormats ? 'g' : 'f') : ''].join('\0');
+    const range = v.range.replace(/\$/g, '').toUpperCase();
+    const hit = this._takeReadAhead(`${seq}\0${range}`, v.path);
+    const result = hit || this._run('read_cells.py', readArgs(v.range));
+
+    // Sequential access: same columns and height, starting right after the
+    // previous window. Prefetch the next windows while this one returns.
+    const cur = parseRange(range);
+    const last = this._lastRead.get(seq);
+    this._lastRead.delete(seq);
+    if (cur) this._lastRead.set(seq, cur);
+    if (this._lastRead.size > READ_AHEAD_MAX_ENTRIES) {
+      this._lastRead.delete(this._lastRead.keys().next().value);
+    }
+    if (cur && last && cur.c1 === last.c1 && cur.c2 === last.c2 &&
+        cur.r1 === last.r2 + 1 && cur.r2 - cur.r1 === last.r2 - last.r1) {
+      const h = cur.r2 - cur.r1 + 1;
+      for (let k = 1; k <= READ_AHEAD_WINDOWS; k++) {
+        const r1 = cur.r1 + k * h;
+        const next = `${numToCol(cur.c1)}${r1}:${numToCol(cur.c2)}${r1 + h - 1}`;
+        this._prefetch(`${seq}\0${next}`, v.path, readArgs(next));
+      }
+    }
+    return result;
+  }
+
+  _prefetch(key, path, args) {
+    if (this._readAhead.has(key)) return;
+    // Stamp before spawning: a write that lands during the read changes it
+    const stamp = fileStamp(path);
+    if (stamp === null) return;
+    this._readAhead.set(key, { path, stamp, promise: this._run('read_cells.py', args) });
+    while (this._readAhead.size > READ_AHEAD_MAX_ENTRIES) {
+      this._readAhead.delete(this._readAhead.keys().next().value);
+    }
+  }
+
+  _takeReadAhead(key, path) {
+    const entry = this._readAhead.get(key);
+    if (!entry) return null;
+    this._readAhead.delete(key);
+    return entry.stamp === fileStamp(path) ? entry.promise : null;
+  }
+
+  _invalidateReadAhead(path) {
+    if (!path) return;
+    for (const [key, entry] of this._readAhead) {
+      if (entry.path === path) this._readAhead.delete(key);
+    }
   }
 
   async writeCells(args) {
     const v = schemas.writeCells.parse(args);
-    const valueStr = typeof v.value === 'object' ? JSON.stringify(v.value) : String(v.value);
-    const a = [...this._target(v), '--range', v.range, '--value', valueStr];
+    this._invalidateReadAhead(v.path);
+    // Sent as JSON either way, so "123" stays text and 123 a number
+    const [payload, input] = this._payload('--value', JSON.stringify(v.value));
+    const a = [...this._target(v), '--range', v.range, ...payload];
     if (v.sheet) a.push('--sheet', v.sheet);
-    return this._run('write_cells.py', a, 60000);
+    if (v.strings) a.push('--strings', v.strings);
+    if (v.compactStrings) a.push('--compact-strings');
+    return this._run('write_cells.py', a, 60000, input);
   }
 
   async formatCells(args) {
     const v = schemas.formatCells.parse(args);
-    const a = [...this._target(v), '--range', v.range, '--format', JSON.stringify(v.format)];
+    this._invalidateReadAhead(v.path);
+    const [payload, input] = this._payload('--format', JSON.stringify(v.format));
+    const a = [...this._target(v), '--range', v.range, ...payload];
+    if (v.sheet) a.push('--sheet', v.sheet);
+    if (v.compactStyles) a.push('--compact-styles');
+    return this._run('format_cells.py', a, 30000, input);
+  }
+
+  async appendRows(args) {
+    const v = schemas.appendRows.parse(args);
+    this._invalidateReadAhead(v.path);
+    const [payload, input] = this._payload('--values', JSON.stringify(v.values));
+    const a = [...this._target(v), ...payload];
+    if (v.sheet) a.push('--sheet', v.sheet);
+    if (v.column) a.push('--column', v.column);
+    if (v.strings) a.push('--strings', v.strings);
+    return this._run('append_rows.py', a, 60000, input);
+  }
+
+  async aggregateCells(args) {
+    const v = schemas.aggregateCells.parse(args);
+    const a = ['--path', v.path];
+    if (v.sheet) a.push('--sheet', v.sheet);
+    if (v.range) a.push('--range', v.range);
+    if (v.columns) a.push('--columns', JSON.stringify(v.columns));
+    if (v.groupBy) a.push('--group-by', JSON.stringify(v.groupBy));
+    if (v.aggregates) a.push('--aggregates', v.aggregates.join(','));
+    if (v.header) a.push('--header');
+    if (v.filter) a.push('--filter', v.filter);
+    if (v.maxGroups) a.push('--max-groups', String(v.maxGroups));
+    return this._run('aggregate_cells.py', a, 600000);
+  }
+
+  async findCells(args) {
+    const v = schemas.findCells.parse(args);
+    const a = ['--path', v.path, '--query', v.query];
+    if (v.match) a.push('--match', v.match);
+    if (v.caseSensitive) a.push('--case-sensitive');
+    for (const sheet of v.sheets || []) a.push('--sheet', sheet);
+    if (v.index) a.push('--index');
+    if (v.limit) a.push('--limit', String(v.limit));
+    return this._run('find_cells.py', a, 600000);
+  }
+
+  async exportSheet(args) {
+    const v = schemas.exportSheet.parse(args);
+    const a = ['--path', v.path, '--output', v.output];
+    if (v.sheet) a.push('--sheet', v.sheet);
+    if (v.range) a.push('--range', v.range);
+    if (v.delimiter) a.push('--delimiter', v.delimiter);
+    return this._run('export_sheet.py', a, 600000);
+  }
+
+  async importSheet(args) {
+    const v = schemas.importSheet.parse(args);
+    this._invalidateReadAhead(v.path);
+    const a = ['--path', v.path, '--input', v.input];
     if (v.sheet) a.push('--sheet', v.sheet);
-    return this._run('format_cells.py', a);
+    if (v.start) a.push('--start', v.start);
+    if (v.delimiter) a.push('--delimiter', v.delimiter);
+    if (v.strings) a.push('--strings', v.strings);
+    if (v.compactStrings) a.push('--compact-strings');
+    return this._run('import_sheet.py', a, 600000);
   }
 
   async executeVba(args) {
@@ -24,9 +24,15 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
   const { name, arguments: args } = request.params;
   switch (name) {
     case 'get_excel_info':  return handlers.getExcelInfo();
+    case 'get_file_info':   return handlers.getFileInfo(args);
     case 'read_cells':      return handlers.readCells(args);
+    case 'aggregate_cells': return handlers.aggregateCells(args);
+    case 'find_cells':      return handlers.findCells(args);
     case 'write_cells':     return handlers.writeCells(args);
     case 'format_cells':    return handlers.formatCells(args);
+    case 'append_rows':     return handlers.appendRows(args);
+    case 'export_sheet':    return handlers.exportSheet(args);
+    case 'import_sheet':    return handlers.importSheet(args);
     case 'execute_vba':     return handlers.executeVba(args);
     default: throw new Error(`Unknown tool: ${name}`);
   }
@@ -7,21 +7,76 @@ export const schemas = {
     range: z.string(),
     sheet: z.string().optional(),
     formats: z.boolean().optional(),
-    valuesOnly: z.boolean().optional()
+    groupFormats: z.boolean().optional(),
+    valuesOnly: z.boolean().optional(),
+    ifNoneMatch: z.string().optional(),
+    output: z.string().optional(),
+    header: z.boolean().optional(),
+    filter: z.string().optional()
   }),
   writeCells: z.object({
     workbook: z.string().optional(),
     path: z.string().optional(),
     range: z.string(),
     value: z.union([z.string(), z.number(), z.boolean(), z.array(z.any())]),
-    sheet: z.string().optional()
+    sheet: z.string().optional(),
+    strings: z.enum(['shared', 'inline', 'auto']).optional(),
+    compactStrings: z.boolean().optional()
   }),
   formatCells: z.object({
     workbook: z.string().optional(),
     path: z.string().optional(),
     range: z.string(),
     format: z.record(z.any()),
-    sheet: z.string().optional()
+    sheet: z.string().optional(),
+    compactStyles: z.boolean().optional()
+  }),
+  appendRows: z.object({
+    workbook: z.string().optional(),
+    path: z.string().optional(),
+    values: z.array(z.any()),
+    sheet: z.string().optional(),
+    column: z.string().optional(),
+    strings: z.enum(['shared', 'inline', 'auto']).optional()
+  }),
+  exportSheet: z.object({
+    path: z.string(),
+    output: z.string(),
+    sheet: z.string().optional(),
+    range: z.string().optional(),
+    delimiter: z.enum(['comma', 'tab', 'semicolon']).optional()
+  }),
+  importSheet: z.object({
+    path: z.string(),
+    input: z.string(),
+    sheet: z.string().optional(),
+    start: z.string().optional(),
+    delimiter: z.enum(['comma', 'tab', 'semicolon']).optional(),
+    strings: z.enum(['shared', 'inline', 'auto']).optional(),
+    compactStrings: z.boolean().optional()
+  }),
+  getFileInfo: z.object({
+    path: z.string()
+  }),
+  aggregateCells: z.object({
+    path: z.string(),
+    sheet: z.string().optional(),
+    range: z.string().optional(),
+    columns: z.array(z.string()).optional(),
+    groupBy: z.array(z.string()).optional(),
+    aggregates: z.array(z.enum(['count', 'sum', 'mean', 'min', 'max', 'distinct'])).optional(),
+    header: z.boolean().optional(),
+    filter: z.string().optional(),
+    maxGroups: z.number().int().positive().optional()
+  }),
+  findCells: z.object({
+    path: z.string(),
+    query: z.string().min(1),
+    match: z.enum(['contains', 'exact', 'regex']).optional(),
+    caseSensitive: z.boolean().optional(),
+    sheets: z.array(z.string()).optional(),
+    index: z.boolean().optional(),
+    limit: z.number().int().positive().optional()
   }),
   executeVba: z.object({
     workbook: z.string(),
@@ -40,9 +95,20 @@ export const toolDefinitions = [
       required: []
     }
   },
+  {
+    name: 'get_file_info',
+    description: 'Describe a .xlsx file on disk without loading its cells: sheet names and visibility, used range of each sheet, part sizes, tables and defined names. Reads only the ZIP directory and small metadata parts, so it returns in milliseconds even for very large workbooks; use it to find ranges before read_cells.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        path: { type: 'string', description: 'File path to .xlsx' }
+      },
+      required: ['path']
+    }
+  },
   {
     name: 'read_cells',
-    description: 'Read cell formulas/values from a range. By default returns formulas where they exist. Use "workbook" for an open Excel workbook, or "path" for a .xlsx file on disk (no Excel needed, preserves images/charts). Set valuesOnly=true to get calculated values instead of formulas. Set formats=true to include formatting details.',
+    description: 'Read cell formulas/values from a range. By default returns formulas where they exist. Use "workbook" for an open Excel workbook, or "path" for a .xlsx file on disk (no Excel needed, preserves images/charts). Set valuesOnly=true to get calculated values instead of formulas. Dates and times are returned as ISO 8601 text. Set formats=true to include formatting details; add groupFormats=true to get one entry per rectangle of equally formatted cells ({"range": "A2:F500", ...}) instead of one per cell. Every result carries an "etag"; pass it back as ifNoneMatch to get a small {"notModified": true} reply when the range is unchanged. In path mode, set output to a .arrow (Arrow IPC), .npy or .npz file to write the range there as typed columns; only the file path and column schema are returned. In path mode, set filter to an expression such as \'Status == "Open" and Amount > 10000\' to get only the matching rows and their row numbers; columns are letters or, with header=true, names from the first row.',
     inputSchema: {
       type: 'object',
       properties: {
@@ -51,14 +117,55 @@ export const toolDefinitions = [
         range: { type: 'string', description: 'Cell range (e.g. "A1" or "A1:C10")' },
         sheet: { type: 'string', description: 'Sheet name (default: active sheet)' },
         formats: { type: 'boolean', description: 'Include cell formatting (default: false)' },
-        valuesOnly: { type: 'boolean', description: 'Return calculated values instead of formulas (default: false, returns formulas)' }
+        groupFormats: { type: 'boolean', description: 'With formats: merge equally formatted cells into rectangles (default: false)' },
+        valuesOnly: { type: 'boolean', description: 'Return calculated values instead of formulas (default: false, returns formulas)' },
+        ifNoneMatch: { type: 'string', description: 'etag from a previous read_cells result; skips the read if nothing changed' },
+        output: { type: 'string', description: 'Path mode: write the range to this .arrow/.npy/.npz file instead of returning values (needs pyarrow or numpy)' },
+        header: { type: 'boolean', description: 'With output or filter: use the first row as column names (default: column letters)' },
+        filter: { type: 'string', description: 'Path mode: only return rows matching this expression. Operators: == != < <= > >= in [..] ~ (regex) and or not; values are numbers, "text", true, false, null (an empty cell; rows with no cell in range are never returned)' }
       },
       required: ['range']
     }
   },
+  {
+    name: 'aggregate_cells',
+    description: 'Summarize columns of a sheet in a .xlsx file on disk without returning its cells: count, sum, mean, min, max and distinct count, overall or per group of equal values in the groupBy columns. The sheet is read once in the file engine and only the summary is returned. Columns are letters or, with header=true, names from the first row. Min/max of a column without numbers compare text, so ISO dates work.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        path: { type: 'string', description: 'File path to .xlsx' },
+        sheet: { type: 'string', description: 'Sheet name (default: first sheet)' },
+        range: { type: 'string', description: 'Range to summarize (default: the used range)' },
+        columns: { type: 'array', items: { type: 'string' }, description: 'Columns to aggregate (e.g. ["D", "E"] or ["Amount"])' },
+        groupBy: { type: 'array', items: { type: 'string' }, description: 'Columns whose values form the groups (e.g. ["Region"])' },
+        aggregates: { type: 'array', items: { type: 'string', enum: ['count', 'sum', 'mean', 'min', 'max', 'distinct'] }, description: 'Aggregates to compute (default: count, sum, mean, min, max)' },
+        header: { type: 'boolean', description: 'Use the first row as column names and skip it (default: false)' },
+        filter: { type: 'string', description: 'Only aggregate rows matching this expression, as in read_cells' },
+        maxGroups: { type: 'number', description: 'Return at most this many groups (default: 1000)' }
+      },
+      required: ['path']
+    }
+  },
+  {
+    name: 'find_cells',
+    description: 'Find the cells of a .xlsx file on disk whose text matches a query, across all sheets (or the given ones), and return their addresses. Cells are compared as text: numbers as written, TRUE/FALSE, dates as ISO 8601. Set index=true when searching the same file repeatedly: a value-to-cells index is built on the first search and cached until the file changes, so later searches return almost immediately.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        path: { type: 'string', description: 'File path to .xlsx' },
+        query: { type: 'string', description: 'Text to look for (a regular expression with match="regex")' },
+        match: { type: 'string', enum: ['contains', 'exact', 'regex'], description: 'How cell text is compared with query (default: contains)' },
+        caseSensitive: { type: 'boolean', description: 'Match case (default: false)' },
+        sheets: { type: 'array', items: { type: 'string' }, description: 'Sheets to search (default: all)' },
+        index: { type: 'boolean', description: 'Search through a cached inverted index, built on first use (default: false)' },
+        limit: { type: 'number', description: 'Return at most this many matches; all are counted (default: 1000)' }
+      },
+      required: ['path', 'query']
+    }
+  },
   {
     name: 'write_cells',
-    description: 'Write values to a cell or range. Use "workbook" for live Excel, or "path" for a .xlsx file on disk (no Excel needed, preserves images/charts). Accepts a single value, a flat array, or a 2D array.',
+    description: 'Write values to a cell or range. Use "workbook" for live Excel, or "path" for a .xlsx file on disk (no Excel needed, preserves images/charts). Accepts a single value, a flat array, or a 2D array; values keep their JSON type (the string "123" is written as text, the number 123 as a number). Strings starting with "=" are formulas; a single formula written to a range is filled down/across with its relative references shifted, as in Excel (in path mode it is stored once as a shared formula).',
     inputSchema: {
       type: 'object',
       properties: {
@@ -69,7 +176,9 @@ export const toolDefinitions = [
           oneOf: [{ type: 'string' }, { type: 'number' }, { type: 'boolean' }, { type: 'array' }],
           description: 'Value(s) to write'
         },
-        sheet: { type: 'string', description: 'Sheet name (default: active sheet)' }
+        sheet: { type: 'string', description: 'Sheet name (default: active sheet)' },
+        strings: { type: 'string', enum: ['shared', 'inline', 'auto'], description: 'Path mode: store text in the shared string table (default), inline in each cell (best for mostly unique values such as IDs), or pick per column by how unique its values are' },
+        compactStrings: { type: 'boolean', description: 'Path mode: on save, drop shared strings no cell uses any more (e.g. after overwriting text) and report the bytes reclaimed' }
       },
       required: ['range', 'value']
     }
@@ -82,7 +191,7 @@ export const toolDefinitions = [
       properties: {
         workbook: { type: 'string', description: 'Open workbook name (live Excel)' },
         path: { type: 'string', description: 'File path to .xlsx (no Excel needed)' },
-        range: { type: 'string', description: 'Cell range (e.g. "A1:C3")' },
+        range: { type: 'string', description: 'Cell range (e.g. "A1:C3"); with path also whole columns ("A:C") or rows ("2:5")' },
         format: {
           type: 'object',
           description: 'Formatting options',
@@ -112,11 +221,60 @@ export const toolDefinitions = [
             }
           }
         },
-        sheet: { type: 'string', description: 'Sheet name (default: active sheet)' }
+        sheet: { type: 'string', description: 'Sheet name (default: active sheet)' },
+        compactStyles: { type: 'boolean', description: 'Path mode: on save, merge duplicate styles and drop the ones no cell, row or column uses, and report the bytes reclaimed' }
       },
       required: ['range', 'format']
     }
   },
+  {
+    name: 'append_rows',
+    description: 'Append rows below the last used row of a sheet. Use "workbook" for live Excel, or "path" for a .xlsx file on disk (no Excel needed, preserves images/charts). In path mode existing rows are not re-read, so appending to a large log sheet stays fast. Returns the range written.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        workbook: { type: 'string', description: 'Open workbook name (live Excel)' },
+        path: { type: 'string', description: 'File path to .xlsx (no Excel needed)' },
+        values: { type: 'array', description: '2D array of rows to append (a flat array is one row)' },
+        sheet: { type: 'string', description: 'Sheet name (default: active sheet)' },
+        column: { type: 'string', description: 'Column of the first value in each row (default: "A")' },
+        strings: { type: 'string', enum: ['shared', 'inline', 'auto'], description: 'Path mode: store text in the shared string table (default), inline in each cell (best for mostly unique values such as IDs), or pick per column by how unique its values are' }
+      },
+      required: ['values']
+    }
+  },
+  {
+    name: 'export_sheet',
+    description: 'Export a sheet or range of a .xlsx file on disk to a CSV/TSV file. Rows are streamed to the output, so large sheets are exported without loading them whole. Returns the output path and row count instead of the data.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        path: { type: 'string', description: 'File path to .xlsx' },
+        output: { type: 'string', description: 'CSV/TSV file to write' },
+        sheet: { type: 'string', description: 'Sheet name (default: first sheet)' },
+        range: { type: 'string', description: 'Range to export (default: the used range)' },
+        delimiter: { type: 'string', enum: ['comma', 'tab', 'semicolon'], description: 'Field separator (default: tab for .tsv, otherwise comma)' }
+      },
+      required: ['path', 'output']
+    }
+  },
+  {
+    name: 'import_sheet',
+    description: 'Import a CSV/TSV file into a sheet of a .xlsx file on disk. Rows are streamed into the sheet; numbers and TRUE/FALSE become typed values, numerals with leading zeros stay text. Returns the range written.',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        path: { type: 'string', description: 'File path to .xlsx' },
+        input: { type: 'string', description: 'CSV/TSV file to read (UTF-8)' },
+        sheet: { type: 'string', description: 'Sheet name (default: first sheet)' },
+        start: { type: 'string', description: 'Top-left cell of the imported data (default: "A1")' },
+        delimiter: { type: 'string', enum: ['comma', 'tab', 'semicolon'], description: 'Field separator (default: tab for .tsv, otherwise comma)' },
+        strings: { type: 'string', enum: ['shared', 'inline', 'auto'], description: 'Store text in the shared string table (default), inline in each cell (best for mostly unique values such as IDs), or pick per column by how unique its values are' },
+        compactStrings: { type: 'boolean', description: 'On save, drop shared strings no cell uses any more (e.g. after overwriting text) and report the bytes reclaimed' }
+      },
+      required: ['path', 'input']
+    }
+  },
   {
     name: 'execute_vba',
     description: 'Execute VBA code in an open workbook (live Excel only, cannot use with closed files). Code is wrapped in a Sub automatically if needed. MsgBox calls are stripped. Temp modules are cleaned up after execution.',
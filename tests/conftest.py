@@ -0,0 +1,35 @@
+"""Shared fixtures.
+
+Run from the repository root with `python -m pytest tests`. The XML
+backend follows EXCEL_MCP_XML_BACKEND as in production, so the suite can
+be run once per backend.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'scripts'))
+
+import xlsx_io  # noqa: E402
+from workbooks import build_xlsx, sheet_xml  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Give every test its own workbook cache directory."""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('EXCEL_MCP_CACHE_DIR', str(path))
+    monkeypatch.setattr(xlsx_io, 'WORKBOOK_CACHE_ENABLED', True)
+    return path
+
+
+@pytest.fixture
+def basic(tmp_path):
+    """Sheet1 A1:B3 with shared strings, a number, a boolean and a date."""
+    rows = ('<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+            '<row r="2"><c r="A2"><v>1</v></c><c r="B2" t="s"><v>2</v></c></row>'
+            '<row r="3"><c r="A3" t="b"><v>1</v></c><c r="B3" s="2"><v>45292</v></c></row>')
+    return build_xlsx(tmp_path / 'basic.xlsx', [('Sheet1', sheet_xml(rows, 'A1:B3'))],
+                      strings=['Name', 'Value', 'x'])
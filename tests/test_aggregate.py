@@ -0,0 +1,50 @@
+"""XlsxFile.aggregate(): grouping and distinct counts."""
+
+import pytest
+
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+# Column A: TRUE, 1, 1, shared "x", inline "x", 1.0; column B: numbers
+ROWS = ('<row r="1"><c r="A1" t="b"><v>1</v></c><c r="B1"><v>10</v></c></row>'
+        '<row r="2"><c r="A2"><v>1</v></c><c r="B2"><v>20</v></c></row>'
+        '<row r="3"><c r="A3"><v>1</v></c><c r="B3"><v>30</v></c></row>'
+        '<row r="4"><c r="A4" t="s"><v>0</v></c><c r="B4"><v>40</v></c></row>'
+        '<row r="5"><c r="A5" t="inlineStr"><is><t>x</t></is></c><c r="B5"><v>50</v></c></row>'
+        '<row r="6"><c r="A6"><v>1.0</v></c></row>')
+
+
+@pytest.fixture(params=['xml', 'cache'])
+def xf(request, tmp_path):
+    path = build_xlsx(tmp_path / 'agg.xlsx', [('Sheet1', sheet_xml(ROWS, 'A1:B6'))],
+                      strings=['x'])
+    if request.param == 'cache':
+        warm = XlsxFile(path).open()
+        warm.read_values('Sheet1', 'A1')
+        warm.close()
+    xf = XlsxFile(path).open()
+    yield xf
+    xf.close()
+
+
+def test_booleans_and_numbers_group_apart(xf):
+    groups = xf.aggregate('Sheet1', 'A1:B6', [2], [1], aggregates=('count', 'sum'))
+    summary = {(type(g['key'][0]).__name__, g['key'][0]): (g['rows'], g['columns'][0])
+               for g in groups}
+    assert summary == {
+        ('bool', True): (1, {'count': 1, 'sum': 10}),
+        ('int', 1): (3, {'count': 2, 'sum': 50}),
+        ('str', 'x'): (2, {'count': 2, 'sum': 90}),
+    }
+
+
+def test_distinct_keeps_booleans_apart(xf):
+    [total] = xf.aggregate('Sheet1', 'A1:B6', [1], aggregates=('count', 'distinct'))
+    assert total['rows'] == 6
+    assert total['columns'] == [{'count': 6, 'distinct': 3, 'numbers': 3}]
+
+
+def test_find_index_keeps_booleans_apart(xf):
+    exact = [(rn, cn, text) for _, rn, cn, text in xf.find_cells('1', 'exact', use_index=True)]
+    assert exact == [(2, 1, '1'), (3, 1, '1'), (6, 1, '1')]
+    assert [rn for _, rn, _, _ in xf.find_cells('TRUE', 'exact', use_index=True)] == [1]
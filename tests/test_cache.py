@@ -0,0 +1,143 @@
+"""The parsed-workbook cache: reads with and without it, and after writes."""
+
+import zipfile
+
+import pytest
+
+import xlsx_io
+from row_filter import compile_filter
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, crc_twin, sheet_xml
+
+
+def warm(path):
+    """Parse the sheet once so its compact cell cache exists."""
+    xf = XlsxFile(path).open()
+    xf.read_values('Sheet1', 'A1')
+    xf.close()
+    xf = XlsxFile(path).open()
+    assert xf._get_cell_cache(xf._sheet_path('Sheet1')) is not None
+    return xf
+
+
+def row_keys(xf, range_str):
+    return [(rn, {cn: xf._shared_strings[k[0]] if k[0] >= 0 else k[1] for cn, k in keys.items()})
+            for rn, keys in xf._iter_row_keys('Sheet1', range_str)]
+
+
+@pytest.mark.parametrize('write, row', [
+    (lambda xf: xf.write_values('Sheet1', 'A1:B1', [[999, 'new']]), 1),
+    (lambda xf: xf.write_rows('Sheet1', 'A1:B1', iter([[999, 'new']])), 1),
+    (lambda xf: xf.append_rows('Sheet1', [[999, 'new']]), 4),
+], ids=['write_values', 'write_rows', 'append_rows'])
+def test_read_after_write_in_one_session(basic, write, row):
+    xf = warm(basic)
+    xf.read_values('Sheet1', 'A1:B4')
+    list(xf.iter_values('Sheet1', 'A1:B4'))
+    write(xf)
+    assert xf.read_values('Sheet1', f'A{row}:B{row}') == [[999, 'new']]
+    assert list(xf.iter_values('Sheet1', f'A{row}:B{row}')) == [(row, [999, 'new'])]
+    assert row_keys(xf, f'A{row}:B{row}') == [(row, {1: 999, 2: 'new'})]
+    xf.close()
+
+
+def test_read_after_format_in_one_session(basic):
+    xf = warm(basic)
+    assert not any(f.get('bold') for f in xf.read_formats('Sheet1', 'A1:B1'))
+    xf.apply_format('Sheet1', 'A1:B1', {'bold': True})
+    assert all(f.get('bold') for f in xf.read_formats('Sheet1', 'A1:B1'))
+    assert xf.read_values('Sheet1', 'A1:B1') == [['Name', 'Value']]
+    xf.close()
+
+
+# Row 2 has a cell only outside A:B, row 4 only a styled empty cell
+SPARSE = ('<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1"><v>1</v></c></row>'
+          '<row r="2"><c r="C2"><v>2</v></c></row>'
+          '<row r="3"><c r="A3" t="inlineStr"><is><t>in</t></is></c><c r="B3" s="2"><v>45292</v></c></row>'
+          '<row r="4"><c r="B4" s="1"/></row>'
+          '<row r="6"><c r="A6" t="b"><v>0</v></c></row>')
+
+
+@pytest.fixture
+def sparse(tmp_path):
+    return build_xlsx(tmp_path / 'sparse.xlsx', [('Sheet1', sheet_xml(SPARSE, 'A1:C6'))],
+                      strings=['a'])
+
+
+def open_as(path, source, monkeypatch):
+    """Open path so that Sheet1 is read from 'xml', 'tree' or 'cache'."""
+    if source == 'cache':
+        return warm(path)
+    monkeypatch.setattr(xlsx_io, 'WORKBOOK_CACHE_ENABLED', False)
+    xf = XlsxFile(path).open()
+    if source == 'tree':
+        xf._get_sheet_tree('Sheet1')
+    return xf
+
+
+def snapshot(xf):
+    where = compile_filter('A == null', None, (1, 2))
+    # read_values last: it parses the sheet into a tree
+    return {
+        'rows': list(xf.iter_values('Sheet1', 'A1:B6')),
+        'filtered': list(xf.iter_values('Sheet1', 'A1:B3', where)),
+        'keys': row_keys(xf, 'A1:B6'),
+        'values': xf.read_values('Sheet1', 'A1:B6'),
+    }
+
+
+def test_sources_agree(sparse, monkeypatch):
+    results = {}
+    for source in ('xml', 'tree', 'cache'):
+        xf = open_as(sparse, source, monkeypatch)
+        results[source] = snapshot(xf)
+        xf.close()
+        monkeypatch.setattr(xlsx_io, 'WORKBOOK_CACHE_ENABLED', True)
+    assert results['xml'] == results['tree'] == results['cache']
+    assert results['xml']['rows'] == [(1, ['a', 1]), (3, ['in', '2024-01-01']),
+                                      (4, [None, None]), (6, [False, None])]
+    # Row 2 has no cell in A:B, so the filter never sees it
+    assert results['xml']['filtered'] == []
+
+
+@pytest.mark.parametrize('source', ['xml', 'cache'])
+def test_export_doesnt_depend_on_the_cache(sparse, tmp_path, monkeypatch, source):
+    from export_sheet import _export_file
+
+    open_as(sparse, source, monkeypatch).close()
+    out = tmp_path / f'{source}.csv'
+    result = _export_file(sparse, str(out), 'Sheet1', 'A1:B6', ',')
+    assert result['rows'] == 6
+    assert out.read_text(encoding='utf-8').splitlines() == [
+        'a,1', '', 'in,2024-01-01', ',', '', 'FALSE,']
+
+
+@pytest.mark.parametrize('source', ['xml', 'tree', 'cache'])
+def test_filter_null_matches_empty_cells_of_rows_in_range(sparse, monkeypatch, source):
+    xf = open_as(sparse, source, monkeypatch)
+    where = compile_filter('B == null', None, (1, 2))
+    assert list(xf.iter_values('Sheet1', 'A1:B6', where)) == [(4, [None, None]), (6, [False, None])]
+    where = compile_filter('A != null and B > 0', None, (1, 2))
+    assert list(xf.iter_values('Sheet1', 'A1:B6', where)) == [(1, ['a', 1])]
+    xf.close()
+
+
+def test_parts_with_equal_crc_and_size_dont_share_the_cache(tmp_path):
+    run = 'a' * 48
+    xml = sheet_xml(f'<row r="1"><c r="A1" t="inlineStr"><is><t>{run}</t></is></c></row>', 'A1')
+    twin = crc_twin(xml, run)
+    paths = [build_xlsx(tmp_path / f'{i}.xlsx', [('Sheet1', part)]) for i, part in enumerate((xml, twin))]
+    infos = []
+    for path in paths:
+        with zipfile.ZipFile(path) as z:
+            info = z.getinfo('xl/worksheets/sheet1.xml')
+            infos.append((info.CRC, info.file_size))
+    assert twin != xml and infos[0] == infos[1]
+
+    text = twin[xml.index(run):][:len(run)]
+    assert text != run
+    warm(paths[0]).close()
+    for path, expected in zip(paths, (run, text)):
+        xf = warm(path)
+        assert xf.read_values('Sheet1', 'A1') == [[expected]]
+        xf.close()
@@ -0,0 +1,80 @@
+"""Typed column output (.npz, Arrow) from write_columns() and read_cells."""
+
+from datetime import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from columnar import column_names, write_columns
+from xlsx_io import XlsxFile
+from workbooks import STYLES_XML, build_xlsx, sheet_xml
+
+
+def test_npz_columns_named_like_savez_arguments(tmp_path):
+    header = ['file', 'allow_pickle', 'args', 'file']
+    names = column_names(header, 4, 1)
+    assert names == ['file', 'allow_pickle', 'args', 'D']
+    columns = [[1, 2], ['a', None], [True, False], [1.5, None]]
+    path = str(tmp_path / 'out.npz')
+    schema = write_columns(path, names, columns)
+    assert [c['type'] for c in schema] == ['int64', 'string', 'bool', 'float64']
+    with np.load(path) as npz:
+        assert npz.files == names
+        assert npz['file'].tolist() == [1, 2]
+        assert npz['allow_pickle'].tolist() == ['a', '']
+        assert npz['args'].dtype == np.bool_
+        assert np.isnan(npz['D'][1])
+
+
+# cellXfs 3: m/d/yy h:mm (DATETIME), 4: h:mm:ss (TIME)
+DATE_STYLES = STYLES_XML.replace(
+    '<cellXfs count="3">', '<cellXfs count="5">').replace(
+    '</cellXfs>', '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+                  '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+                  '</cellXfs>')
+DATE_ROWS = ('<row r="1"><c r="A1" t="inlineStr"><is><t>day</t></is></c>'
+             '<c r="B1" t="inlineStr"><is><t>at</t></is></c>'
+             '<c r="C1" t="inlineStr"><is><t>time</t></is></c></row>'
+             '<row r="2"><c r="A2" s="2"><v>45292</v></c><c r="B2" s="3"><v>45292.5</v></c>'
+             '<c r="C2" s="4"><v>0.75</v></c></row>'
+             '<row r="3"><c r="B3" s="2"><v>45293</v></c></row>')
+
+
+@pytest.fixture
+def dated(tmp_path):
+    return build_xlsx(tmp_path / 'dates.xlsx', [('Sheet1', sheet_xml(DATE_ROWS, 'A1:C3'))],
+                      styles=DATE_STYLES)
+
+
+@pytest.mark.parametrize('cached', [False, True])
+def test_date_columns_are_typed_in_npz(dated, tmp_path, cached):
+    from read_cells import _read_to_file
+
+    if cached:
+        xf = XlsxFile(dated).open()
+        xf.read_values('Sheet1', 'A1')
+        xf.close()
+    out = str(tmp_path / 'dates.npz')
+    result = _read_to_file(dated, 'A1:C3', None, out, header=True)
+    assert [c['type'] for c in result['schema']] == ['date', 'datetime', 'time']
+    with np.load(out) as npz:
+        assert npz['day'].dtype == np.dtype('datetime64[D]')
+        assert npz['day'][0] == np.datetime64('2024-01-01') and np.isnat(npz['day'][1])
+        assert npz['at'].tolist() == [np.datetime64('2024-01-01T12:00', 'ms').item(),
+                                      np.datetime64('2024-01-02T00:00', 'ms').item()]
+        assert npz['time'].dtype == np.dtype('timedelta64[ms]')
+        assert npz['time'][0] == np.timedelta64(18 * 3600 * 1000, 'ms')
+
+
+def test_date_columns_are_typed_in_arrow(dated, tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    from read_cells import _read_to_file
+
+    out = str(tmp_path / 'dates.arrow')
+    _read_to_file(dated, 'A1:C3', None, out, header=True)
+    with pa.memory_map(out) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert [str(t) for t in table.schema.types] == ['date32[day]', 'timestamp[ms]', 'time64[us]']
+    assert table.column('at').to_pylist()[1].isoformat() == '2024-01-02T00:00:00'
+    assert table.column('time').to_pylist() == [time(18), None]
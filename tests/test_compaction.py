@@ -0,0 +1,57 @@
+"""Shared-string and style compaction on raw sheet XML."""
+
+import pytest
+
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+# t and s before r, and the usual order, in one sheet
+ROWS = ('<row r="1"><c t="s" r="A1"><v>2</v></c><c r="B1" t="s"><v>1</v></c></row>'
+        '<row r="2"><c s="1" t="s" r="A2"><v>3</v></c><c r="B2" s="1"><v>5</v></c></row>')
+EXPECTED = [['two', 'one'], ['three', 5]]
+
+
+@pytest.fixture(params=['', 'x'], ids=['default-ns', 'prefixed-ns'])
+def workbook(request, tmp_path):
+    return build_xlsx(tmp_path / 'c.xlsx',
+                      [('Sheet1', sheet_xml(ROWS, 'A1:B2', prefix=request.param))],
+                      strings=['dead', 'one', 'two', 'three', 'dead too'])
+
+
+def reopened(path):
+    xf = XlsxFile(path).open()
+    try:
+        return xf.read_values('Sheet1', 'A1:B2'), xf.read_formats('Sheet1', 'A1:B2')
+    finally:
+        xf.close()
+
+
+def test_compact_shared_strings_keeps_t_first_cells(workbook):
+    xf = XlsxFile(workbook).open()
+    stats = xf.compact_shared_strings()
+    xf.save()
+    xf.close()
+    assert stats['strings'] == 5 and stats['removed'] == 2
+    assert reopened(workbook)[0] == EXPECTED
+
+
+def test_compact_shared_strings_after_a_write(workbook):
+    xf = XlsxFile(workbook).open()
+    xf.write_values('Sheet1', 'B1', [['fresh']])
+    stats = xf.compact_shared_strings()
+    xf.save()
+    xf.close()
+    assert stats['removed'] == 3
+    assert reopened(workbook)[0] == [['two', 'fresh'], ['three', 5]]
+
+
+def test_compact_styles_keeps_s_first_cells(workbook):
+    xf = XlsxFile(workbook).open()
+    stats = xf.compact_styles()
+    xf.save()
+    xf.close()
+    assert stats['removed'].get('cellXfs') == 1  # the unused date style
+    values, fmts = reopened(workbook)
+    assert values == EXPECTED
+    bold = {f['cell'] for f in fmts if f.get('bold')}
+    assert bold == {'A2', 'B2'}
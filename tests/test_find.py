@@ -0,0 +1,42 @@
+"""XlsxFile.find_cells() with and without the inverted index."""
+
+import pytest
+
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+
+@pytest.fixture
+def stale(tmp_path):
+    """<dimension> says A1:B3, but there are cells in D3 and on row 9."""
+    rows = ('<row r="1"><c r="A1" t="s"><v>0</v></c></row>'
+            '<row r="3"><c r="B3"><v>5</v></c><c r="D3"><v>7</v></c></row>'
+            '<row r="9"><c r="A9" t="s"><v>1</v></c></row>')
+    return build_xlsx(tmp_path / 'stale.xlsx',
+                      [('Sheet1', sheet_xml(rows, 'A1:B3')),
+                       ('Sheet2', sheet_xml('<row r="2"><c r="C2" t="s"><v>1</v></c></row>', 'A1'))],
+                      strings=['Customer', 'C-7 Acme'])
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_cells_outside_the_dimension_are_found(stale, use_index):
+    xf = XlsxFile(stale).open()
+    try:
+        found = [(s, rn, cn) for s, rn, cn, _ in xf.find_cells('7', use_index=use_index)]
+        assert found == [('Sheet1', 3, 4), ('Sheet1', 9, 1), ('Sheet2', 2, 3)]
+        exact = list(xf.find_cells('C-7 Acme', 'exact', True, ['Sheet2'], use_index))
+        assert exact == [('Sheet2', 2, 3, 'C-7 Acme')]
+    finally:
+        xf.close()
+
+
+def test_index_follows_edits(stale):
+    xf = XlsxFile(stale).open()
+    assert list(xf.find_cells('zz-1', use_index=True)) == []
+    xf.write_values('Sheet1', 'F20', [['ZZ-1']])
+    assert list(xf.find_cells('zz-1', use_index=True)) == [('Sheet1', 20, 6, 'ZZ-1')]
+    xf.save()
+    xf.close()
+    xf = XlsxFile(stale).open()
+    assert list(xf.find_cells('zz-1', use_index=True)) == [('Sheet1', 20, 6, 'ZZ-1')]
+    xf.close()
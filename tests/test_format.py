@@ -0,0 +1,165 @@
+"""Formatting of ranges, whole columns and whole rows."""
+
+import re
+import zipfile
+
+import pytest
+
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+
+def sheet_part(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
+def part_cells(path):
+    return len(re.findall(r'<(?:\w+:)?c ', sheet_part(path)))
+
+
+def formats(path, range_str):
+    xf = XlsxFile(path).open()
+    try:
+        return xf.read_formats('Sheet1', range_str)
+    finally:
+        xf.close()
+
+
+def test_range_format(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'A1:B1', {'bold': True})
+    xf.save()
+    xf.close()
+    fmts = {f['cell']: f for f in formats(basic, 'A1:B2')}
+    assert fmts['A1']['bold'] and fmts['B1']['bold']
+    assert not fmts.get('A2', {}).get('bold')
+
+
+def test_whole_columns_use_col_styles(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'B:C', {'bold': True})
+    xf.save()
+    xf.close()
+    part = sheet_part(basic)
+    col = re.search(r'<col [^>]*min="2"[^>]*>', part).group(0)
+    assert 'max="3"' in col and 'style="' in col
+    # Existing cells are restyled, no cells are created for the rest of the column
+    assert part_cells(basic) == 6
+    fmts = {f['cell']: f for f in formats(basic, 'A1:B3')}
+    assert fmts['B1']['bold'] and fmts['B2']['bold']
+    assert not fmts.get('A1', {}).get('bold')
+    # The date style of B3 is kept alongside the new font
+    assert fmts['B3']['bold'] and fmts['B3']['numberFormat'] == 'mm-dd-yy'
+
+
+def test_whole_rows_use_row_styles(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', '2:3', {'bold': True})
+    xf.save()
+    xf.close()
+    part = sheet_part(basic)
+    for rn in (2, 3):
+        row = re.search(rf'<row [^>]*r="{rn}"[^>]*>', part).group(0)
+        assert 'customFormat="1"' in row and ' s="' in row
+    assert '<row r="1">' in part
+    fmts = {f['cell']: f for f in formats(basic, 'A1:B3')}
+    assert fmts['A2']['bold'] and fmts['B3']['bold']
+    assert not fmts.get('A1', {}).get('bold')
+
+
+def test_row_format_fills_cells_under_styled_columns(tmp_path):
+    path = build_xlsx(tmp_path / 'cr.xlsx',
+                      [('Sheet1', sheet_xml('<row r="1"><c r="A1"><v>1</v></c></row>', 'A1',
+                                            cols='<col min="2" max="2" width="9" style="2" customWidth="1"/>'))])
+    xf = XlsxFile(path).open()
+    xf.apply_format('Sheet1', '1:1', {'bold': True})
+    xf.save()
+    xf.close()
+    fmts = {f['cell']: f for f in formats(path, 'A1:B1')}
+    # B1 showed the column's date format; it keeps it under the row style
+    assert fmts['B1']['bold'] and fmts['B1']['numberFormat'] == 'mm-dd-yy'
+
+
+def test_empty_positions_show_column_styles(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'A:B', {'bold': True})
+    # Read in the same session, then after saving with and without the cache
+    in_session = xf.read_formats('Sheet1', 'A1:C4')
+    xf.save()
+    xf.close()
+    for fmts in (in_session, formats(basic, 'A1:C4'), formats(basic, 'A1:C4')):
+        bold = {f['cell'] for f in fmts if f.get('bold')}
+        assert bold == {f'{c}{r}' for c in 'AB' for r in range(1, 5)}
+    assert part_cells(basic) == 6
+
+
+def test_empty_positions_show_row_styles_over_column_styles(tmp_path):
+    path = build_xlsx(tmp_path / 'rs.xlsx',
+                      [('Sheet1', sheet_xml('<row r="1"><c r="A1"><v>1</v></c></row>'
+                                            '<row r="3" s="1" customFormat="1"/>'
+                                            '<row r="4" customFormat="1"/>', 'A1',
+                                            cols='<col min="2" max="2" width="9" style="2" customWidth="1"/>'))])
+    fmts = {f['cell']: f for f in formats(path, 'A1:C4')}
+    assert sorted(fmts) == ['A3', 'B1', 'B2', 'B3', 'C3']
+    assert fmts['B1']['numberFormat'] == 'mm-dd-yy' and not fmts['B1'].get('bold')
+    assert fmts['B3']['bold'] and 'numberFormat' not in fmts['B3']
+
+
+def test_grouped_formats_cover_empty_positions(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'A:B', {'bold': True})
+    xf.save()
+    xf.close()
+    xf = XlsxFile(basic).open()
+    groups = xf.read_formats('Sheet1', 'A1:B6', group=True)
+    xf.close()
+    assert [g['range'] for g in groups] == ['A1:B2', 'A3', 'B3', 'A4:B6']
+    assert groups[2]['numberFormat'] == 'mm-dd-yy'
+
+
+@pytest.mark.parametrize('area', ['C:A', '5:2', 'B5:A1', 'A3:B1'])
+def test_reversed_areas_are_rejected(basic, area):
+    xf = XlsxFile(basic).open()
+    with pytest.raises(ValueError):
+        xf.apply_format('Sheet1', area, {'bold': True})
+    xf.close()
+
+
+def test_row_format_over_a_sheet_wide_column_style_adds_no_cells(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'A:XFD', {'bold': True})
+    xf.apply_format('Sheet1', '1:200', {'italic': True})
+    xf.save()
+    xf.close()
+    assert part_cells(basic) == 6
+    fmts = {f['cell']: f for f in formats(basic, 'A1:C201')}
+    for ref in ('A1', 'C2', 'C200'):
+        assert fmts[ref]['bold'] and fmts[ref]['italic'], ref
+    assert fmts['C201']['bold'] and not fmts['C201'].get('italic')
+
+
+def test_column_format_of_the_whole_width_restyles_styled_rows(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', '2:3', {'bold': True})
+    xf.apply_format('Sheet1', 'A:XFD', {'italic': True})
+    xf.save()
+    xf.close()
+    assert part_cells(basic) == 6
+    fmts = {f['cell']: f for f in formats(basic, 'A1:C4')}
+    assert fmts['C2']['bold'] and fmts['C2']['italic']
+    assert fmts['C4']['italic'] and not fmts['C4'].get('bold')
+
+
+def test_row_format_adds_cells_only_where_columns_differ(basic):
+    xf = XlsxFile(basic).open()
+    xf.apply_format('Sheet1', 'E:XFD', {'bold': True})
+    xf.apply_format('Sheet1', '1:1', {'italic': True})
+    xf.save()
+    xf.close()
+    # The row takes bold italic; C1 and D1 need cells to stay plain italic
+    assert part_cells(basic) == 8
+    fmts = {f['cell']: f for f in formats(basic, 'A1:F1')}
+    assert fmts['C1']['italic'] and not fmts['C1'].get('bold')
+    assert fmts['F1']['italic'] and fmts['F1']['bold']
+    assert fmts['A1']['italic'] and not fmts['A1'].get('bold')
@@ -0,0 +1,83 @@
+"""Parts inflated up front by XlsxFile.open(sheets=...)."""
+
+import zipfile
+
+import pytest
+
+import xlsx_io
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+SHARED = 'xl/sharedStrings.xml'
+STYLES = 'xl/styles.xml'
+
+
+def rows(n, text):
+    return ''.join(f'<row r="{r}"><c r="A{r}" t="s"><v>0</v></c>'
+                   f'<c r="B{r}"><v>{r}</v></c>'
+                   f'<c r="C{r}" t="inlineStr"><is><t>{text}{r}</t></is></c></row>'
+                   for r in range(1, n + 1))
+
+
+@pytest.fixture
+def three(tmp_path):
+    return build_xlsx(tmp_path / 'three.xlsx',
+                      [('One', sheet_xml(rows(400, 'one'))),
+                       ('Two', sheet_xml(rows(30, 'two'))),
+                       ('Three', sheet_xml(rows(200, 'three')))],
+                      strings=['s'], stored=('xl/worksheets/sheet2.xml',))
+
+
+def inflated(xf):
+    """Member name -> (kept on the heap, contents) of what xf has inflated."""
+    return {name: (isinstance(data, bytes), bytes(data))
+            for name, data in xf._entries._data.items()}
+
+
+def test_open_inflates_requested_sheets(three):
+    xf = XlsxFile(three).open(sheets=['Three', None, 'Missing'])
+    assert set(xf._entries._data) >= {SHARED, STYLES, 'xl/worksheets/sheet3.xml',
+                                      'xl/worksheets/sheet1.xml'}
+    assert 'xl/worksheets/sheet2.xml' not in xf._entries._data
+    xf.close()
+
+
+def test_open_skips_sheets_in_the_cell_cache(three):
+    xf = XlsxFile(three).open()
+    xf.read_values('One', 'A1')
+    xf.close()
+    xf = XlsxFile(three).open(sheets=['One'])
+    assert 'xl/worksheets/sheet1.xml' not in xf._entries._data
+    assert xf.read_values('One', 'A400:C400') == [['s', 400, 'one400']]
+    xf.close()
+
+
+# Sheet 1 (50 KB) spills for its size at 40000; with the 10000 heap limit
+# sheet 3 (25 KB) spills too, as the heap already holds the earlier parts
+@pytest.mark.parametrize('spill_min, max_memory', [(1 << 30, 1 << 30), (40000, 1 << 30), (40000, 10000)])
+def test_pooled_open_matches_sequential_loading(three, monkeypatch, spill_min, max_memory):
+    monkeypatch.setattr(xlsx_io, 'WORKBOOK_CACHE_ENABLED', False)
+    monkeypatch.setattr(xlsx_io, 'SPILL_MIN_BYTES', spill_min)
+    monkeypatch.setattr(xlsx_io, 'MAX_MEMORY_BYTES', max_memory)
+    monkeypatch.setattr(xlsx_io, 'PARALLEL_INFLATE_MIN_BYTES', 0)
+
+    monkeypatch.setattr(xlsx_io, 'INFLATE_WORKERS', 4)
+    pooled = XlsxFile(three).open(sheets=True)
+    monkeypatch.setattr(xlsx_io, 'INFLATE_WORKERS', 1)
+    sequential = XlsxFile(three).open(sheets=True)
+    lazy = XlsxFile(three).open()
+    for name in pooled._entries._data:
+        lazy._entries[name]
+
+    assert inflated(pooled) == inflated(sequential) == inflated(lazy)
+    assert pooled._entries._heap == sequential._entries._heap == lazy._entries._heap
+    spilled = {name for name, (heap, _) in inflated(pooled).items() if not heap}
+    assert spilled == ({'xl/worksheets/sheet1.xml', 'xl/worksheets/sheet3.xml'} if max_memory < 1 << 30
+                       else {'xl/worksheets/sheet1.xml'} if spill_min < 1 << 30 else set())
+    with zipfile.ZipFile(three) as z:
+        for name, (_, data) in inflated(pooled).items():
+            assert data == z.read(name)
+    for name in pooled.sheet_names:
+        assert pooled.read_values(name, 'A1:C30') == lazy.read_values(name, 'A1:C30')
+    for xf in (pooled, sequential, lazy):
+        xf.close()
@@ -0,0 +1,116 @@
+"""Writes through raw row patching, streamed merges and save()."""
+
+import re
+import zipfile
+
+import pytest
+
+import xlsx_io
+from xlsx_io import XlsxFile
+from workbooks import build_xlsx, sheet_xml
+
+
+def read(path, range_str, sheet='Sheet1'):
+    xf = XlsxFile(path).open()
+    try:
+        return xf.read_values(sheet, range_str)
+    finally:
+        xf.close()
+
+
+@pytest.mark.parametrize('stored', [(), ('xl/worksheets/sheet1.xml', 'xl/sharedStrings.xml',
+                                         'xl/styles.xml', '[Content_Types].xml')])
+def test_save_round_trip_keeps_members(basic, tmp_path, stored):
+    path = build_xlsx(tmp_path / 'rt.xlsx',
+                      [('Sheet1', sheet_xml('<row r="1"><c r="A1"><v>1</v></c></row>', 'A1')),
+                       ('Other', sheet_xml('<row r="1"><c r="A1" t="s"><v>0</v></c></row>', 'A1'))],
+                      strings=['keep'], stored=stored)
+    with zipfile.ZipFile(path) as z:
+        before = {i.filename: (i.compress_type, z.read(i.filename)) for i in z.infolist()}
+
+    xf = XlsxFile(path).open()
+    xf.write_values('Sheet1', 'A1:B1', [[2, 'new']])
+    xf.save()
+    xf.close()
+
+    with zipfile.ZipFile(path) as z:
+        assert z.testzip() is None
+        after = {i.filename: (i.compress_type, z.read(i.filename)) for i in z.infolist()}
+    assert list(after) == list(before)
+    for name, (ctype, data) in before.items():
+        assert after[name][0] == ctype, name
+        if name not in ('xl/worksheets/sheet1.xml', 'xl/sharedStrings.xml', '[Content_Types].xml',
+                        'xl/_rels/workbook.xml.rels'):
+            assert after[name][1] == data, name
+    assert read(path, 'A1:B1') == [[2, 'new']]
+    assert read(path, 'A1', 'Other') == [['keep']]
+
+
+def test_save_twice_in_one_session(basic):
+    xf = XlsxFile(basic).open()
+    xf.write_values('Sheet1', 'C1:C3', [['first'], ['first'], ['first']])
+    xf.save()
+    xf.write_values('Sheet1', 'D1', [[3.5]])
+    xf.save()
+    xf.close()
+    assert read(basic, 'A1:D3') == [['Name', 'Value', 'first', 3.5], [1, 'x', 'first', None],
+                                    [True, '2024-01-01', 'first', None]]
+    # One <si> per unique string, and the new references counted once
+    with zipfile.ZipFile(basic) as z:
+        sst = z.read('xl/sharedStrings.xml').decode('utf-8')
+    items = re.findall(r'<si>(.*?)</si>', sst)
+    assert len(items) == len(set(items)) == 4
+    tag = re.search(r'<sst [^>]*>', sst).group(0)
+    assert 'uniqueCount="4"' in tag and ' count="6"' in tag
+
+
+def test_patched_rows_keep_the_rest_of_the_sheet(basic):
+    xf = XlsxFile(basic).open()
+    xf.write_values('Sheet1', 'B2:C2', [['y', 7]])
+    xf.save()
+    xf.close()
+    assert read(basic, 'A1:C3') == [['Name', 'Value', None], [1, 'y', 7],
+                                    [True, '2024-01-01', None]]
+    xf = XlsxFile(basic).open()
+    assert xf.sheet_dimension('Sheet1') == 'A1:C3'
+    xf.close()
+
+
+def test_streamed_merge_matches_patching(tmp_path, monkeypatch):
+    rows = ''.join(f'<row r="{r}"><c r="A{r}"><v>{r}</v></c></row>' for r in range(1, 41, 2))
+    values = [[r * 10, f's{r}'] for r in range(1, 41)]
+    results = []
+    for limit in (1000, 2):  # raw patch, then streamed merge
+        monkeypatch.setattr(xlsx_io, 'ROW_PATCH_MAX_ROWS', limit)
+        path = build_xlsx(tmp_path / f'm{limit}.xlsx', [('Sheet1', sheet_xml(rows, 'A1:A39'))],
+                          strings=[])
+        xf = XlsxFile(path).open()
+        xf.write_values('Sheet1', 'A1:B40', values)
+        xf.save()
+        xf.close()
+        results.append(read(path, 'A1:B41'))
+    assert results[0] == results[1] == values + [[None, None]]
+
+
+def test_append_rows_after_last_row(basic):
+    xf = XlsxFile(basic).open()
+    written = xf.append_rows('Sheet1', [['z', 4], [None, True]])
+    xf.save()
+    xf.close()
+    assert written == 'A4:B5'
+    assert read(basic, 'A4:B5') == [['z', 4], [None, True]]
+
+
+def test_prefixed_namespace_sheet(tmp_path):
+    rows = ('<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1"><v>2</v></c></row>'
+            '<row r="2"><c r="A2" t="inlineStr"><is><t>inline</t></is></c></row>')
+    path = build_xlsx(tmp_path / 'px.xlsx', [('Sheet1', sheet_xml(rows, 'A1:B2', prefix='x'))],
+                      strings=['shared'])
+    assert read(path, 'A1:B2') == [['shared', 2], ['inline', None]]
+    xf = XlsxFile(path).open()
+    xf.write_values('Sheet1', 'B2', [['new']])
+    xf.save()
+    xf.close()
+    assert read(path, 'A1:B2') == [['shared', 2], ['inline', 'new']]
+    with zipfile.ZipFile(path) as z:
+        assert b'<x:worksheet' in z.read('xl/worksheets/sheet1.xml')
@@ -0,0 +1,126 @@
+"""Small .xlsx workbooks built directly with zipfile, for the tests."""
+
+import zipfile
+import zlib
+
+NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# cellXfs: 0 default, 1 bold, 2 date (built-in format 14)
+STYLES_XML = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="{NS}">
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/><xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>'''
+
+
+def sheet_xml(rows, dimension=None, prefix='', cols=None):
+    """A worksheet part around the given <row> elements (written without prefix)."""
+    p = f'{prefix}:' if prefix else ''
+    xmlns = f'xmlns:{prefix}="{NS}"' if prefix else f'xmlns="{NS}"'
+    if prefix:
+        rows = rows.replace('<row', f'<{p}row').replace('</row', f'</{p}row') \
+                   .replace('<c ', f'<{p}c ').replace('</c>', f'</{p}c>') \
+                   .replace('<v>', f'<{p}v>').replace('</v>', f'</{p}v>') \
+                   .replace('<is>', f'<{p}is>').replace('</is>', f'</{p}is>') \
+                   .replace('<t>', f'<{p}t>').replace('</t>', f'</{p}t>')
+    dim = f'<{p}dimension ref="{dimension}"/>' if dimension else ''
+    cols = f'<{p}cols>{cols}</{p}cols>' if cols else ''
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<{p}worksheet {xmlns} xmlns:r="{NS_R}">{dim}{cols}'
+            f'<{p}sheetData>{rows}</{p}sheetData></{p}worksheet>')
+
+
+def build_xlsx(path, sheets, strings=None, stored=(), date1904=False, styles=STYLES_XML):
+    """Write a workbook: sheets is [(name, sheet part XML)], strings the shared strings.
+
+    Members named in stored are written uncompressed, the others deflated.
+    """
+    parts = {}
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+        f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(sheets) + 1))
+    if strings is not None:
+        overrides += ('<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+                      'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>')
+    parts['[Content_Types].xml'] = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f'{overrides}</Types>')
+    parts['_rels/.rels'] = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+    pr = '<workbookPr date1904="1"/>' if date1904 else ''
+    parts['xl/workbook.xml'] = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{NS}" xmlns:r="{NS_R}">{pr}<sheets>'
+        + ''.join(f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>'
+                  for i, (name, _) in enumerate(sheets, 1))
+        + '</sheets></workbook>')
+    rels = ''.join(
+        f'<Relationship Id="rId{i}" Type="{NS_R}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(sheets) + 1))
+    n = len(sheets)
+    rels += f'<Relationship Id="rId{n + 1}" Type="{NS_R}/styles" Target="styles.xml"/>'
+    if strings is not None:
+        rels += f'<Relationship Id="rId{n + 2}" Type="{NS_R}/sharedStrings" Target="sharedStrings.xml"/>'
+    parts['xl/_rels/workbook.xml.rels'] = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{rels}</Relationships>')
+    parts['xl/styles.xml'] = styles
+    for i, (_, xml) in enumerate(sheets, 1):
+        parts[f'xl/worksheets/sheet{i}.xml'] = xml
+    if strings is not None:
+        parts['xl/sharedStrings.xml'] = (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="{NS}" count="{len(strings)}" uniqueCount="{len(strings)}">'
+            + ''.join(f'<si><t>{s}</t></si>' for s in strings) + '</sst>')
+
+    with zipfile.ZipFile(path, 'w') as z:
+        for name, data in parts.items():
+            z.writestr(name, data, zipfile.ZIP_STORED if name in stored else zipfile.ZIP_DEFLATED)
+    return str(path)
+
+
+def crc_twin(text, run):
+    """Return text with some letters of `run` (a run of 'a's) turned into 'c',
+    so that it differs from text but has the same size and CRC32.
+
+    For a fixed length, flipping bits changes the CRC32 linearly; with more
+    flippable bits than the CRC has, some nonempty set of flips cancels out.
+    """
+    data = text.encode('ascii')
+    start = data.index(run.encode('ascii'))
+    base = zlib.crc32(data)
+    basis = {}  # top bit -> (CRC change, positions flipped for it)
+    for i in range(start, start + len(run)):
+        flipped = bytearray(data)
+        flipped[i] ^= 0x02  # 'a' <-> 'c'
+        change, flips = zlib.crc32(bytes(flipped)) ^ base, {i}
+        while change:
+            top = change.bit_length() - 1
+            if top not in basis:
+                basis[top] = (change, flips)
+                break
+            other, other_flips = basis[top]
+            change, flips = change ^ other, flips ^ other_flips
+        else:
+            twin = bytearray(data)
+            for j in flips:
+                twin[j] ^= 0x02
+            return twin.decode('ascii')
+    raise ValueError("run too short to cancel out")